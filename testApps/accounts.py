@@ -0,0 +1,46 @@
+from ledger import Ledger
+from rollups import RollupCache
+from search import SearchIndex
+from storage import MemoryStorage
+
+
+MAIN_LEDGER = "Main"  # Name of the ledger FinanceMain's storage argument belongs to
+
+
+class Account:
+    """One named ledger: its incomes and expenses and everything derived from them.
+
+    Each account has its own storage, running totals, rollup cache and
+    search indexes, and remembers how much of its stored history is
+    loaded. FinanceMain shows one account at a time; switching just points
+    it at another Account, so its caches stay warm and nothing is reloaded.
+    """
+    def __init__(self, name, storage=None):
+        self.name = name
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.loaded = False  # Set once FinanceMain.load_data() has read it
+        self.loaded_from = None  # Oldest timestamp loaded from storage (None = everything)
+        self.history_pages = None  # (kind, cursor, storage.history() generator) for the history lists
+        self.unloaded_rows = {'income': 0, 'expenses': 0}  # Stored rows older than loaded_from
+        self.incomes = Ledger()
+        self.expenses = Ledger()
+        # Running totals in whole pence
+        self.total_income = 0
+        self.total_expenses = 0
+        self.current_balance = 0
+        self.rollups = RollupCache()  # Bucket totals for the Charts view, Hour to Year
+        self.income_search = SearchIndex(self.incomes)
+        self.expense_search = SearchIndex(self.expenses)
+
+    def ledger(self, kind):
+        return self.incomes if kind == 'income' else self.expenses
+
+    def row_count(self, kind):
+        """Rows of kind in the whole history, loaded or not"""
+        return len(self.ledger(kind)) + self.unloaded_rows[kind]
+
+
+def account_attribute(name):
+    """A FinanceMain attribute that reads and writes the current account's"""
+    return property(lambda app: getattr(app.account, name),
+                    lambda app, value: setattr(app.account, name, value))
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+import calendar
+
+from ledger import EPOCH
+
+
+# Granularities the chart can show, finest first
+PERIOD_TYPES = ("Hour", "Day", "Week", "Month", "Quarter", "Year")
+# How many buckets one page of the chart shows unless told otherwise
+DEFAULT_BUCKETS = {"Hour": 24, "Day": 7, "Week": 4, "Month": 6, "Quarter": 4, "Year": 5}
+EPOCH_MONDAY = datetime(1969, 12, 29)  # Week numbers count from this Monday
+
+
+def bucket_index(period_type, moment):
+    """Return the number of the bucket holding moment (a datetime).
+
+    Buckets of one period type are numbered consecutively, so stepping
+    through any range is plain integer arithmetic.
+    """
+    if period_type == "Hour":
+        return (moment - EPOCH) // timedelta(hours=1)
+    if period_type == "Day":
+        return (moment - EPOCH).days
+    if period_type == "Week":
+        return (moment - EPOCH_MONDAY).days // 7
+    if period_type == "Month":
+        return moment.year * 12 + moment.month - 1
+    if period_type == "Quarter":
+        return (moment.year * 12 + moment.month - 1) // 3
+    if period_type == "Year":
+        return moment.year
+    raise ValueError(f"Unknown period type: {period_type!r}")
+
+
+def bucket_start(period_type, index):
+    """Return the datetime bucket number index starts at"""
+    if period_type == "Hour":
+        return EPOCH + timedelta(hours=index)
+    if period_type == "Day":
+        return EPOCH + timedelta(days=index)
+    if period_type == "Week":
+        return EPOCH_MONDAY + timedelta(weeks=index)
+    if period_type == "Month":
+        return datetime(index // 12, index % 12 + 1, 1)
+    if period_type == "Quarter":
+        return datetime(index * 3 // 12, index * 3 % 12 + 1, 1)
+    if period_type == "Year":
+        return datetime(index, 1, 1)
+    raise ValueError(f"Unknown period type: {period_type!r}")
+
+
+def bucket_label(period_type, start, full=False):
+    """Return the short label shown under a bucket's bars.
+
+    full adds the date or year, for pages long enough that the short
+    labels would repeat.
+    """
+    if period_type == "Hour":
+        return start.strftime("%m/%d %H:00" if full else "%H:00")
+    if period_type == "Day":
+        return start.strftime("%m/%d/%Y" if full else "%m/%d")
+    if period_type == "Week":
+        return f"Week {start.strftime('%m/%d/%Y' if full else '%m/%d')}"
+    if period_type == "Month":
+        return f"{calendar.month_abbr[start.month]} {start.year}" if full else calendar.month_abbr[start.month]
+    if period_type == "Quarter":
+        return f"Q{(start.month - 1) // 3 + 1} {start.year}"
+    return str(start.year)
+
+
+def index_buckets(period_type, first, last):
+    """Return (label, start, end) for bucket numbers first..last inclusive"""
+    starts = [bucket_start(period_type, index) for index in range(first, last + 2)]
+    labels = [bucket_label(period_type, start) for start in starts[:-1]]
+    if len(set(labels)) < len(labels):
+        # Labels are chart keys, so they must be unique on a page
+        labels = [bucket_label(period_type, start, full=True) for start in starts[:-1]]
+    return list(zip(labels, starts, starts[1:]))
+
+
+def chart_buckets(period_type, offset, today=None, count=None):
+    """Return the (label, start, end) buckets shown by the Charts view.
+
+    Buckets are consecutive and ordered oldest first; start is inclusive and
+    end is exclusive. A page holds count buckets (DEFAULT_BUCKETS for the
+    period type when None) and ends with the one holding today; offset
+    counts whole pages back from there.
+    """
+    if period_type not in DEFAULT_BUCKETS:
+        return []
+    if today is None:
+        today = datetime.now()
+    elif not isinstance(today, datetime):
+        today = datetime(today.year, today.month, today.day)
+    if count is None:
+        count = DEFAULT_BUCKETS[period_type]
+    last = bucket_index(period_type, today) - offset * count
+    return index_buckets(period_type, last - count + 1, last)
+
+
+def page_offset(period_type, moment, count=None, today=None):
+    """Return the chart_buckets() offset of the page that shows moment"""
+    if today is None:
+        today = datetime.now()
+    if count is None:
+        count = DEFAULT_BUCKETS[period_type]
+    return max(0, (bucket_index(period_type, today) - bucket_index(period_type, moment)) // count)
+
+
+def describe_buckets(period_type, buckets):
+    """Return a heading such as '03/01 - 03/07/2024' for a page of buckets"""
+    if not buckets:
+        return ""
+    first, last = buckets[0][1], buckets[-1][1]
+    if period_type == "Hour":
+        if first.date() == last.date():
+            return f"{first.strftime('%m/%d/%Y %H:00')} - {last.strftime('%H:00')}"
+        return f"{first.strftime('%m/%d %H:00')} - {last.strftime('%m/%d/%Y %H:00')}"
+    if period_type in ("Day", "Week"):
+        return f"{first.strftime('%m/%d')} - {last.strftime('%m/%d/%Y')}"
+    if period_type == "Month":
+        if first.year == last.year:
+            return f"{calendar.month_abbr[first.month]} - {calendar.month_abbr[last.month]} {last.year}"
+        return (f"{calendar.month_abbr[first.month]} {first.year} - "
+                f"{calendar.month_abbr[last.month]} {last.year}")
+    if period_type == "Quarter":
+        return f"{bucket_label(period_type, first)} - {bucket_label(period_type, last)}"
+    return f"{first.year} - {last.year}"
+
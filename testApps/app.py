@@ -1,41 +1,129 @@
+import os
+import random
 import tkinter as tk
+from contextlib import contextmanager
 from datetime import datetime
+from tkinter import filedialog
+
+from accounts import MAIN_LEDGER, Account, account_attribute
+from aggregation import DEFAULT_BUCKETS, PERIOD_TYPES, chart_buckets, describe_buckets, page_offset
+from charts import BarChart
+from importer import StatementImporter, export_csv
+from journal import JournalStorage
+from ledger import Ledger, from_timestamp, to_timestamp
+from money import format_money, format_pence, parse_money
+from profiling import DATA_PATHS, UI_CALLBACKS, PerformanceHUD, Profiler
+from rollups import combined_lookup, compute_totals
+from sample_data import EXPENSES_PER_DAY, expense_columns, expense_rows, income_rows
+from search import parse_query
+from storage import KINDS, PAGE_SIZE, BufferedWrites, SQLiteStorage
+from tasks import TaskRunner
+from views import ViewManager
+from virtual_list import VirtualList
+
+EXPENSE_CATEGORIES = ["Food", "Transportation", "Housing", "Entertainment", "Healthcare", "Other"]
+IMPORT_POLL_MS = 100  # How often the UI checks on a running import
 
 
 class FinanceMain:
     """Main class for the Finance Tracker application."""
-    def __init__(self, root):
+    # Everything kept per ledger belongs to the current Account (see
+    # accounts.py): the storage, the ledgers, their running totals in whole
+    # pence, the chart rollups and the description search indexes
+    storage = account_attribute('storage')
+    loaded_from = account_attribute('loaded_from')
+    history_pages = account_attribute('history_pages')
+    incomes = account_attribute('incomes')
+    expenses = account_attribute('expenses')
+    total_income = account_attribute('total_income')
+    total_expenses = account_attribute('total_expenses')
+    current_balance = account_attribute('current_balance')
+    rollups = account_attribute('rollups')
+    income_search = account_attribute('income_search')
+    expense_search = account_attribute('expense_search')
+    
+    def __init__(self, root, storage=None, max_cached_views=None, worker_processes=False, profiler=None,
+                 ledgers=None, open_storage=None):
         self.root = root
         self.root.title("Finance Tracker")
         self.root.geometry("800x600")
         self.root.resizable(False, False)
-        self.expenses = []  # Changed to list to store multiple expenses
-        self.incomes = []   # Changed to list to store multiple incomes
-        self.total_expenses = 0.0
-        self.total_income = 0.0
-        self.current_balance = 0.0
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Named ledgers: storage belongs to MAIN_LEDGER and ledgers maps any
+        # others to theirs (the default keeps data in memory only);
+        # open_storage(name) makes the storage for a ledger added later
+        self.accounts = {}  # name -> Account, in the order they were added
+        self.open_storage = open_storage
+        self.account = self._add_account(MAIN_LEDGER, storage)
+        for name, ledger_storage in (ledgers or {}).items():
+            self._add_account(name, ledger_storage)
+        self.income_results = None  # Ids matching the income search (None = no search)
+        self.expense_results = None  # Ids matching the expense search (None = no search)
         self.current_frame = None  # Track current displayed frame
-        self.editing_income_index = None  # Track which income is being edited
-        self.editing_expense_index = None  # Track which expense is being edited
+        self.max_cached_views = max_cached_views  # None keeps every built view alive
+        self.chart_offset = 0  # 0 = current period, 1 = previous period, etc.
+        self.editing_income_id = None  # Id of the income being edited
+        self.editing_expense_id = None  # Id of the expense being edited
+        self.importer = None  # StatementImporter while an import is running
+        self.undo_log = None  # Undo steps for the open batch() (None when no batch is open)
+        self.batch_changes = set()  # Ledgers changed during the open batch
+        # Slow reads and aggregations run here, off the Tk thread;
+        # worker_processes moves the CPU-bound ones into separate processes
+        self.tasks = TaskRunner(root, processes=worker_processes)
+        # Optional timing of the UI callbacks and data paths (see profiling.py);
+        # instrumented before the widgets are built so their commands are timed
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self, UI_CALLBACKS + DATA_PATHS)
+            profiler.watch_event_loop(root)
+            self.hud = PerformanceHUD(root, profiler)
+            root.bind("<F12>", self.hud.toggle)
+            root.bind("<Shift-F12>", lambda event: self.toggle_profile_capture("cprofile"))
+            root.bind("<Control-F12>", lambda event: self.toggle_profile_capture("tracemalloc"))
         self.create_widgets()
 
+    def _add_account(self, name, storage):
+        """Register a ledger and return its Account (its data is read on first use)"""
+        account = self.accounts[name] = Account(name, storage)
+        # History lists are patched row by row as the ledgers change (the
+        # search indexes subscribed first, so a filtered list re-runs its
+        # search against an up-to-date index)
+        account.incomes.subscribe(
+            lambda event, index: self._on_account_change(account, 'income', event, index))
+        account.expenses.subscribe(
+            lambda event, index: self._on_account_change(account, 'expenses', event, index))
+        return account
+
     def create_widgets(self):
         # Create a label
         label = tk.Label(self.root, text="Welcome to Finance Tracker", font=("Arial", 16))
-        label.pack(pady=20)
+        label.pack(pady=(20, 5))
+        
+        # Ledger selector: every ledger has its own totals, history and charts
+        self.ledger_frame = tk.Frame(self.root)
+        self.ledger_frame.pack(fill='x', padx=20)
+        tk.Label(self.ledger_frame, text="Ledger:", font=("Arial", 12)).pack(side='left', padx=10)
+        self.ledger_var = tk.StringVar(value=self.account.name)
+        self.ledger_menu = tk.OptionMenu(self.ledger_frame, self.ledger_var, *self.accounts,
+                                         command=self.switch_ledger)
+        self.ledger_menu.pack(side='left')
+        self.new_ledger_entry = tk.Entry(self.ledger_frame, font=("Arial", 11), width=15)
+        self.new_ledger_entry.pack(side='left', padx=(20, 5))
+        tk.Button(self.ledger_frame, text="New Ledger", command=self.add_ledger_from_form,
+                  font=("Arial", 10), bg="#607D8B", fg="white", relief="flat", bd=0).pack(side='left')
         
         # Create frame as instance variable
         self.totals_frame = tk.Frame(self.root)
-        self.totals_frame.pack(pady=20, fill='x', padx=20)
+        self.totals_frame.pack(pady=(10, 20), fill='x', padx=20)
         
         # Now you can reference self.totals_frame anywhere in the class
-        self.expenses_label = tk.Label(self.totals_frame, text=f"Total Expenses: £{self.total_expenses:.2f}", font=("Arial", 14))
+        self.expenses_label = tk.Label(self.totals_frame, text=f"Total Expenses: {format_money(self.total_expenses)}", font=("Arial", 14))
         self.expenses_label.pack(side='left', padx=10, fill='x', expand=True)
         #create a label to show total income
-        self.income_label = tk.Label(self.totals_frame, text=f"Total Income: £{self.total_income:.2f}", font=("Arial", 14))
+        self.income_label = tk.Label(self.totals_frame, text=f"Total Income: {format_money(self.total_income)}", font=("Arial", 14))
         self.income_label.pack(side='left', padx=10, fill='x', expand=True)
         # create a label to show current balance
-        self.balance_label = tk.Label(self.totals_frame, text=f"Current Balance: £{self.current_balance:.2f}", font=("Arial", 14))
+        self.balance_label = tk.Label(self.totals_frame, text=f"Current Balance: {format_money(self.current_balance)}", font=("Arial", 14))
         self.balance_label.pack(side='left', padx=10, fill='x', expand=True)
         # Create a frame for buttons
         self.button_frame = tk.Frame(self.root)
@@ -54,13 +142,28 @@ class FinanceMain:
                                  font=("Arial", 12), bg="#FF9800", fg="white", relief="flat", bd=0)
         charts_button.pack(side='left', padx=5, fill='x', expand=True)
         
+        import_button = tk.Button(self.button_frame, text="Import", command=self.import_statement,
+                                 font=("Arial", 12), bg="#9C27B0", fg="white", relief="flat", bd=0)
+        import_button.pack(side='left', padx=5, fill='x', expand=True)
+        
+        export_button = tk.Button(self.button_frame, text="Export", command=self.export_statement,
+                                 font=("Arial", 12), bg="#607D8B", fg="white", relief="flat", bd=0)
+        export_button.pack(side='left', padx=5, fill='x', expand=True)
+        
+        # Import progress bar (only shown while an import is running)
+        self.import_frame = tk.Frame(self.root)
+        self.import_label = tk.Label(self.import_frame, text="", font=("Arial", 10))
+        self.import_label.pack(side='left', padx=10)
+        tk.Button(self.import_frame, text="Cancel", command=self.cancel_import,
+                  font=("Arial", 10), bg="#f44336", fg="white", relief="flat", bd=0).pack(side='left')
+        
         # Create a main content frame where different views will be displayed
         self.content_frame = tk.Frame(self.root, bg="#f0f0f0", relief="sunken", bd=2)
         self.content_frame.pack(pady=20, padx=20, fill='both', expand=True)
         
         # Create canvas and scrollbar for scrollable content
         self.canvas = tk.Canvas(self.content_frame, bg="#f0f0f0", highlightthickness=0)
-        self.scrollbar = tk.Scrollbar(self.content_frame, orient="vertical", command=self.canvas.yview)
+        self.scrollbar = tk.Scrollbar(self.content_frame, orient="vertical", command=self._scroll_canvas)
         self.scrollable_frame = tk.Frame(self.canvas, bg="#f0f0f0", width=600)  # Set minimum width for centering
         
         # Configure canvas scrolling and frame updates
@@ -89,11 +192,319 @@ class FinanceMain:
         # Bind mousewheel to canvas for better scrolling
         self.canvas.bind("<MouseWheel>", self._on_mousewheel)
         
+        # Views are built once and kept, so switching between them is just a re-pack
+        self.views = ViewManager(self.scrollable_frame, max_views=self.max_cached_views)
+        self.views.register('income', self.build_income_frame)
+        self.views.register('expenses', self.build_expenses_frame)
+        self.views.register('charts', self.build_charts_frame, self.refresh_charts_frame)
+        
         # Show income frame by default
         self.show_income_frame()
         
-        # Generate sample data for demonstration
-        self.generate_sample_data()
+        # Load saved transactions (or sample data on first run)
+        self.load_data()
+    
+    def load_data(self, account=None):
+        """Load an account's recent transactions from storage (the current account by default).
+        
+        On a first run, when the only ledger has nothing saved, sample data
+        is generated instead.
+        """
+        account = account or self.account
+        account.loaded = True
+        storage = account.storage
+        if storage.is_empty():
+            if len(self.accounts) == 1:
+                self.generate_sample_data()
+            return
+        
+        # Only the newest page of history is read now (from the later of the
+        # two page starts, so a short ledger does not make the other one load
+        # in full); older rows are paged in as the lists are scrolled
+        # (load_older_history()) or the charts page back (ensure_loaded())
+        starts = [storage.page_start(kind, None, PAGE_SIZE) for kind in KINDS]
+        starts = [start for start in starts if start is not None]
+        account.loaded_from = max(starts) if starts else None
+        for kind in KINDS:
+            ledger = account.ledger(kind)
+            ledger.load_rows(storage.load(kind, account.loaded_from))
+            ledger.next_id = max(ledger.next_id, storage.max_id(kind) + 1)
+            account.unloaded_rows[kind] = storage.totals(kind)[1] - len(ledger)
+        self.rebuild_rollups(account)
+        
+        # Totals come from the storage backend so they cover the full history
+        account.total_income = storage.totals('income')[0]
+        account.total_expenses = storage.totals('expenses')[0]
+        account.current_balance = account.total_income - account.total_expenses
+        if account is self.account:
+            self.update_totals_display()
+    
+    def rebuild_rollups(self, account=None):
+        """Recompute an account's chart totals from scratch on a worker"""
+        account = account or self.account
+        columns = account.rollups.begin_rebuild(account.incomes, account.expenses)
+        self.tasks.submit(('rollups', account.name), compute_totals, *columns,
+                          on_done=lambda totals: self._rollups_rebuilt(account, totals), cpu_bound=True)
+    
+    def _rollups_rebuilt(self, account, totals):
+        account.rollups.finish_rebuild(totals)
+        self.views.mark_dirty('charts', 'chart')
+    
+    def ensure_loaded(self, start, account=None):
+        """Make sure an account's stored transactions dated from start onwards are in memory.
+        
+        Returns True if they already are. Otherwise the missing rows are read
+        from storage on a worker, False is returned, and the charts are
+        redrawn once the rows have been added. A newer request replaces one
+        that has not finished yet.
+        """
+        account = account or self.account
+        if account.loaded_from is None:
+            return True
+        timestamp = to_timestamp(start)
+        if timestamp >= account.loaded_from:
+            return True
+        account.history_pages = None  # This read replaces any page being read
+        self.tasks.submit(('history', account.name), self._read_history, account.storage,
+                          timestamp, account.loaded_from,
+                          on_done=lambda result: self._history_read(account, result))
+        return False
+    
+    def load_older_history(self, kind):
+        """Read the next page of older transactions for kind's history list.
+        
+        Pages come from a storage.history() generator that carries on from
+        the account's loaded_from. The other kind's rows over the same dates
+        are read along with each page, so both ledgers always cover the same
+        span. Runs on a worker; does nothing while a history read is running
+        or once everything is loaded.
+        """
+        account = self.account
+        key = ('history', account.name)
+        if account.loaded_from is None or self.tasks.pending(key):
+            return
+        if account.history_pages is None or account.history_pages[:2] != (kind, account.loaded_from):
+            account.history_pages = (kind, account.loaded_from,
+                                     account.storage.history(kind, account.loaded_from))
+        self.tasks.submit(key, self._read_page, account.storage, kind, account.history_pages[2],
+                          on_done=lambda result: self._page_read(account, result))
+    
+    def _read_page(self, storage, kind, pages):
+        """Read the next page of kind's history (runs on a worker thread)"""
+        start, end, rows = next(pages)
+        return start, end, {other: rows if other == kind else storage.load(other, start, end)
+                            for other in KINDS}
+    
+    def _page_read(self, account, result):
+        kind, _, pages = account.history_pages
+        account.history_pages = (kind, result[0], pages)  # The generator carries on from start
+        self._history_read(account, result)
+    
+    def _read_history(self, storage, start, end):
+        """Read stored rows dated in [start, end) (runs on a worker thread)"""
+        return start, end, {kind: storage.load(kind, start, end) for kind in KINDS}
+    
+    def _history_read(self, account, result):
+        start, end, rows_by_kind = result
+        if end != account.loaded_from:
+            return  # Something else loaded this range meanwhile
+        # Set first: loading the rows re-runs any search, which checks it
+        account.loaded_from = start
+        for kind, rows in rows_by_kind.items():
+            ledger = account.ledger(kind)
+            # Skip rows that are already in memory (e.g. imported with old dates)
+            rows = [row for row in rows if row[0] not in ledger.slots]
+            ledger.load_rows(rows)
+            account.unloaded_rows[kind] -= len(rows)
+            for _, row_timestamp, amount, _, _ in rows:
+                account.rollups.apply(kind, row_timestamp, amount)
+        self.views.mark_dirty('charts', 'chart', 'summary', 'categories')
+    
+    def switch_ledger(self, name):
+        """Show another ledger.
+        
+        Its rows, totals, chart rollups and search index are kept in memory
+        from last time, so switching back and forth reloads nothing; a
+        ledger is only read from storage the first time it is shown.
+        """
+        if name == self.account.name:
+            return
+        if self.importer is not None:
+            print("Finish or cancel the import before switching ledgers")
+            self.ledger_var.set(self.account.name)
+            return
+        self.account = self.accounts[name]
+        self.ledger_var.set(name)
+        if not self.account.loaded:
+            self.load_data()
+        
+        # The forms and search boxes referred to the old ledger's rows
+        self._reset_forms()
+        self.income_results = None
+        self.expense_results = None
+        for listbox in ('income_listbox', 'expense_listbox'):
+            if hasattr(self, listbox) and getattr(self, listbox).winfo_exists():
+                getattr(self, listbox).refresh()
+        self.update_totals_display()
+        self.views.mark_dirty('charts', 'chart', 'summary', 'categories')
+    
+    def add_ledger(self, name):
+        """Create an empty ledger called name and switch to it"""
+        name = name.strip()
+        if not name:
+            raise ValueError("Ledger name is required")
+        if name in self.accounts:
+            raise ValueError(f"There is already a ledger called {name}")
+        if not all(char.isalnum() or char in " -_" for char in name):
+            raise ValueError("Ledger names can only use letters, digits, spaces, - and _")
+        storage = self.open_storage(name) if self.open_storage is not None else None
+        self._add_account(name, storage)
+        self.ledger_menu['menu'].add_command(label=name, command=lambda: self.switch_ledger(name))
+        self.switch_ledger(name)
+    
+    def add_ledger_from_form(self):
+        """Add the ledger named in the New Ledger box"""
+        try:
+            self.add_ledger(self.new_ledger_entry.get())
+            self.new_ledger_entry.delete(0, tk.END)
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    def _reset_forms(self):
+        """Leave edit mode and clear the search boxes"""
+        self.editing_income_id = None
+        self.editing_expense_id = None
+        if hasattr(self, 'add_income_btn') and self.add_income_btn.winfo_exists():
+            self.add_income_btn.config(text='Add Income', command=self.add_income_from_form)
+        if hasattr(self, 'add_expense_btn') and self.add_expense_btn.winfo_exists():
+            self.add_expense_btn.config(text='Add Expense', command=self.add_expense_from_form)
+        for entry in ('income_search_entry', 'expense_search_entry'):
+            if hasattr(self, entry) and getattr(self, entry).winfo_exists():
+                getattr(self, entry).delete(0, tk.END)
+        for note in ('income_search_note', 'expense_search_note'):
+            if hasattr(self, note) and getattr(self, note).winfo_exists():
+                getattr(self, note).config(text="")
+    
+    def export_statement(self):
+        """Ask where to save a CSV of every transaction and write it on a worker"""
+        path = filedialog.asksaveasfilename(
+            title="Export transactions", defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        if self.account.loaded_from is None:
+            # Everything is in memory (always so for MemoryStorage, which keeps nothing)
+            job = (export_csv, path, self.incomes.snapshot(), self.expenses.snapshot())
+        else:
+            # Older history is only in storage, so read all of it there
+            job = (self._export_stored, path, self.storage)
+        self.tasks.submit('export', *job,
+                          on_done=lambda count: print(f"Exported {count} transactions to {path}"),
+                          on_error=lambda error: print(f"Error exporting transactions: {error}"))
+    
+    def _export_stored(self, path, storage):
+        """Export every stored row, loaded or not (runs on a worker thread)"""
+        storage.flush()  # Queued writes first, so the export includes them
+        incomes = Ledger()
+        incomes.load_rows(storage.load('income'))
+        expenses = Ledger()
+        expenses.load_rows(storage.load('expenses'))
+        return export_csv(path, incomes, expenses)
+    
+    def on_close(self):
+        """Save any pending writes before the window closes"""
+        if self.importer is not None:
+            self.importer.cancel()
+        if self.profiler is not None:
+            self.profiler.stop_watching()
+            self.profiler.stop_capture()
+        self.tasks.shutdown()
+        for account in self.accounts.values():
+            account.storage.close()
+        self.root.destroy()
+    
+    def toggle_profile_capture(self, mode):
+        """Start a cProfile/tracemalloc capture, or stop it and print the results"""
+        if self.profiler.capture is None:
+            self.profiler.start_capture(mode)
+            print(f"Capturing {mode}... press the same keys again to stop")
+            return
+        extension = "prof" if self.profiler.capture == "cprofile" else "snapshot"
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"finance.{extension}")
+        print(self.profiler.stop_capture(path))
+        print(f"Saved to {path}")
+    
+    def import_statement(self):
+        """Ask for a CSV or OFX bank statement and import it"""
+        path = filedialog.askopenfilename(
+            title="Import bank statement",
+            filetypes=[("Bank statements", "*.csv *.ofx *.qfx"), ("All files", "*.*")])
+        if path:
+            self.start_import(path)
+    
+    def start_import(self, path):
+        """Start importing a statement file in the background"""
+        if self.importer is not None:
+            print("An import is already running")
+            return
+        self.importer = StatementImporter(path, EXPENSE_CATEGORIES)
+        self.importer.start()
+        self.import_label.config(text=f"Importing {os.path.basename(path)}...")
+        self.import_frame.pack(pady=(0, 10), before=self.content_frame)
+        self.root.after(IMPORT_POLL_MS, self._poll_import)
+    
+    def cancel_import(self):
+        """Stop the running import (rows already imported are kept)"""
+        if self.importer is not None:
+            self.importer.cancel()
+            print(f"Import cancelled after {self.importer.rows_imported} rows")
+            self._finish_import()
+    
+    def _poll_import(self):
+        """Apply any batches the import worker has finished, then check again later"""
+        importer = self.importer
+        if importer is None:
+            return
+        for message in importer.poll():
+            if message[0] == 'batch':
+                self.import_rows(message[1], message[2])
+            elif message[0] == 'error':
+                print(f"Error importing statement: {message[1]}")
+                self._finish_import()
+                return
+            elif message[0] == 'done':
+                print(f"Imported {importer.rows_imported} rows ({importer.rows_skipped} skipped)")
+                self._finish_import()
+                return
+        self.import_label.config(text=f"Importing... {importer.progress():.0%} "
+                                      f"({importer.rows_imported:,} rows)")
+        self.root.after(IMPORT_POLL_MS, self._poll_import)
+    
+    def _finish_import(self):
+        self.importer = None
+        self.import_frame.pack_forget()
+    
+    def import_rows(self, income_rows, expense_rows):
+        """Add a batch of (pence, description, date, category) rows.
+        
+        The ledgers, storage and chart totals are updated for the whole batch
+        and the labels are redrawn once, rather than once per row.
+        """
+        with self.batch():
+            for kind, rows in (('income', income_rows), ('expenses', expense_rows)):
+                if not rows:
+                    continue
+                stored_rows = self._ledger(kind).extend(rows)
+                self.undo_log.append(('extend', kind, stored_rows))
+                self.storage.add_many(kind, stored_rows)
+                for _, timestamp, amount, _, _ in stored_rows:
+                    self.rollups.apply(kind, timestamp, amount)
+            
+            income = sum(row[0] for row in income_rows)
+            expenses = sum(row[0] for row in expense_rows)
+            self.total_income += income
+            self.total_expenses += expenses
+            self.current_balance += income - expenses
     
     def _on_canvas_configure(self, event):
         """Handle canvas resize to center content"""
@@ -106,12 +517,23 @@ class FinanceMain:
     def _on_mousewheel(self, event):
         """Handle mouse wheel scrolling"""
         self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+        self._on_canvas_scrolled()
+    
+    def _scroll_canvas(self, *args):
+        """Scrollbar callback for the content canvas"""
+        self.canvas.yview(*args)
+        self._on_canvas_scrolled()
+    
+    def _on_canvas_scrolled(self):
+        # Scrolling to the bottom of a history view loads its next page
+        if self.views.current in KINDS and self.canvas.yview()[1] >= 1.0:
+            self.load_older_history(self.views.current)
     
     def update_totals_display(self):
         """Update all the total labels with current values"""
-        self.expenses_label.config(text=f"Total Expenses: £{self.total_expenses:.2f}")
-        self.income_label.config(text=f"Total Income: £{self.total_income:.2f}")
-        self.balance_label.config(text=f"Current Balance: £{self.current_balance:.2f}")
+        self.expenses_label.config(text=f"Total Expenses: {format_money(self.total_expenses)}")
+        self.income_label.config(text=f"Total Income: {format_money(self.total_income)}")
+        self.balance_label.config(text=f"Current Balance: {format_money(self.current_balance)}")
         
         # Optional: Color coding for balance
         if self.current_balance >= 0:
@@ -119,26 +541,24 @@ class FinanceMain:
         else:
             self.balance_label.config(fg="red")
     
-    def clear_content_frame(self):
-        """Clear the current content frame"""
-        if self.current_frame:
-            self.current_frame.destroy()
+    def show_income_frame(self):
+        """Display the income management frame"""
+        self.current_frame = self.views.show('income')
         # Reset canvas scroll position
         self.canvas.yview_moveto(0)
     
-    def show_income_frame(self):
-        """Display the income management frame"""
-        self.clear_content_frame()
-        self.current_frame = tk.Frame(self.scrollable_frame, bg="#f0f0f0")
-        self.current_frame.pack(fill='both', expand=True, padx=10, pady=10)
+    def build_income_frame(self, parent):
+        """Build the income management frame (once; it is reused after that)"""
+        frame = tk.Frame(parent, bg="#f0f0f0")
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Income frame title
-        title_label = tk.Label(self.current_frame, text="Income Management", 
+        title_label = tk.Label(frame, text="Income Management", 
                               font=("Arial", 16, "bold"), bg="#f0f0f0")
         title_label.pack(pady=10)
         
         # Income entry form
-        entry_frame = tk.Frame(self.current_frame, bg="#f0f0f0")
+        entry_frame = tk.Frame(frame, bg="#f0f0f0")
         entry_frame.pack(pady=10, fill='x')
         
         # Create a centered container for the form
@@ -154,14 +574,14 @@ class FinanceMain:
         self.income_desc_entry.grid(row=1, column=1, padx=(0, 0), pady=5, sticky='w')
         
         # Buttons container frame for centering buttons
-        buttons_container = tk.Frame(self.current_frame, bg="#f0f0f0")
+        buttons_container = tk.Frame(frame, bg="#f0f0f0")
         buttons_container.pack(pady=10, expand=True)
         
         # Add income button
-        add_income_btn = tk.Button(buttons_container, text="Add Income", 
+        self.add_income_btn = tk.Button(buttons_container, text="Add Income", 
                                   command=self.add_income_from_form,
                                   font=("Arial", 12), bg="#4CAF50", fg="white", relief="flat", bd=0)
-        add_income_btn.pack(pady=5)
+        self.add_income_btn.pack(pady=5)
         
         # Edit income button
         edit_income_btn = tk.Button(buttons_container, text="Edit Selected Income", 
@@ -176,32 +596,54 @@ class FinanceMain:
         delete_income_btn.pack(pady=5)
         
         # Income history section container for centering
-        history_container = tk.Frame(self.current_frame, bg="#f0f0f0")
+        history_container = tk.Frame(frame, bg="#f0f0f0")
         history_container.pack(pady=(20, 0), expand=True, fill='both')
         
         history_label = tk.Label(history_container, text="Income History:", 
                                 font=("Arial", 14, "bold"), bg="#f0f0f0")
         history_label.pack(pady=(0, 5))
         
-        self.income_listbox = tk.Listbox(history_container, font=("Arial", 10), height=8)
+        # Search box: words match the start of description words, and
+        # >50, <=20, after:2024-01-01 or before:2024-02-01 filter the rows
+        search_frame = tk.Frame(history_container, bg="#f0f0f0")
+        search_frame.pack(pady=(0, 5))
+        tk.Label(search_frame, text="Search:", font=("Arial", 11), bg="#f0f0f0").pack(side='left', padx=(0, 5))
+        self.income_search_entry = tk.Entry(search_frame, font=("Arial", 11), width=30)
+        self.income_search_entry.pack(side='left')
+        self.income_search_entry.bind("<KeyRelease>", self.search_incomes)
+        self.income_search_note = tk.Label(history_container, text="", font=("Arial", 9), bg="#f0f0f0")
+        self.income_search_note.pack()
+        
+        # Only the rows on screen are formatted, however long the history is.
+        # Newest first; scrolling to the end loads the next page of older rows
+        self.income_listbox = VirtualList(history_container, self.income_row_count,
+                                          self.format_income_row, font=("Arial", 10), height=8,
+                                          on_end=lambda: self.load_older_history('income'))
         self.income_listbox.pack(fill='both', expand=True, padx=10, pady=5)
         
         # Refresh the income list
         self.refresh_income_list()
+        
+        return frame
     
     def show_expenses_frame(self):
         """Display the expenses management frame"""
-        self.clear_content_frame()
-        self.current_frame = tk.Frame(self.scrollable_frame, bg="#f0f0f0")
-        self.current_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.current_frame = self.views.show('expenses')
+        # Reset canvas scroll position
+        self.canvas.yview_moveto(0)
+    
+    def build_expenses_frame(self, parent):
+        """Build the expenses management frame (once; it is reused after that)"""
+        frame = tk.Frame(parent, bg="#f0f0f0")
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Expenses frame title
-        title_label = tk.Label(self.current_frame, text="Expense Management", 
+        title_label = tk.Label(frame, text="Expense Management", 
                               font=("Arial", 16, "bold"), bg="#f0f0f0")
         title_label.pack(pady=10)
         
         # Expense entry form
-        entry_frame = tk.Frame(self.current_frame, bg="#f0f0f0")
+        entry_frame = tk.Frame(frame, bg="#f0f0f0")
         entry_frame.pack(pady=10, fill='x')
         
         # Create a centered container for the form
@@ -218,20 +660,19 @@ class FinanceMain:
         
         tk.Label(form_container, text="Category:", font=("Arial", 12), bg="#f0f0f0").grid(row=2, column=0, sticky='e', padx=(0, 10), pady=5)
         self.expense_category_var = tk.StringVar(value="Food")
-        category_options = ["Food", "Transportation", "Housing", "Entertainment", "Healthcare", "Other"]
-        self.expense_category_menu = tk.OptionMenu(form_container, self.expense_category_var, *category_options)
+        self.expense_category_menu = tk.OptionMenu(form_container, self.expense_category_var, *EXPENSE_CATEGORIES)
         self.expense_category_menu.config(width=20)
         self.expense_category_menu.grid(row=2, column=1, padx=(0, 0), pady=5, sticky='w')
         
         # Buttons container frame for centering buttons
-        buttons_container = tk.Frame(self.current_frame, bg="#f0f0f0")
+        buttons_container = tk.Frame(frame, bg="#f0f0f0")
         buttons_container.pack(pady=10, expand=True)
         
         # Add expense button
-        add_expense_btn = tk.Button(buttons_container, text="Add Expense", 
+        self.add_expense_btn = tk.Button(buttons_container, text="Add Expense", 
                                    command=self.add_expense_from_form,
                                    font=("Arial", 12), bg="#2196F3", fg="white", relief="flat", bd=0)
-        add_expense_btn.pack(pady=5)
+        self.add_expense_btn.pack(pady=5)
         
         # Edit expense button
         edit_expense_btn = tk.Button(buttons_container, text="Edit Selected Expense", 
@@ -246,7 +687,7 @@ class FinanceMain:
         delete_expense_btn.pack(pady=5)
         
         # Expense history section container for centering
-        history_container = tk.Frame(self.current_frame, bg="#f0f0f0")
+        history_container = tk.Frame(frame, bg="#f0f0f0")
         history_container.pack(pady=(20, 0), expand=True, fill='both')
         
         # Expense history listbox
@@ -254,20 +695,40 @@ class FinanceMain:
                                 font=("Arial", 14, "bold"), bg="#f0f0f0")
         history_label.pack(pady=(0, 5))
         
-        self.expense_listbox = tk.Listbox(history_container, font=("Arial", 10), height=8)
+        # Search box: words match the start of description words, and
+        # >50, <=20, after:2024-01-01, before:2024-02-01 or category:food filter the rows
+        search_frame = tk.Frame(history_container, bg="#f0f0f0")
+        search_frame.pack(pady=(0, 5))
+        tk.Label(search_frame, text="Search:", font=("Arial", 11), bg="#f0f0f0").pack(side='left', padx=(0, 5))
+        self.expense_search_entry = tk.Entry(search_frame, font=("Arial", 11), width=30)
+        self.expense_search_entry.pack(side='left')
+        self.expense_search_entry.bind("<KeyRelease>", self.search_expenses)
+        self.expense_search_note = tk.Label(history_container, text="", font=("Arial", 9), bg="#f0f0f0")
+        self.expense_search_note.pack()
+        
+        self.expense_listbox = VirtualList(history_container, self.expense_row_count,
+                                           self.format_expense_row, font=("Arial", 10), height=8,
+                                           on_end=lambda: self.load_older_history('expenses'))
         self.expense_listbox.pack(fill='both', expand=True, padx=10, pady=5)
         
         # Refresh the expense list
         self.refresh_expense_list()
+        
+        return frame
     
     def show_charts_frame(self):
         """Display the charts and summary frame"""
-        self.clear_content_frame()
-        self.current_frame = tk.Frame(self.scrollable_frame, bg="#f0f0f0")
-        self.current_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.current_frame = self.views.show('charts')
+        # Reset canvas scroll position
+        self.canvas.yview_moveto(0)
+    
+    def build_charts_frame(self, parent):
+        """Build the charts and summary frame (once; it is reused after that)"""
+        frame = tk.Frame(parent, bg="#f0f0f0")
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Main container for centering all content
-        main_container = tk.Frame(self.current_frame, bg="#f0f0f0")
+        main_container = tk.Frame(frame, bg="#f0f0f0")
         main_container.pack(expand=True, fill='both')
         
         # Charts frame title
@@ -282,22 +743,42 @@ class FinanceMain:
         tk.Label(period_container, text="View by:", font=("Arial", 12, "bold"), bg="#f0f0f0").pack(side='left', padx=(0, 10))
         
         self.chart_period_var = tk.StringVar(value="Week")
-        period_options = ["Day", "Week", "Month"]
         
-        for period in period_options:
+        for period in PERIOD_TYPES:
             rb = tk.Radiobutton(period_container, text=period, variable=self.chart_period_var, 
                                value=period, bg="#f0f0f0", font=("Arial", 11),
+                               command=self.select_chart_period)
+            rb.pack(side='left', padx=5)
+        
+        # Number of buckets on a page
+        tk.Label(period_container, text="Buckets:", font=("Arial", 11), bg="#f0f0f0").pack(side='left', padx=(15, 5))
+        self.chart_count_var = tk.IntVar(value=DEFAULT_BUCKETS["Week"])
+        tk.Spinbox(period_container, from_=2, to=5000, width=5, textvariable=self.chart_count_var,
+                   command=self.update_chart_display).pack(side='left')
+        
+        # Chart style selector
+        style_container = tk.Frame(main_container, bg="#f0f0f0")
+        style_container.pack()
+        
+        tk.Label(style_container, text="Style:", font=("Arial", 12, "bold"), bg="#f0f0f0").pack(side='left', padx=(0, 10))
+        
+        self.chart_style_var = tk.StringVar(value="bars")
+        for style in ("Bars", "Line", "Area"):
+            rb = tk.Radiobutton(style_container, text=style, variable=self.chart_style_var,
+                               value=style.lower(), bg="#f0f0f0", font=("Arial", 11),
                                command=self.update_chart_display)
             rb.pack(side='left', padx=5)
         
+        # Combined view: every ledger's bucket totals added together
+        self.chart_all_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(style_container, text="All ledgers", variable=self.chart_all_var,
+                       command=self.toggle_combined_charts, bg="#f0f0f0",
+                       font=("Arial", 11)).pack(side='left', padx=(15, 5))
+        
         # Navigation controls
         nav_container = tk.Frame(main_container, bg="#f0f0f0")
         nav_container.pack(pady=10)
         
-        # Initialize chart offset (0 = current period, 1 = previous period, etc.)
-        if not hasattr(self, 'chart_offset'):
-            self.chart_offset = 0
-        
         prev_btn = tk.Button(nav_container, text="← Previous", 
                             command=self.show_previous_period,
                             font=("Arial", 10), bg="#2196F3", fg="white", relief="flat", bd=0)
@@ -311,6 +792,14 @@ class FinanceMain:
                             font=("Arial", 10), bg="#2196F3", fg="white", relief="flat", bd=0)
         next_btn.pack(side='left', padx=5)
         
+        # Zoom keeps the middle of the page in view at a finer or coarser period
+        zoom_in_btn = tk.Button(nav_container, text="Zoom +", command=lambda: self.zoom_chart(-1),
+                               font=("Arial", 10), bg="#607D8B", fg="white", relief="flat", bd=0)
+        zoom_in_btn.pack(side='left', padx=(15, 5))
+        zoom_out_btn = tk.Button(nav_container, text="Zoom −", command=lambda: self.zoom_chart(1),
+                                font=("Arial", 10), bg="#607D8B", fg="white", relief="flat", bd=0)
+        zoom_out_btn.pack(side='left', padx=5)
+        
         # Chart container
         self.chart_container = tk.Frame(main_container, bg="#f0f0f0")
         self.chart_container.pack(pady=20, fill='x')
@@ -331,40 +820,104 @@ class FinanceMain:
         summary_frame = tk.Frame(summary_container, bg="#f0f0f0")
         summary_frame.pack()
         
-        tk.Label(summary_frame, text=f"Total Transactions: {len(self.incomes) + len(self.expenses)}", 
-                font=("Arial", 12), bg="#f0f0f0").pack(pady=5)
-        tk.Label(summary_frame, text=f"Income Entries: {len(self.incomes)}", 
-                font=("Arial", 12), bg="#f0f0f0").pack(pady=5)
-        tk.Label(summary_frame, text=f"Expense Entries: {len(self.expenses)}", 
-                font=("Arial", 12), bg="#f0f0f0").pack(pady=5)
+        self.total_transactions_label = tk.Label(summary_frame, font=("Arial", 12), bg="#f0f0f0")
+        self.total_transactions_label.pack(pady=5)
+        self.income_entries_label = tk.Label(summary_frame, font=("Arial", 12), bg="#f0f0f0")
+        self.income_entries_label.pack(pady=5)
+        self.expense_entries_label = tk.Label(summary_frame, font=("Arial", 12), bg="#f0f0f0")
+        self.expense_entries_label.pack(pady=5)
+        self.refresh_summary()
         
         # Category breakdown (simple text-based for now)
-        if self.expenses:
-            # Category container for centering
-            category_container = tk.Frame(main_container, bg="#f0f0f0")
-            category_container.pack(pady=20, expand=True)
-            
-            category_frame = tk.Frame(category_container, bg="#f0f0f0")
-            category_frame.pack()
-            
-            category_label = tk.Label(category_frame, text="Expense Categories:", 
-                                     font=("Arial", 14, "bold"), bg="#f0f0f0")
-            category_label.pack(pady=(0, 10))
-            
-            categories = {}
-            for expense in self.expenses:
-                cat = expense['category']
-                categories[cat] = categories.get(cat, 0) + expense['amount']
-            
-            for category, amount in categories.items():
-                percentage = (amount / self.total_expenses) * 100 if self.total_expenses > 0 else 0
-                cat_text = f"{category}: £{amount:.2f} ({percentage:.1f}%)"
-                tk.Label(category_frame, text=cat_text, font=("Arial", 11), bg="#f0f0f0").pack(pady=2)
+        # Category container for centering
+        self.category_container = tk.Frame(main_container, bg="#f0f0f0")
+        
+        self.category_frame = tk.Frame(self.category_container, bg="#f0f0f0")
+        self.category_frame.pack()
+        
+        self.category_title_label = tk.Label(self.category_frame, text="Expense Categories:",
+                                             font=("Arial", 14, "bold"), bg="#f0f0f0")
+        self.category_title_label.pack(pady=(0, 10))
+        self.category_labels = {}  # Category name -> its label, reused on every refresh
+        self.refresh_category_breakdown()
+        
+        return frame
+    
+    def refresh_charts_frame(self, regions):
+        """Redraw the parts of the charts frame whose data has changed"""
+        if 'chart' in regions:
+            self.update_chart_display()
+        if 'summary' in regions:
+            self.refresh_summary()
+        if 'categories' in regions:
+            self.refresh_category_breakdown()
+    
+    def toggle_combined_charts(self):
+        """Switch the charts frame between the current ledger and all of them"""
+        self.views.mark_dirty('charts', 'chart', 'summary', 'categories')
+    
+    def chart_accounts(self):
+        """The accounts the charts frame shows: the current one, or every one"""
+        if hasattr(self, 'chart_all_var') and self.chart_all_var.get():
+            return list(self.accounts.values())
+        return [self.account]
+    
+    def refresh_summary(self):
+        """Update the transaction counts on the charts frame"""
+        # Counts cover the whole stored history, not just the loaded rows
+        accounts = self.chart_accounts()
+        income_entries = sum(account.row_count('income') for account in accounts)
+        expense_entries = sum(account.row_count('expenses') for account in accounts)
+        self.total_transactions_label.config(text=f"Total Transactions: {income_entries + expense_entries}")
+        self.income_entries_label.config(text=f"Income Entries: {income_entries}")
+        self.expense_entries_label.config(text=f"Expense Entries: {expense_entries}")
+    
+    def refresh_category_breakdown(self):
+        """Update the expense category breakdown on the charts frame"""
+        accounts = [account for account in self.chart_accounts() if account.expenses]
+        if not accounts:
+            self.category_container.pack_forget()
+            return
+        self.category_container.pack(pady=20, expand=True)
+        
+        # Totals come from each ledger's category index, so this never scans
+        # the expenses; labels are created once per category and then reused.
+        # The index only holds loaded rows, so while older history is still
+        # in storage the breakdown (and its percentages) covers the loaded
+        # range only, and says so
+        categories = {}
+        for account in accounts:
+            for category, amount in account.expenses.category_totals().items():
+                categories[category] = categories.get(category, 0) + amount
+        total_expenses = sum(categories.values())
+        partial = [account.loaded_from for account in accounts if account.loaded_from is not None]
+        if not partial:
+            title = "Expense Categories:"
+        elif len(accounts) == 1:
+            title = f"Expense Categories (since {from_timestamp(partial[0]).strftime('%m/%d/%Y')}):"
+        else:
+            title = "Expense Categories (loaded transactions only):"
+        self.category_title_label.config(text=title)
+        
+        for category, amount in categories.items():
+            percentage = (amount / total_expenses) * 100 if total_expenses > 0 else 0
+            cat_text = f"{category}: {format_money(amount)} ({percentage:.1f}%)"
+            label = self.category_labels.get(category)
+            if label is None:
+                label = self.category_labels[category] = tk.Label(
+                    self.category_frame, font=("Arial", 11), bg="#f0f0f0")
+            label.config(text=cat_text)
+            label.pack(pady=2)
+        
+        # Hide categories that no longer have any expenses
+        for category, label in self.category_labels.items():
+            if category not in categories:
+                label.pack_forget()
     
     def add_income_from_form(self):
         """Add income from the form inputs"""
         try:
-            amount = float(self.income_amount_entry.get())
+            amount = parse_money(self.income_amount_entry.get())
             description = self.income_desc_entry.get().strip()
             
             if not description:
@@ -376,9 +929,6 @@ class FinanceMain:
             self.income_amount_entry.delete(0, tk.END)
             self.income_desc_entry.delete(0, tk.END)
             
-            # Refresh the list
-            self.refresh_income_list()
-            
         except ValueError as e:
             # Simple error handling - you could improve this with a popup
             print(f"Error: {e}")
@@ -392,23 +942,21 @@ class FinanceMain:
                 return
             
             index = selected_index[0]
-            income = self.incomes[index]
+            income = self.incomes.get(self.income_row_id(index))
             
             # Pre-fill the form with existing data
             self.income_amount_entry.delete(0, tk.END)
-            self.income_amount_entry.insert(0, str(income['amount']))
+            self.income_amount_entry.insert(0, format_pence(income['amount']))
             
             self.income_desc_entry.delete(0, tk.END)
             self.income_desc_entry.insert(0, income['description'])
             
-            # Store the index for updating
-            self.editing_income_index = index
+            # Remember which row is being edited (by id, so it survives
+            # other rows being added or deleted meanwhile)
+            self.editing_income_id = income['id']
             
             # Change the Add button text to indicate editing mode
-            for widget in self.current_frame.winfo_children():
-                if isinstance(widget, tk.Button) and widget['text'] == 'Add Income':
-                    widget.config(text='Update Income', command=self.update_income_from_form)
-                    break
+            self.add_income_btn.config(text='Update Income', command=self.update_income_from_form)
             
         except Exception as e:
             print(f"Error editing income: {e}")
@@ -416,49 +964,26 @@ class FinanceMain:
     def update_income_from_form(self):
         """Update the income being edited"""
         try:
-            amount = float(self.income_amount_entry.get())
+            amount = parse_money(self.income_amount_entry.get())
             description = self.income_desc_entry.get().strip()
             
             if not description:
                 raise ValueError("Description is required")
             
-            if amount <= 0:
-                raise ValueError("Amount must be positive")
-            
-            # Update totals by removing old amount and adding new
-            old_income = self.incomes[self.editing_income_index]
-            self.total_income -= old_income['amount']
-            self.current_balance -= old_income['amount']  # Remove old amount from balance
-            
-            # Update the income entry
-            self.incomes[self.editing_income_index] = {
-                "description": description,
-                "amount": amount,
-                "date": old_income['date']  # Keep original date
-            }
-            
-            # Update totals with new amount
-            self.total_income += amount
-            self.current_balance += amount  # Add new amount to balance
-            self.update_totals_display()
+            # Update the income entry (the ledger keeps the original date)
+            self.update_income(self.editing_income_id, amount, description)
             
             # Clear the form and reset button
             self.income_amount_entry.delete(0, tk.END)
             self.income_desc_entry.delete(0, tk.END)
             
             # Reset the button back to Add mode
-            for widget in self.current_frame.winfo_children():
-                if isinstance(widget, tk.Button) and widget['text'] == 'Update Income':
-                    widget.config(text='Add Income', command=self.add_income_from_form)
-                    break
+            self.add_income_btn.config(text='Add Income', command=self.add_income_from_form)
             
-            # Clear editing index
-            self.editing_income_index = None
+            # Clear editing id
+            self.editing_income_id = None
             
-            # Refresh the list
-            self.refresh_income_list()
-            
-            print(f"Income updated: {description} - £{amount}")
+            print(f"Income updated: {description} - {format_money(amount)}")
             
         except ValueError as e:
             print(f"Error: {e}")
@@ -472,20 +997,11 @@ class FinanceMain:
                 return
             
             index = selected_index[0]
-            income = self.incomes[index]
-            
-            # Update totals
-            self.total_income -= income['amount']
-            self.current_balance -= income['amount']
-            
-            # Remove from list
-            del self.incomes[index]
             
-            # Update display
-            self.update_totals_display()
-            self.refresh_income_list()
+            # Remove it (this also updates the totals)
+            income = self.delete_income(self.income_row_id(index))
             
-            print(f"Income deleted: {income['description']} - £{income['amount']}")
+            print(f"Income deleted: {income['description']} - {format_money(income['amount'])}")
             
         except Exception as e:
             print(f"Error deleting income: {e}")
@@ -493,7 +1009,7 @@ class FinanceMain:
     def add_expense_from_form(self):
         """Add expense from the form inputs"""
         try:
-            amount = float(self.expense_amount_entry.get())
+            amount = parse_money(self.expense_amount_entry.get())
             description = self.expense_desc_entry.get().strip()
             category = self.expense_category_var.get()
             
@@ -506,9 +1022,6 @@ class FinanceMain:
             self.expense_amount_entry.delete(0, tk.END)
             self.expense_desc_entry.delete(0, tk.END)
             
-            # Refresh the list
-            self.refresh_expense_list()
-            
         except ValueError as e:
             # Simple error handling - you could improve this with a popup
             print(f"Error: {e}")
@@ -522,25 +1035,23 @@ class FinanceMain:
                 return
             
             index = selected_index[0]
-            expense = self.expenses[index]
+            expense = self.expenses.get(self.expense_row_id(index))
             
             # Pre-fill the form with existing data
             self.expense_amount_entry.delete(0, tk.END)
-            self.expense_amount_entry.insert(0, str(expense['amount']))
+            self.expense_amount_entry.insert(0, format_pence(expense['amount']))
             
             self.expense_desc_entry.delete(0, tk.END)
             self.expense_desc_entry.insert(0, expense['description'])
             
             self.expense_category_var.set(expense['category'])
             
-            # Store the index for updating
-            self.editing_expense_index = index
+            # Remember which row is being edited (by id, so it survives
+            # other rows being added or deleted meanwhile)
+            self.editing_expense_id = expense['id']
             
             # Change the Add button text to indicate editing mode
-            for widget in self.current_frame.winfo_children():
-                if isinstance(widget, tk.Button) and widget['text'] == 'Add Expense':
-                    widget.config(text='Update Expense', command=self.update_expense_from_form)
-                    break
+            self.add_expense_btn.config(text='Update Expense', command=self.update_expense_from_form)
             
         except Exception as e:
             print(f"Error editing expense: {e}")
@@ -548,51 +1059,27 @@ class FinanceMain:
     def update_expense_from_form(self):
         """Update the expense being edited"""
         try:
-            amount = float(self.expense_amount_entry.get())
+            amount = parse_money(self.expense_amount_entry.get())
             description = self.expense_desc_entry.get().strip()
             category = self.expense_category_var.get()
             
             if not description:
                 raise ValueError("Description is required")
             
-            if amount <= 0:
-                raise ValueError("Amount must be positive")
-            
-            # Update totals by removing old amount and adding new
-            old_expense = self.expenses[self.editing_expense_index]
-            self.total_expenses -= old_expense['amount']
-            self.current_balance += old_expense['amount']  # Add old amount back to balance (since it was subtracted)
-            
-            # Update the expense entry
-            self.expenses[self.editing_expense_index] = {
-                "description": description,
-                "amount": amount,
-                "category": category,
-                "date": old_expense['date']  # Keep original date
-            }
-            
-            # Update totals with new amount
-            self.total_expenses += amount
-            self.current_balance -= amount  # Subtract new amount from balance
-            self.update_totals_display()
+            # Update the expense entry (the ledger keeps the original date)
+            self.update_expense(self.editing_expense_id, amount, description, category)
             
             # Clear the form and reset button
             self.expense_amount_entry.delete(0, tk.END)
             self.expense_desc_entry.delete(0, tk.END)
             
             # Reset the button back to Add mode
-            for widget in self.current_frame.winfo_children():
-                if isinstance(widget, tk.Button) and widget['text'] == 'Update Expense':
-                    widget.config(text='Add Expense', command=self.add_expense_from_form)
-                    break
+            self.add_expense_btn.config(text='Add Expense', command=self.add_expense_from_form)
             
-            # Clear editing index
-            self.editing_expense_index = None
+            # Clear editing id
+            self.editing_expense_id = None
             
-            # Refresh the list
-            self.refresh_expense_list()
-            
-            print(f"Expense updated: {description} - £{amount} ({category})")
+            print(f"Expense updated: {description} - {format_money(amount)} ({category})")
             
         except ValueError as e:
             print(f"Error: {e}")
@@ -606,20 +1093,11 @@ class FinanceMain:
                 return
             
             index = selected_index[0]
-            expense = self.expenses[index]
-            
-            # Update totals
-            self.total_expenses -= expense['amount']
-            self.current_balance += expense['amount']  # Add back to balance
-            
-            # Remove from list
-            del self.expenses[index]
             
-            # Update display
-            self.update_totals_display()
-            self.refresh_expense_list()
+            # Remove it (this also updates the totals)
+            expense = self.delete_expense(self.expense_row_id(index))
             
-            print(f"Expense deleted: {expense['description']} - £{expense['amount']} ({expense['category']})")
+            print(f"Expense deleted: {expense['description']} - {format_money(expense['amount'])} ({expense['category']})")
             
         except Exception as e:
             print(f"Error deleting expense: {e}")
@@ -627,76 +1105,318 @@ class FinanceMain:
     def refresh_income_list(self):
         """Refresh the income history listbox"""
         if hasattr(self, 'income_listbox'):
-            self.income_listbox.delete(0, tk.END)
-            for income in self.incomes:
-                date_str = income['date'].strftime("%m/%d/%Y %H:%M")
-                text = f"£{income['amount']:.2f} - {income['description']} ({date_str})"
-                self.income_listbox.insert(tk.END, text)
+            self.income_listbox.refresh()
     
     def refresh_expense_list(self):
         """Refresh the expense history listbox"""
         if hasattr(self, 'expense_listbox'):
-            self.expense_listbox.delete(0, tk.END)
-            for expense in self.expenses:
-                date_str = expense['date'].strftime("%m/%d/%Y %H:%M")
-                text = f"£{expense['amount']:.2f} - {expense['description']} ({expense['category']}) ({date_str})"
-                self.expense_listbox.insert(tk.END, text)
-    
-    def add_expense(self, amount, description, category):
-        """Add an expense to the tracker."""
+            self.expense_listbox.refresh()
+    
+    def _on_account_change(self, account, kind, event, index):
+        """Route a ledger change to the history lists if it is the ledger on screen"""
+        if account is not self.account:
+            # Another ledger's rows only show up in the combined charts
+            self.views.mark_dirty('charts', 'chart', 'summary', 'categories')
+        elif kind == 'income':
+            self._on_income_change(event, index)
+        else:
+            self._on_expense_change(event, index)
+    
+    def _on_income_change(self, event, index):
+        """Apply a single income insert/update/delete to the history list"""
+        if self.undo_log is not None:
+            self.batch_changes.add('income')  # Redrawn once when the batch ends
+            return
+        if hasattr(self, 'income_listbox') and self.income_listbox.winfo_exists():
+            if self.income_results is not None:
+                self.search_incomes()  # List positions are search results, not ledger rows
+            else:
+                self.income_listbox.apply_change(event, self._list_index(self.incomes, event, index))
+        self.views.mark_dirty('charts', 'chart', 'summary')
+    
+    def _on_expense_change(self, event, index):
+        """Apply a single expense insert/update/delete to the history list"""
+        if self.undo_log is not None:
+            self.batch_changes.add('expenses')  # Redrawn once when the batch ends
+            return
+        if hasattr(self, 'expense_listbox') and self.expense_listbox.winfo_exists():
+            if self.expense_results is not None:
+                self.search_expenses()  # List positions are search results, not ledger rows
+            else:
+                self.expense_listbox.apply_change(event, self._list_index(self.expenses, event, index))
+        self.views.mark_dirty('charts', 'chart', 'summary', 'categories')
+    
+    def _list_index(self, ledger, event, index):
+        """Turn a ledger position from a change event into a line of its newest-first list"""
+        if index is None:
+            return None
+        if event == 'delete':
+            return len(ledger) - index  # The row has already gone
+        return len(ledger) - 1 - index
+    
+    def search_incomes(self, event=None):
+        """Filter the income history by what is typed in its search box"""
+        self.income_results = self._search(self.income_search, self.income_search_entry.get(),
+                                           self.income_search_note)
+        self.income_listbox.refresh()
+    
+    def search_expenses(self, event=None):
+        """Filter the expense history by what is typed in its search box"""
+        self.expense_results = self._search(self.expense_search, self.expense_search_entry.get(),
+                                            self.expense_search_note)
+        self.expense_listbox.refresh()
+    
+    def _search(self, index, text, note):
+        """Return the ids matching a search box query (None when it is empty).
+        
+        Only loaded rows are indexed. A query with after:YYYY-MM-DD first
+        loads the history back to that date (the search runs again once the
+        rows are in); any other query only covers the loaded range, and note
+        says so.
+        """
+        if not text.strip():
+            note.config(text="")
+            return None
+        words, filters = parse_query(text)
+        start = filters.get('start')
+        loaded_from = self.account.loaded_from
+        if loaded_from is None or (start is not None and self.ensure_loaded(start)):
+            note.config(text="")
+        elif start is not None:
+            note.config(text="Loading older history...")
+        else:
+            note.config(text=f"Matches since {from_timestamp(loaded_from).strftime('%m/%d/%Y')} only - "
+                             f"add after:YYYY-MM-DD to search older history")
+        return index.search(words, **filters)
+    
+    def income_row_count(self):
+        """Rows in the income history list (all incomes, or the search results)"""
+        return len(self.incomes) if self.income_results is None else len(self.income_results)
+    
+    def expense_row_count(self):
+        """Rows in the expense history list (all expenses, or the search results)"""
+        return len(self.expenses) if self.expense_results is None else len(self.expense_results)
+    
+    def income_row_id(self, index):
+        """Id of the income shown on a line of the history list (newest first)"""
+        if self.income_results is None:
+            return self.incomes.id_at(len(self.incomes) - 1 - index)
+        return self.income_results[-1 - index]
+    
+    def expense_row_id(self, index):
+        """Id of the expense shown on a line of the history list (newest first)"""
+        if self.expense_results is None:
+            return self.expenses.id_at(len(self.expenses) - 1 - index)
+        return self.expense_results[-1 - index]
+    
+    def format_income_row(self, index):
+        """Format one income for the history list"""
+        incomes = self.incomes
+        slot = incomes.slots[self.income_row_id(index)]
+        date_str = from_timestamp(incomes.timestamps[slot]).strftime("%m/%d/%Y %H:%M")
+        return f"{format_money(incomes.amounts[slot])} - {incomes.descriptions[slot]} ({date_str})"
+    
+    def format_expense_row(self, index):
+        """Format one expense for the history list"""
+        expenses = self.expenses
+        slot = expenses.slots[self.expense_row_id(index)]
+        date_str = from_timestamp(expenses.timestamps[slot]).strftime("%m/%d/%Y %H:%M")
+        category = expenses.category_names[expenses.category_codes[slot]]
+        return f"{format_money(expenses.amounts[slot])} - {expenses.descriptions[slot]} ({category}) ({date_str})"
+    
+    def add_expense(self, amount, description, category, date=None):
+        """Add an expense to the tracker (amount in pence) and return its id."""
         if amount <= 0:
             raise ValueError("Amount must be positive")
         
-        expense = {
-            "description": description,
-            "category": category,
-            "amount": amount,
-            "date": datetime.now()
-        }
-        
-        self.expenses.append(expense)
+        if date is None:
+            date = datetime.now()
+        row_id = self._insert('expenses', amount, description, date, category)
         self.total_expenses += amount
         self.current_balance -= amount
-        self.update_totals_display()  # Update the labels!
-        print(f"Expense added: {description} - £{amount} ({category}) on {expense['date']}")
+        self._totals_changed()  # Update the labels!
+        if self.undo_log is None:
+            print(f"Expense added: {description} - {format_money(amount)} ({category}) on {date}")
+        return row_id
 
-    def add_income(self, amount, description):
-        """Add an income to the tracker."""
+    def add_income(self, amount, description, date=None):
+        """Add an income to the tracker (amount in pence) and return its id."""
         if amount <= 0:
             raise ValueError("Amount must be positive")
         
-        income = {
-            "description": description,
-            "amount": amount,
-            "date": datetime.now()
-        }
-        
-        self.incomes.append(income)
+        if date is None:
+            date = datetime.now()
+        row_id = self._insert('income', amount, description, date, None)
         self.total_income += amount
         self.current_balance += amount
-        self.update_totals_display()  # Update the labels!
-        print(f"Income added: {description} - £{amount} on {income['date']}")
+        self._totals_changed()  # Update the labels!
+        if self.undo_log is None:
+            print(f"Income added: {description} - {format_money(amount)} on {date}")
+        return row_id
+
+    def update_expense(self, row_id, amount, description, category):
+        """Change the expense with this id (its date is kept)."""
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        
+        old_amount = self._update('expenses', row_id, amount, description, category)
+        self.total_expenses += amount - old_amount
+        self.current_balance -= amount - old_amount
+        self._totals_changed()
+
+    def update_income(self, row_id, amount, description):
+        """Change the income with this id (its date is kept)."""
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        
+        old_amount = self._update('income', row_id, amount, description, None)
+        self.total_income += amount - old_amount
+        self.current_balance += amount - old_amount
+        self._totals_changed()
+
+    def delete_expense(self, row_id):
+        """Remove the expense with this id and return it as a dict."""
+        expense = self._delete('expenses', row_id)
+        self.total_expenses -= expense['amount']
+        self.current_balance += expense['amount']  # Add back to balance
+        self._totals_changed()
+        return expense
+
+    def delete_income(self, row_id):
+        """Remove the income with this id and return it as a dict."""
+        income = self._delete('income', row_id)
+        self.total_income -= income['amount']
+        self.current_balance -= income['amount']
+        self._totals_changed()
+        return income
+
+    @contextmanager
+    def batch(self):
+        """Apply many adds, edits and deletes as one transaction.
+        
+        Inside the block the add_*, update_* and delete_* methods only change
+        the data: the total labels, history lists and charts are redrawn once
+        when the block ends, and the writes reach storage together. If the
+        block raises, every change made inside it is undone and the exception
+        is re-raised. Nested batches join the outermost one.
+        
+            with app.batch():
+                for amount, description in rows:
+                    app.add_income(amount, description)
+        """
+        if self.undo_log is not None:
+            yield self
+            return
+        
+        saved_totals = (self.total_income, self.total_expenses, self.current_balance)
+        real_storage = self.storage
+        self.storage = BufferedWrites(real_storage)
+        self.undo_log = []
+        try:
+            yield self
+        except BaseException:
+            self._rollback()
+            self.total_income, self.total_expenses, self.current_balance = saved_totals
+            self.storage = real_storage
+            self.undo_log = None
+            self._batch_finished()
+            raise
+        
+        buffered_writes = self.storage
+        self.storage = real_storage
+        self.undo_log = None
+        buffered_writes.commit()
+        self._batch_finished()
+
+    def _batch_finished(self):
+        """Redraw everything a batch changed, once"""
+        changes = self.batch_changes
+        self.batch_changes = set()
+        if 'income' in changes:
+            self._on_income_change('reset', None)
+        if 'expenses' in changes:
+            self._on_expense_change('reset', None)
+        self.update_totals_display()
+
+    def _rollback(self):
+        """Undo the open batch's changes, newest first"""
+        for step in reversed(self.undo_log):
+            action, kind = step[0], step[1]
+            ledger = self._ledger(kind)
+            if action == 'insert':
+                _, timestamp, amount, _, _ = ledger.stored_row(step[2])
+                self.rollups.apply(kind, timestamp, -amount)
+                ledger.delete(step[2])
+            elif action == 'update':
+                row_id, old_amount, old_description, old_category = step[2:]
+                _, timestamp, amount, _, _ = ledger.stored_row(row_id)
+                self.rollups.apply(kind, timestamp, old_amount - amount)
+                ledger.update(row_id, old_amount, old_description, old_category)
+            elif action == 'delete':
+                stored_row = step[2]
+                ledger.restore(stored_row)
+                self.rollups.apply(kind, stored_row[1], stored_row[2])
+            elif action == 'extend':
+                stored_rows = step[2]
+                ledger.remove_ids({row[0] for row in stored_rows})
+                for _, timestamp, amount, _, _ in stored_rows:
+                    self.rollups.apply(kind, timestamp, -amount)
+
+    def _totals_changed(self):
+        """Redraw the total labels now, or once when the open batch ends"""
+        if self.undo_log is None:
+            self.update_totals_display()
+
+    def _ledger(self, kind):
+        return self.incomes if kind == 'income' else self.expenses
+
+    def _insert(self, kind, amount, description, date, category):
+        """Add one row to a ledger, the chart totals and storage; returns its id"""
+        ledger = self._ledger(kind)
+        row_id = ledger.add(amount, description, date, category)
+        stored_row = ledger.stored_row(row_id)
+        self.rollups.apply(kind, stored_row[1], amount)
+        self.storage.add(kind, stored_row)
+        if self.undo_log is not None:
+            self.undo_log.append(('insert', kind, row_id))
+        return row_id
+
+    def _update(self, kind, row_id, amount, description, category):
+        """Change one row everywhere it is kept; returns the old amount"""
+        ledger = self._ledger(kind)
+        if row_id not in ledger.slots:
+            raise ValueError("That entry no longer exists")
+        _, timestamp, old_amount, old_description, old_category = ledger.stored_row(row_id)
+        ledger.update(row_id, amount, description, category)
+        self.rollups.apply(kind, timestamp, amount - old_amount)
+        self.storage.update(kind, row_id, amount, description, category)
+        if self.undo_log is not None:
+            self.undo_log.append(('update', kind, row_id, old_amount, old_description, old_category))
+        return old_amount
+
+    def _delete(self, kind, row_id):
+        """Remove one row everywhere it is kept; returns it as a dict"""
+        ledger = self._ledger(kind)
+        if row_id not in ledger.slots:
+            raise ValueError("That entry no longer exists")
+        stored_row = ledger.stored_row(row_id)
+        self.rollups.apply(kind, stored_row[1], -stored_row[2])
+        self.storage.delete(kind, row_id)
+        removed = ledger.delete(row_id)
+        if self.undo_log is not None:
+            self.undo_log.append(('delete', kind, stored_row))
+        return removed
 
     def update_chart_display(self):
         """Update the chart when period selection changes"""
-        if hasattr(self, 'chart_canvas'):
-            self.chart_canvas.destroy()
-        
         # Update period label if it exists
         if hasattr(self, 'period_label'):
             period_text = self.get_period_label(self.chart_period_var.get(), self.chart_offset)
             self.period_label.config(text=period_text)
         
-        # Clear and recreate chart in the container
-        if hasattr(self, 'chart_container'):
-            for widget in self.chart_container.winfo_children():
-                widget.destroy()
-            self.create_simple_bar_chart(self.chart_container)
-        
-        # Update the period label
-        if hasattr(self, 'period_label') and self.chart_period_var.get():
-            current_period = self.get_period_label(self.chart_period_var.get(), self.chart_offset)
-            self.period_label.config(text=current_period)
+        # Redraw the existing chart in place (its canvas items are reused)
+        if hasattr(self, 'bar_chart'):
+            self.draw_bar_chart()
     
     def show_previous_period(self):
         """Show previous time period in chart"""
@@ -709,345 +1429,115 @@ class FinanceMain:
             self.chart_offset -= 1
             self.update_chart_display()
     
+    def select_chart_period(self):
+        """Switch period type, showing its usual number of bars"""
+        self.chart_count_var.set(DEFAULT_BUCKETS[self.chart_period_var.get()])
+        self.update_chart_display()
+    
+    def zoom_chart(self, step):
+        """Zoom in (step -1) or out (step 1) one period type around the middle of the page"""
+        period_type = self.chart_period_var.get()
+        index = PERIOD_TYPES.index(period_type) + step
+        if not 0 <= index < len(PERIOD_TYPES):
+            return
+        buckets = self.get_chart_buckets(period_type)
+        middle = buckets[len(buckets) // 2][1]
+        period_type = PERIOD_TYPES[index]
+        self.chart_period_var.set(period_type)
+        self.chart_count_var.set(DEFAULT_BUCKETS[period_type])
+        self.chart_offset = page_offset(period_type, middle, self.chart_count_var.get())
+        self.update_chart_display()
+    
+    def get_chart_buckets(self, period_type, offset=None):
+        """Return the (label, start, end) buckets on a chart page (the current one by default)"""
+        if offset is None:
+            offset = self.chart_offset
+        try:
+            count = max(1, int(self.chart_count_var.get()))
+        except (AttributeError, tk.TclError, ValueError):
+            count = DEFAULT_BUCKETS[period_type]  # Charts view not built yet, or the Spinbox is mid-edit
+        return chart_buckets(period_type, offset, count=count)
+    
     def get_period_label(self, period_type, offset):
         """Get a descriptive label for the current period being displayed"""
-        from datetime import date, timedelta
-        import calendar
-        
-        today = date.today()
-        
-        if period_type == "Day":
-            start_date = today - timedelta(days=(offset * 7) + 6)
-            end_date = today - timedelta(days=offset * 7)
-            return f"{start_date.strftime('%m/%d')} - {end_date.strftime('%m/%d/%Y')}"
-        
-        elif period_type == "Week":
-            start_week = today - timedelta(days=today.weekday() + (offset * 4 * 7) + (3 * 7))
-            end_week = today - timedelta(days=today.weekday() + (offset * 4 * 7))
-            return f"{start_week.strftime('%m/%d')} - {end_week.strftime('%m/%d/%Y')}"
-        
-        elif period_type == "Month":
-            start_month_offset = offset * 6 + 5
-            end_month_offset = offset * 6
-            
-            if today.month - start_month_offset > 0:
-                start_month = today.month - start_month_offset
-                start_year = today.year
-            else:
-                start_month = 12 + (today.month - start_month_offset)
-                start_year = today.year - ((start_month_offset - today.month) // 12 + 1)
-            
-            if today.month - end_month_offset > 0:
-                end_month = today.month - end_month_offset
-                end_year = today.year
-            else:
-                end_month = 12 + (today.month - end_month_offset)
-                end_year = today.year - ((end_month_offset - today.month) // 12 + 1)
-            
-            start_name = calendar.month_abbr[start_month]
-            end_name = calendar.month_abbr[end_month]
-            
-            if start_year == end_year:
-                return f"{start_name} - {end_name} {end_year}"
-            else:
-                return f"{start_name} {end_year} - {end_name} {end_year}"
-        
-        return ""
+        return describe_buckets(period_type, self.get_chart_buckets(period_type, offset))
     
     def create_simple_bar_chart(self, parent):
         """Create a simple bar chart showing income vs expenses"""
-        chart_frame = tk.Frame(parent, bg="#f0f0f0")
-        chart_frame.pack(pady=10)
-        
-        # Chart title
-        chart_title = tk.Label(chart_frame, text=f"Income vs Expenses ({self.chart_period_var.get()}ly)", 
-                              font=("Arial", 14, "bold"), bg="#f0f0f0")
-        chart_title.pack(pady=(0, 10))
-        
-        # Get data for the selected period
-        chart_data = self.get_chart_data(self.chart_period_var.get())
-        
-        if not chart_data:
-            no_data_label = tk.Label(chart_frame, text="No data available for the selected period", 
-                                   font=("Arial", 12), bg="#f0f0f0", fg="gray")
-            no_data_label.pack(pady=20)
-            return
-        
-        # Create canvas for chart
-        self.chart_canvas = tk.Canvas(chart_frame, width=600, height=300, bg="white", relief="ridge", bd=2)
-        self.chart_canvas.pack(pady=10)
-        
-        # Chart dimensions
-        chart_width = 550
-        chart_height = 250
-        margin_left = 50
-        margin_bottom = 30
-        margin_top = 20
-        
-        # Find max value for scaling
-        max_value = 0
-        for period, data in chart_data.items():
-            max_value = max(max_value, data['income'], data['expenses'])
-        
-        if max_value == 0:
-            max_value = 100  # Prevent division by zero
-        
-        # Calculate bar dimensions
-        bar_width = chart_width // (len(chart_data) * 2 + 1)
-        if bar_width < 20:
-            bar_width = 20
-        
-        # Draw chart
-        x_pos = margin_left
-        for i, (period, data) in enumerate(chart_data.items()):
-            # Calculate bar heights
-            income_height = (data['income'] / max_value) * chart_height
-            expense_height = (data['expenses'] / max_value) * chart_height
-            
-            # Draw income bar (green)
-            self.chart_canvas.create_rectangle(
-                x_pos, chart_height + margin_top - income_height,
-                x_pos + bar_width, chart_height + margin_top,
-                fill="#4CAF50", outline="#2E7D32"
-            )
-            
-            # Draw expense bar (red)
-            self.chart_canvas.create_rectangle(
-                x_pos + bar_width + 5, chart_height + margin_top - expense_height,
-                x_pos + (bar_width * 2) + 5, chart_height + margin_top,
-                fill="#f44336", outline="#c62828"
-            )
-            
-            # Add period label
-            label_x = x_pos + bar_width
-            self.chart_canvas.create_text(
-                label_x, chart_height + margin_top + 15,
-                text=period, font=("Arial", 9), anchor="n"
-            )
-            
-            # Add value labels
-            if income_height > 20:
-                self.chart_canvas.create_text(
-                    x_pos + bar_width//2, chart_height + margin_top - income_height//2,
-                    text=f"£{data['income']:.0f}", font=("Arial", 8), fill="white"
-                )
-            
-            if expense_height > 20:
-                self.chart_canvas.create_text(
-                    x_pos + bar_width + bar_width//2 + 5, chart_height + margin_top - expense_height//2,
-                    text=f"£{data['expenses']:.0f}", font=("Arial", 8), fill="white"
-                )
-            
-            x_pos += bar_width * 2 + 20
-        
-        # Add legend
-        legend_frame = tk.Frame(chart_frame, bg="#f0f0f0")
-        legend_frame.pack(pady=5)
-        
-        # Income legend
-        income_color = tk.Frame(legend_frame, bg="#4CAF50", width=15, height=15)
-        income_color.pack(side='left', padx=(0, 5))
-        tk.Label(legend_frame, text="Income", font=("Arial", 10), bg="#f0f0f0").pack(side='left', padx=(0, 15))
-        
-        # Expense legend
-        expense_color = tk.Frame(legend_frame, bg="#f44336", width=15, height=15)
-        expense_color.pack(side='left', padx=(0, 5))
-        tk.Label(legend_frame, text="Expenses", font=("Arial", 10), bg="#f0f0f0").pack(side='left')
+        self.bar_chart = BarChart(parent)
+        self.draw_bar_chart()
+    
+    def draw_bar_chart(self):
+        """Show the selected period's data on the existing bar chart"""
+        period_type = self.chart_period_var.get()
+        title = f"Income vs Expenses ({'Daily' if period_type == 'Day' else period_type + 'ly'})"
+        accounts = self.chart_accounts()
+        if len(accounts) > 1:
+            title += " - All ledgers"
+        start = self.get_chart_buckets(period_type)[0][1]
+        loading = False
+        for account in accounts:
+            if not account.loaded:
+                self.load_data(account)
+            if not self.ensure_loaded(start, account) or self.tasks.pending(('rollups', account.name)):
+                loading = True
+        if loading:
+            title += " - loading..."  # Redrawn when the workers finish
+        self.bar_chart.update(title, self.get_chart_data(period_type), self.chart_style_var.get())
     
     def get_chart_data(self, period_type):
         """Get aggregated data for the chart based on period type and offset"""
-        from datetime import timedelta, date
-        import calendar
+        buckets = self.get_chart_buckets(period_type)
+        accounts = self.chart_accounts()
         
-        if not self.incomes and not self.expenses:
+        if not any(account.incomes or account.expenses for account in accounts):
             return {}
         
-        chart_data = {}
-        today = date.today()
-        
-        if period_type == "Day":
-            # Show 7 days starting from offset weeks ago
-            base_date = today - timedelta(days=self.chart_offset * 7)
-            for i in range(6, -1, -1):
-                target_date = base_date - timedelta(days=i)
-                day_key = target_date.strftime("%m/%d")
-                chart_data[day_key] = {'income': 0, 'expenses': 0}
-                
-                # Sum incomes for this day
-                for income in self.incomes:
-                    if income['date'].date() == target_date:
-                        chart_data[day_key]['income'] += income['amount']
-                
-                # Sum expenses for this day
-                for expense in self.expenses:
-                    if expense['date'].date() == target_date:
-                        chart_data[day_key]['expenses'] += expense['amount']
-        
-        elif period_type == "Week":
-            # Show 4 weeks starting from offset*4 weeks ago
-            base_date = today - timedelta(days=today.weekday() + (self.chart_offset * 4 * 7))
-            for i in range(3, -1, -1):
-                week_start = base_date - timedelta(days=i * 7)
-                week_end = week_start + timedelta(days=6)
-                week_key = f"Week {week_start.strftime('%m/%d')}"
-                chart_data[week_key] = {'income': 0, 'expenses': 0}
-                
-                # Sum incomes for this week
-                for income in self.incomes:
-                    if week_start <= income['date'].date() <= week_end:
-                        chart_data[week_key]['income'] += income['amount']
-                
-                # Sum expenses for this week
-                for expense in self.expenses:
-                    if week_start <= expense['date'].date() <= week_end:
-                        chart_data[week_key]['expenses'] += expense['amount']
-        
-        elif period_type == "Month":
-            # Show 6 months starting from offset*6 months ago
-            for i in range(5, -1, -1):
-                month_offset = (self.chart_offset * 6) + i
-                if today.month - month_offset > 0:
-                    target_month = today.month - month_offset
-                    target_year = today.year
-                else:
-                    years_back = ((month_offset - today.month) // 12) + 1
-                    target_month = 12 - ((month_offset - today.month) % 12)
-                    if target_month == 12 and (month_offset - today.month) % 12 == 0:
-                        target_month = today.month
-                        years_back -= 1
-                    target_year = today.year - years_back
-                
-                month_key = calendar.month_abbr[target_month]
-                chart_data[month_key] = {'income': 0, 'expenses': 0}
-                
-                # Sum incomes for this month
-                for income in self.incomes:
-                    if (income['date'].month == target_month and 
-                        income['date'].year == target_year):
-                        chart_data[month_key]['income'] += income['amount']
-                
-                # Sum expenses for this month
-                for expense in self.expenses:
-                    if (expense['date'].month == target_month and 
-                        expense['date'].year == target_year):
-                        chart_data[month_key]['expenses'] += expense['amount']
-        
-        return chart_data
-    
-    def generate_sample_data(self):
-        """Generate sample data for testing - 3 months of financial data"""
-        from datetime import datetime, timedelta
-        import random
-        
-        # Clear existing data
-        self.expenses = []
-        self.incomes = []
-        self.total_expenses = 0.0
-        self.total_income = 0.0
-        self.current_balance = 0.0
-        
-        # Define expense categories and typical amounts
-        expense_categories = {
-            "Food": [15, 25, 35, 45, 8, 12, 20, 30, 18, 22],
-            "Transportation": [45, 60, 25, 30, 15, 20, 85, 95],
-            "Housing": [800, 120, 150, 80, 95],
-            "Entertainment": [25, 35, 15, 45, 20, 30, 40, 18],
-            "Healthcare": [85, 120, 45, 65, 200, 150],
-            "Other": [20, 35, 50, 15, 25, 40, 30]
-        }
-        
-        # Generate data for last 3 months including current month
-        today = datetime.now()
-        
-        for month_offset in range(2, -1, -1):  # 2 months ago to current month
-            # Calculate target month
-            target_date = today - timedelta(days=month_offset * 30)
-            year = target_date.year
-            month = target_date.month
-            
-            # For current month, don't go past today
-            max_day = min(28, today.day if month_offset == 0 else 28)
-            
-            # Add monthly salary (always on the 1st of the month)
-            salary_date = datetime(year, month, 1, 9, 0, 0)
-            salary_income = {
-                "description": "Monthly Salary",
-                "amount": 2700.0,
-                "date": salary_date
-            }
-            self.incomes.append(salary_income)
-            self.total_income += 2700.0
-            self.current_balance += 2700.0
-            
-            # Add occasional freelance income
-            if random.random() < 0.3:  # 30% chance of freelance income
-                freelance_day = random.randint(5, 25)
-                freelance_date = datetime(year, month, freelance_day, 
-                                        random.randint(10, 16), random.randint(0, 59), 0)
-                freelance_amount = random.randint(200, 800)
-                freelance_income = {
-                    "description": "Freelance Work",
-                    "amount": float(freelance_amount),
-                    "date": freelance_date
-                }
-                self.incomes.append(freelance_income)
-                self.total_income += freelance_amount
-                self.current_balance += freelance_amount
-            
-            # Generate 20-25 expenses for this month
-            num_expenses = random.randint(20, 25)
-            
-            for i in range(num_expenses):
-                # Random day of the month (respect max_day for current month)
-                day = random.randint(1, max_day)
-                hour = random.randint(8, 22)
-                minute = random.randint(0, 59)
-                expense_date = datetime(year, month, day, hour, minute, 0)
-                
-                # Random category and amount
-                category = random.choice(list(expense_categories.keys()))
-                base_amount = random.choice(expense_categories[category])
-                
-                # Add some variation to the amount
-                variation = random.uniform(0.8, 1.3)
-                amount = round(base_amount * variation, 2)
-                
-                # Generate description based on category
-                descriptions = {
-                    "Food": ["Groceries", "Restaurant", "Coffee", "Lunch", "Dinner", "Snacks", "Takeaway"],
-                    "Transportation": ["Gas", "Bus fare", "Taxi", "Parking", "Car maintenance", "Train ticket"],
-                    "Housing": ["Rent", "Utilities", "Internet", "Phone", "Home supplies", "Repairs"],
-                    "Entertainment": ["Movie", "Concert", "Games", "Books", "Streaming", "Sports"],
-                    "Healthcare": ["Pharmacy", "Doctor visit", "Dentist", "Gym", "Vitamins"],
-                    "Other": ["Clothing", "Gifts", "Personal care", "Electronics", "Miscellaneous"]
-                }
-                
-                description = random.choice(descriptions[category])
-                
-                # Create expense entry
-                expense = {
-                    "description": description,
-                    "category": category,
-                    "amount": amount,
-                    "date": expense_date
-                }
-                
-                self.expenses.append(expense)
-                self.total_expenses += amount
-                self.current_balance -= amount
-        
-        # Sort entries by date for better organization
-        self.incomes.sort(key=lambda x: x['date'])
-        self.expenses.sort(key=lambda x: x['date'])
-        
-        # Update display
+        # Bucket totals are kept up to date by each ledger's rollup cache, so
+        # this is one lookup per bucket (per ledger when they are combined)
+        # rather than a pass over the rows
+        if len(accounts) == 1:
+            return self.rollups.lookup(buckets, period_type)
+        return combined_lookup([account.rollups for account in accounts], buckets, period_type)
+    
+    def generate_sample_data(self, seed=None, months=3, expenses_per_month=None):
+        """Generate sample data for testing - 3 months of financial data by default
+        
+        Rows come from sample_data.py; the same seed always gives the same
+        rows (apart from the dates, which end today). expenses_per_month
+        defaults to about 20-25.
+        """
+        per_day = EXPENSES_PER_DAY if expenses_per_month is None else expenses_per_month / 30
+        
+        # Rows are generated in date order, so each ledger takes them in one
+        # bulk load with no sorting. The expenses go to the ledger as columns
+        # and are streamed into storage, so no list of row tuples is built.
+        # The ledgers and storage each run the generators, so both runs need
+        # the same concrete seed and end date to give the same rows
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.expenses.clear()
+        self.incomes.clear()
+        days = months * 30
+        end = datetime.now()
+        income_id, expense_id = self.incomes.next_id, self.expenses.next_id
+        self.incomes.load_rows(income_rows(seed, days, end, income_id))
+        self.expenses.load_columns(*expense_columns(seed, days, per_day, end, expense_id))
+        self.storage.add_many('income', income_rows(seed, days, end, income_id))
+        self.storage.add_many('expenses', expense_rows(seed, days, per_day, end, expense_id))
+        self.rebuild_rollups()
+        
+        self.total_income = self.incomes.total()
+        self.total_expenses = self.expenses.total()
+        self.current_balance = self.total_income - self.total_expenses
         self.update_totals_display()
+        
         print(f"Sample data generated:")
         print(f"- {len(self.incomes)} income entries")
         print(f"- {len(self.expenses)} expense entries")
-        print(f"- Total Income: £{self.total_income:.2f}")
-        print(f"- Total Expenses: £{self.total_expenses:.2f}")
-        print(f"- Current Balance: £{self.current_balance:.2f}")
+        print(f"- Total Income: {format_money(self.total_income)}")
+        print(f"- Total Expenses: {format_money(self.total_expenses)}")
+        print(f"- Current Balance: {format_money(self.current_balance)}")
     
     def start_tracking(self):
         print("Tracking started...")
@@ -1055,5 +1545,24 @@ class FinanceMain:
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = FinanceMain(root)
+    data_dir = os.path.dirname(os.path.abspath(__file__))
+    storage = JournalStorage(os.path.join(data_dir, "finance.journal"))
+    database_path = os.path.join(data_dir, "finance.db")
+    if storage.is_empty() and os.path.exists(database_path):
+        # Carry over data saved by the SQLite backend
+        database = SQLiteStorage(database_path)
+        for kind in KINDS:
+            storage.add_many(kind, database.load(kind))
+        database.close()
+        storage.compact()
+    
+    # Every other ledger is saved in its own journal, finance-<name>.journal
+    def open_storage(name):
+        return JournalStorage(os.path.join(data_dir, f"finance-{name}.journal"))
+    ledgers = {}
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.startswith("finance-") and filename.endswith(".journal"):
+            name = filename[len("finance-"):-len(".journal")]
+            ledgers[name] = open_storage(name)
+    app = FinanceMain(root, storage=storage, profiler=Profiler(), ledgers=ledgers, open_storage=open_storage)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""Benchmarks for the Finance Tracker's hot paths.
+
+Seeds FinanceMain with synthetic ledgers of each size (generate_sample_data()
+with a fixed seed), times the chart, list and form handlers and writes the
+results as JSON, so runs before and after a change can be compared:
+
+    python benchmark.py --output before.json
+    ... make the change ...
+    python benchmark.py --output after.json --compare before.json
+
+The window is withdrawn, but Tk still needs a display; on a headless
+machine run it under Xvfb (xvfb-run python benchmark.py ...).
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tkinter as tk
+from datetime import datetime
+
+from aggregation import PERIOD_TYPES
+from app import FinanceMain
+
+
+SIZES = (1000, 100000, 1000000)
+MONTHS = 12  # Months of history the synthetic rows are spread over
+SEED = 42
+
+
+def settle(root, app):
+    """Let background jobs finish and pending redraws run"""
+    while app.tasks.callbacks:
+        root.update()
+        time.sleep(0.005)
+    root.update()
+
+
+def measure(root, action, setup=None, repeat=5, check=None):
+    """Time action() repeat times; setup() runs before each, untimed.
+
+    check(state), also untimed, runs after each with what setup() returned.
+    Returns {'min', 'median', 'max'} in milliseconds plus the run count.
+    Idle tasks (redraws the action scheduled) are included in the time.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        action()
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+        if check is not None:
+            check(state)
+    return {'min': min(times), 'median': statistics.median(times), 'max': max(times), 'runs': repeat}
+
+
+def fill(entry, text):
+    entry.delete(0, tk.END)
+    entry.insert(0, text)
+
+
+def expect(condition, message):
+    """Stop the run if a timed action did nothing.
+
+    The handlers catch and print their own errors, and stdout is redirected
+    while benchmarking, so a broken edit would otherwise be timed as a fast
+    no-op.
+    """
+    if not condition:
+        raise RuntimeError(f"Benchmark action failed: {message}")
+
+
+def bench_size(size, repeat):
+    """Run every benchmark against ledgers of about size rows"""
+    root = tk.Tk()
+    root.withdraw()
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = FinanceMain(root)
+        start = time.perf_counter()
+        app.generate_sample_data(seed=SEED, months=MONTHS, expenses_per_month=max(1, size // MONTHS))
+        settle(root, app)
+        results['generate_sample_data'] = {'min': (time.perf_counter() - start) * 1000, 'runs': 1}
+
+        for period_type in PERIOD_TYPES:
+            results[f'get_chart_data[{period_type}]'] = measure(
+                root, lambda: app.get_chart_data(period_type), repeat=repeat)
+
+        app.show_income_frame()
+        settle(root, app)
+        results['refresh_income_list'] = measure(root, app.refresh_income_list, repeat=repeat)
+
+        def fill_income():
+            fill(app.income_amount_entry, "12.34")
+            fill(app.income_desc_entry, "Benchmark")
+            return len(app.incomes)
+        results['add_income'] = measure(
+            root, app.add_income_from_form, setup=fill_income, repeat=repeat,
+            check=lambda rows: expect(len(app.incomes) == rows + 1, "add_income added no row"))
+
+        def select_income():
+            app.income_listbox.selected = len(app.incomes) // 2
+            app.edit_income_from_list()
+            fill(app.income_amount_entry, "43.21")
+            return app.editing_income_id
+        results['edit_income'] = measure(
+            root, app.update_income_from_form, setup=select_income, repeat=repeat,
+            check=lambda row_id: expect(row_id is not None and app.incomes.get(row_id)['amount'] == 4321,
+                                        "edit_income did not change the amount"))
+
+        def pick_income():
+            app.income_listbox.selected = len(app.incomes) // 2
+            return len(app.incomes)
+        results['delete_income'] = measure(
+            root, app.delete_income_from_list, setup=pick_income, repeat=repeat,
+            check=lambda rows: expect(len(app.incomes) == rows - 1, "delete_income deleted no row"))
+
+        app.show_expenses_frame()
+        settle(root, app)
+        results['refresh_expense_list'] = measure(root, app.refresh_expense_list, repeat=repeat)
+
+        def fill_expense():
+            fill(app.expense_amount_entry, "5.00")
+            fill(app.expense_desc_entry, "Benchmark")
+            return len(app.expenses)
+        results['add_expense'] = measure(
+            root, app.add_expense_from_form, setup=fill_expense, repeat=repeat,
+            check=lambda rows: expect(len(app.expenses) == rows + 1, "add_expense added no row"))
+
+        def select_expense():
+            app.expense_listbox.selected = len(app.expenses) // 2
+            app.edit_expense_from_list()
+            fill(app.expense_amount_entry, "6.50")
+            return app.editing_expense_id
+        results['edit_expense'] = measure(
+            root, app.update_expense_from_form, setup=select_expense, repeat=repeat,
+            check=lambda row_id: expect(row_id is not None and app.expenses.get(row_id)['amount'] == 650,
+                                        "edit_expense did not change the amount"))
+
+        def pick_expense():
+            app.expense_listbox.selected = len(app.expenses) // 2
+            return len(app.expenses)
+        results['delete_expense'] = measure(
+            root, app.delete_expense_from_list, setup=pick_expense, repeat=repeat,
+            check=lambda rows: expect(len(app.expenses) == rows - 1, "delete_expense deleted no row"))
+
+        results['show_charts_frame'] = measure(root, app.show_charts_frame,
+                                               setup=app.show_income_frame, repeat=repeat)
+        settle(root, app)
+        for period_type in PERIOD_TYPES:
+            def show_period():
+                app.chart_period_var.set(period_type)
+                app.select_chart_period()
+            results[f'update_chart_display[{period_type}]'] = measure(root, show_period, repeat=repeat)
+        results['rows'] = {'income': len(app.incomes), 'expenses': len(app.expenses)}
+        app.on_close()
+    return results
+
+
+def compare(before, after, tolerance, noise):
+    """Print each timing against an earlier run; return the names that got slower.
+
+    A benchmark counts as slower when it takes more than tolerance longer
+    and at least noise milliseconds more (sub-millisecond timings jitter).
+    """
+    slower = []
+    print(f"{'benchmark':45} {'before':>10} {'after':>10} {'ratio':>7}")
+    for size, timings in after['results'].items():
+        previous = before['results'].get(size, {})
+        for name, timing in timings.items():
+            if name == 'rows' or name not in previous:
+                continue
+            old, new = previous[name]['min'], timing['min']
+            ratio = new / old if old else float('inf')
+            flag = ""
+            if ratio > 1 + tolerance and new - old >= noise:
+                flag = "  SLOWER"
+                slower.append(f"{size}:{name}")
+            print(f"{size + ':' + name:45} {old:10.2f} {new:10.2f} {ratio:7.2f}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Finance Tracker")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES),
+                        help="comma-separated ledger sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark (default: %(default)s)")
+    parser.add_argument("--output", default="benchmark.json", help="where to write results")
+    parser.add_argument("--compare", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="how much slower (0.2 = 20%%) counts as a regression")
+    parser.add_argument("--noise", type=float, default=0.5,
+                        help="ignore slowdowns smaller than this many ms (default: %(default)s)")
+    args = parser.parse_args()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': {},
+    }
+    for size in (int(size) for size in args.sizes.split(",")):
+        print(f"Benchmarking {size} rows...")
+        report['results'][str(size)] = bench_size(size, args.repeat)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            before = json.load(file)
+        slower = compare(before, report, args.tolerance, args.noise)
+        if slower:
+            print(f"{len(slower)} benchmark(s) got slower: {', '.join(slower)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
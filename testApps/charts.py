@@ -0,0 +1,295 @@
+import tkinter as tk
+
+
+def column_ranges(count, columns):
+    """Split count buckets into at most columns consecutive (first, end) runs"""
+    columns = min(count, columns)
+    return [(column * count // columns, (column + 1) * count // columns) for column in range(columns)]
+
+
+def downsample(values, columns):
+    """Reduce values to at most columns (lowest, highest, total) triples.
+
+    Each triple covers one run of neighbouring values (see column_ranges()),
+    so a series of any length can be drawn with one column per pixel: lines
+    show the lowest-to-highest spread and bars the total.
+    """
+    if len(values) <= columns:
+        return [(value, value, value) for value in values]
+    samples = []
+    for first, end in column_ranges(len(values), columns):
+        run = values[first:end]
+        samples.append((min(run), max(run), sum(run)))
+    return samples
+
+
+class BarChart:
+    """Income vs expenses chart that is built once and then updated.
+
+    The canvas, legend and one set of canvas items per bucket are created
+    the first time they are needed and reused for every later period; an
+    update only moves items with canvas.coords() and changes their text with
+    itemconfig(). Spare items are hidden rather than deleted. When animate is
+    on, bar heights glide from the old period to the new one.
+
+    Besides bars it draws line and area charts. Dense series are
+    downsampled to the chart's pixel columns first, so thousands of buckets
+    cost no more canvas items than a few hundred.
+    """
+    # Chart dimensions
+    CANVAS_WIDTH = 600
+    CANVAS_HEIGHT = 300
+    CHART_WIDTH = 550
+    CHART_HEIGHT = 250
+    MARGIN_LEFT = 50
+    MARGIN_TOP = 20
+
+    MIN_BAR_SLOT = 6  # Narrowest pixel width for one bucket's pair of bars
+    LABEL_WIDTH = 45  # Room one bucket label needs
+
+    ANIMATION_FRAMES = 8
+    FRAME_DELAY = 15  # ms between animation frames
+
+    def __init__(self, parent, animate=True):
+        self.animate = animate
+        self.buckets = []  # Canvas item ids for each bucket
+        self.heights = []  # (income, expense) bar heights currently drawn
+        self.animation_job = None
+        self.series = None  # {'income'/'expenses': (polygon, line)} once a line or area chart is drawn
+
+        self.frame = tk.Frame(parent, bg="#f0f0f0")
+        self.frame.pack(pady=10)
+
+        # Chart title
+        self.title_label = tk.Label(self.frame, text="", font=("Arial", 14, "bold"), bg="#f0f0f0")
+        self.title_label.pack(pady=(0, 10))
+
+        self.no_data_label = tk.Label(self.frame, text="No data available for the selected period",
+                                      font=("Arial", 12), bg="#f0f0f0", fg="gray")
+
+        self.canvas = tk.Canvas(self.frame, width=self.CANVAS_WIDTH, height=self.CANVAS_HEIGHT,
+                                bg="white", relief="ridge", bd=2)
+
+        # Add legend
+        self.legend_frame = tk.Frame(self.frame, bg="#f0f0f0")
+
+        # Income legend
+        income_color = tk.Frame(self.legend_frame, bg="#4CAF50", width=15, height=15)
+        income_color.pack(side='left', padx=(0, 5))
+        tk.Label(self.legend_frame, text="Income", font=("Arial", 10), bg="#f0f0f0").pack(side='left', padx=(0, 15))
+
+        # Expense legend
+        expense_color = tk.Frame(self.legend_frame, bg="#f44336", width=15, height=15)
+        expense_color.pack(side='left', padx=(0, 5))
+        tk.Label(self.legend_frame, text="Expenses", font=("Arial", 10), bg="#f0f0f0").pack(side='left')
+
+        self.showing_chart = None
+
+    def update(self, title, chart_data, style="bars"):
+        """Show chart_data ({label: {'income': pence, 'expenses': pence}}) under title.
+
+        style is "bars", "line" or "area". Any number of buckets can be
+        shown: when there are more than fit, they are downsampled to one
+        value per column (see downsample()).
+        """
+        self.title_label.config(text=title)
+        if not chart_data:
+            self._show_chart(False)
+            return
+        self._show_chart(True)
+        if self.animation_job is not None:
+            self.canvas.after_cancel(self.animation_job)
+            self.animation_job = None
+
+        labels = list(chart_data)
+        incomes = [data['income'] for data in chart_data.values()]
+        expenses = [data['expenses'] for data in chart_data.values()]
+        if style == "bars":
+            self._hide_series()
+            self._update_bars(labels, incomes, expenses)
+        else:
+            self._hide_bars(0)
+            self.heights = []  # Bars grow from zero when switching back
+            self._update_series(labels, incomes, expenses, style == "area")
+
+    def _update_bars(self, labels, incomes, expenses):
+        columns = self.CHART_WIDTH // self.MIN_BAR_SLOT
+        if len(labels) > columns:
+            # Too many buckets for a bar each: each bar pair totals a run
+            # of neighbouring buckets, labelled with the first of them
+            labels = [labels[first] for first, _ in column_ranges(len(labels), columns)]
+            incomes = [total for _, _, total in downsample(incomes, columns)]
+            expenses = [total for _, _, total in downsample(expenses, columns)]
+
+        # Find max value for scaling
+        max_value = max(max(incomes), max(expenses))
+        if max_value <= 0:
+            max_value = 10000  # Prevent division by zero
+
+        self._ensure_buckets(len(labels))
+        # Fit every bucket across the chart; with many buckets only every
+        # few labels are shown so they do not overlap
+        slot_width = self.CHART_WIDTH // len(labels)
+        gap = min(10, slot_width // 4)
+        bar_width = max(1, (slot_width - gap - 5) // 2)
+        label_every = self._label_every(len(labels))
+        baseline = self.CHART_HEIGHT + self.MARGIN_TOP
+
+        targets = []
+        x_pos = self.MARGIN_LEFT
+        for index, (items, period, income, expense) in enumerate(zip(self.buckets, labels, incomes, expenses)):
+            income_height = (income / max_value) * self.CHART_HEIGHT
+            expense_height = (expense / max_value) * self.CHART_HEIGHT
+            targets.append((income_height, expense_height))
+
+            # Labels move straight to their new text; only the bars animate
+            self.canvas.itemconfig(items['label'], text=period,
+                                   state='normal' if index % label_every == 0 else 'hidden')
+            self.canvas.coords(items['label'], x_pos + bar_width, baseline + 15)
+            self.canvas.itemconfig(items['income_value'], text=f"£{income / 100:.0f}")
+            self.canvas.itemconfig(items['expense_value'], text=f"£{expense / 100:.0f}")
+            items['x'] = x_pos
+            items['bar_width'] = bar_width
+            x_pos += slot_width
+
+        # Hide items left over from a period with more buckets
+        self._hide_bars(len(labels))
+
+        start = self.heights[:len(targets)]
+        start += [(0, 0)] * (len(targets) - len(start))
+        if self.animate and start != targets:
+            self._animate(start, targets, 1)
+        else:
+            self._draw_bars(targets)
+
+    def _update_series(self, labels, incomes, expenses, area):
+        """Draw both series as lines (or filled areas) through every bucket.
+
+        Each series is a single canvas line (plus a polygon for areas) with
+        at most two points per pixel column, the lowest and highest value of
+        the buckets in it, so the item and point counts depend on the chart
+        width and never on how many buckets there are.
+        """
+        if self.series is None:
+            self.series = {}
+            for key, color, outline in (('income', "#A5D6A7", "#2E7D32"),
+                                        ('expenses', "#EF9A9A", "#c62828")):
+                self.series[key] = (
+                    self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill=color, outline="", stipple="gray50"),
+                    self.canvas.create_line(0, 0, 0, 0, fill=outline, width=2))
+        baseline = self.CHART_HEIGHT + self.MARGIN_TOP
+        count = len(labels)
+        columns = min(count, self.CHART_WIDTH)
+        samples = {'income': downsample(incomes, columns), 'expenses': downsample(expenses, columns)}
+        max_value = max(high for column in samples.values() for _, high, _ in column)
+        if max_value <= 0:
+            max_value = 10000  # Prevent division by zero
+        step = self.CHART_WIDTH / max(1, columns - 1) if columns > 1 else 0
+        left = self.MARGIN_LEFT if columns > 1 else self.MARGIN_LEFT + self.CHART_WIDTH / 2
+
+        for key, (polygon, line) in self.series.items():
+            points = []
+            for column, (low, high, _) in enumerate(samples[key]):
+                x_pos = left + column * step
+                points.extend((x_pos, baseline - high / max_value * self.CHART_HEIGHT))
+                if low != high:
+                    points.extend((x_pos, baseline - low / max_value * self.CHART_HEIGHT))
+            if len(points) < 4:
+                points.extend(points)  # A line needs two points
+            self.canvas.coords(line, *points)
+            self.canvas.itemconfig(line, state='normal')
+            if area:
+                self.canvas.coords(polygon, points[0], baseline, *points, points[-2], baseline)
+            self.canvas.itemconfig(polygon, state='normal' if area else 'hidden')
+
+        # Spread a few bucket labels evenly along the axis
+        ticks = min(count, self.CHART_WIDTH // self.LABEL_WIDTH)
+        ranges = column_ranges(count, columns)
+        self._ensure_buckets(ticks)
+        for tick, items in enumerate(self.buckets[:ticks]):
+            column = tick * (columns - 1) // max(1, ticks - 1) if ticks > 1 else 0
+            first, _ = ranges[column]
+            self.canvas.itemconfig(items['label'], text=labels[first], state='normal')
+            self.canvas.coords(items['label'], left + column * step, baseline + 15)
+        for items in self.buckets[ticks:]:
+            self.canvas.itemconfig(items['label'], state='hidden')
+
+    def _label_every(self, count):
+        """Show only every nth label so that labels do not overlap"""
+        return -(-count * self.LABEL_WIDTH // self.CHART_WIDTH)
+
+    def _hide_bars(self, first):
+        """Hide the bar items of every bucket from first on"""
+        for items in self.buckets[first:]:
+            for key in ('income_bar', 'expense_bar', 'label', 'income_value', 'expense_value'):
+                self.canvas.itemconfig(items[key], state='hidden')
+
+    def _hide_series(self):
+        if self.series is not None:
+            for polygon, line in self.series.values():
+                self.canvas.itemconfig(polygon, state='hidden')
+                self.canvas.itemconfig(line, state='hidden')
+
+    def _show_chart(self, show):
+        """Switch between the canvas and the 'no data' message"""
+        if show == self.showing_chart:
+            return
+        self.showing_chart = show
+        if show:
+            self.no_data_label.pack_forget()
+            self.canvas.pack(pady=10)
+            self.legend_frame.pack(pady=5)
+        else:
+            self.canvas.pack_forget()
+            self.legend_frame.pack_forget()
+            self.no_data_label.pack(pady=20)
+
+    def _ensure_buckets(self, count):
+        """Create canvas items until there are enough for count buckets"""
+        while len(self.buckets) < count:
+            self.buckets.append({
+                'income_bar': self.canvas.create_rectangle(0, 0, 0, 0, fill="#4CAF50", outline="#2E7D32"),
+                'expense_bar': self.canvas.create_rectangle(0, 0, 0, 0, fill="#f44336", outline="#c62828"),
+                'label': self.canvas.create_text(0, 0, text="", font=("Arial", 9), anchor="n"),
+                'income_value': self.canvas.create_text(0, 0, text="", font=("Arial", 8), fill="white"),
+                'expense_value': self.canvas.create_text(0, 0, text="", font=("Arial", 8), fill="white"),
+                'x': 0,
+                'bar_width': 0
+            })
+
+    def _animate(self, start, targets, frame):
+        """Draw one step of the transition from start heights to target heights"""
+        progress = frame / self.ANIMATION_FRAMES
+        eased = 1 - (1 - progress) ** 2  # Ease out: fast start, gentle finish
+        self._draw_bars([(old_income + (new_income - old_income) * eased,
+                          old_expense + (new_expense - old_expense) * eased)
+                         for (old_income, old_expense), (new_income, new_expense) in zip(start, targets)])
+        if frame < self.ANIMATION_FRAMES:
+            self.animation_job = self.canvas.after(self.FRAME_DELAY, self._animate, start, targets, frame + 1)
+        else:
+            self.animation_job = None
+
+    def _draw_bars(self, heights):
+        """Move the bars and value labels to the given (income, expense) heights"""
+        baseline = self.CHART_HEIGHT + self.MARGIN_TOP
+        for items, (income_height, expense_height) in zip(self.buckets, heights):
+            x_pos = items['x']
+            bar_width = items['bar_width']
+            self.canvas.coords(items['income_bar'], x_pos, baseline - income_height,
+                               x_pos + bar_width, baseline)
+            self.canvas.coords(items['expense_bar'], x_pos + bar_width + 5, baseline - expense_height,
+                               x_pos + (bar_width * 2) + 5, baseline)
+            self.canvas.itemconfig(items['income_bar'], state='normal')
+            self.canvas.itemconfig(items['expense_bar'], state='normal')
+
+            # Value labels only fit inside bars taller than 20px and 30px wide
+            wide = bar_width >= 30
+            self.canvas.coords(items['income_value'], x_pos + bar_width // 2,
+                               baseline - income_height // 2)
+            self.canvas.itemconfig(items['income_value'],
+                                   state='normal' if wide and income_height > 20 else 'hidden')
+            self.canvas.coords(items['expense_value'], x_pos + bar_width + bar_width // 2 + 5,
+                               baseline - expense_height // 2)
+            self.canvas.itemconfig(items['expense_value'],
+                                   state='normal' if wide and expense_height > 20 else 'hidden')
+        self.heights = list(heights)
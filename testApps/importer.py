@@ -0,0 +1,267 @@
+import csv
+import heapq
+import os
+import queue
+import re
+import threading
+from datetime import datetime
+
+from money import format_pence, to_pence
+
+
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y",
+                "%d/%m/%Y %H:%M", "%m/%d/%Y", "%m/%d/%Y %H:%M", "%d-%m-%Y", "%d %b %Y"]
+
+# Header names we recognise in CSV statements (compared in lower case)
+DATE_COLUMNS = ("date", "transaction date", "posted date", "posting date")
+DESCRIPTION_COLUMNS = ("description", "memo", "payee", "name", "details", "narrative")
+AMOUNT_COLUMNS = ("amount", "value", "amount (gbp)")
+CATEGORY_COLUMNS = ("category", "type")
+DEBIT_COLUMNS = ("debit", "paid out", "money out")
+CREDIT_COLUMNS = ("credit", "paid in", "money in")
+
+OFX_TAG = re.compile(r"<(/?\w+)>([^<\r\n]*)")
+
+
+def parse_amount(text):
+    """Parse '£1,234.50', '-12.00' or '(12.00)' into pence (None if blank)"""
+    text = text.strip().replace("£", "").replace(",", "").replace(" ", "")
+    if not text:
+        return None
+    if text.startswith("(") and text.endswith(")"):
+        return -to_pence(text[1:-1])
+    return to_pence(text)
+
+
+def parse_ofx_date(text):
+    """Parse an OFX date such as 20240131 or 20240131120000[0:GMT] (None if invalid)"""
+    try:
+        if len(text) >= 14:
+            return datetime.strptime(text[:14], "%Y%m%d%H%M%S")
+        return datetime.strptime(text[:8], "%Y%m%d")
+    except ValueError:
+        return None
+
+
+def export_csv(path, incomes, expenses):
+    """Write both ledgers to a CSV statement, oldest first; returns the row count.
+
+    Incomes are written as positive amounts and expenses as negative ones,
+    under the same column names StatementImporter reads, so an export can be
+    imported again. Pass Ledger.snapshot() copies when running on a worker.
+    """
+    rows = heapq.merge(((row['date'], row['description'], row['amount'], "") for row in incomes),
+                       ((row['date'], row['description'], -row['amount'], row['category'])
+                        for row in expenses),
+                       key=lambda row: row[0])
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as statement:
+        writer = csv.writer(statement)
+        writer.writerow(["Date", "Description", "Amount", "Category"])
+        for date, description, pence, category in rows:
+            writer.writerow([date.strftime("%Y-%m-%d %H:%M:%S"), description,
+                             format_pence(pence), category])
+            count += 1
+    return count
+
+
+class StatementImporter:
+    """Reads a CSV or OFX bank statement on a worker thread.
+
+    Rows are validated and normalized on the worker, sorted by date, and put
+    on a queue in batches of (income_rows, expense_rows), each row being an
+    (pence, description, date, category) tuple ready for Ledger.extend().
+    Positive amounts become incomes and negative amounts become expenses.
+    The Tk thread calls poll() from root.after() to collect finished
+    batches, so no Tk or ledger code ever runs on the worker.
+    """
+    def __init__(self, path, categories, batch_size=5000):
+        self.path = path
+        self.categories = {category.lower(): category for category in categories}
+        self.batch_size = batch_size
+        self.messages = queue.Queue(maxsize=4)  # Bounded, so a fast parser waits for the UI
+        self.cancelled = threading.Event()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.file_size = os.path.getsize(path) or 1
+        self.bytes_read = 0
+        self.rows_imported = 0
+        self.rows_skipped = 0
+        self.date_format = None  # Last date format that worked
+
+    def start(self):
+        self.worker.start()
+
+    def cancel(self):
+        """Stop reading; batches already handed over are kept"""
+        self.cancelled.set()
+        # Unblock the worker if it is waiting for room in the queue
+        try:
+            while True:
+                self.messages.get_nowait()
+        except queue.Empty:
+            pass
+
+    def progress(self):
+        """Fraction of the file read so far"""
+        return min(1.0, self.bytes_read / self.file_size)
+
+    def poll(self, max_batches=2):
+        """Return finished messages without blocking.
+
+        Each message is ('batch', income_rows, expense_rows), ('done', None)
+        or ('error', message). At most max_batches batches are returned per
+        call so the UI stays responsive while applying them.
+        """
+        messages = []
+        batches = 0
+        while batches < max_batches:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            messages.append(message)
+            if message[0] == 'batch':
+                batches += 1
+        return messages
+
+    def _run(self):
+        try:
+            if self.path.lower().endswith((".ofx", ".qfx")):
+                rows = self._read_ofx()
+            else:
+                rows = self._read_csv()
+            incomes = []
+            expenses = []
+            for row in rows:
+                if self.cancelled.is_set():
+                    return
+                target = incomes if row[0] > 0 else expenses
+                target.append(row if row[0] > 0 else (-row[0],) + row[1:])
+                if len(incomes) + len(expenses) >= self.batch_size:
+                    self._send_batch(incomes, expenses)
+                    incomes = []
+                    expenses = []
+            self._send_batch(incomes, expenses)
+            self._send(('done', None))
+        except (OSError, ValueError, csv.Error) as e:
+            self._send(('error', str(e)))
+
+    def _send_batch(self, incomes, expenses):
+        if not incomes and not expenses:
+            return
+        # Sorted batches let Ledger.extend() append or merge instead of re-sorting
+        incomes.sort(key=lambda row: row[2])
+        expenses.sort(key=lambda row: row[2])
+        self.rows_imported += len(incomes) + len(expenses)
+        self._send(('batch', incomes, expenses))
+
+    def _send(self, message):
+        while not self.cancelled.is_set():
+            try:
+                self.messages.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _lines(self):
+        """Yield decoded lines while counting bytes for progress reporting"""
+        with open(self.path, "rb") as statement:
+            for line in statement:
+                self.bytes_read += len(line)
+                yield line.decode("utf-8", errors="replace").lstrip("\ufeff")
+
+    def _parse_date(self, text):
+        text = text.strip()
+        if self.date_format is not None:
+            try:
+                return datetime.strptime(text, self.date_format)
+            except ValueError:
+                pass
+        for date_format in DATE_FORMATS:
+            try:
+                date = datetime.strptime(text, date_format)
+            except ValueError:
+                continue
+            self.date_format = date_format
+            return date
+        return None
+
+    def _normalize(self, date, description, amount, category):
+        """Return a clean (signed pence, description, date, category) row, or None"""
+        if date is None or not amount:
+            self.rows_skipped += 1
+            return None
+        description = " ".join(description.split()) or "Imported transaction"
+        if amount < 0:
+            category = self.categories.get((category or "").strip().lower(), "Other")
+        else:
+            category = None  # Incomes have no category
+        return (amount, description, date, category)
+
+    def _read_csv(self):
+        reader = csv.reader(self._lines())
+        header = [name.strip().lower() for name in next(reader, [])]
+
+        def column(names):
+            for name in names:
+                if name in header:
+                    return header.index(name)
+            return None
+
+        date_col = column(DATE_COLUMNS)
+        description_col = column(DESCRIPTION_COLUMNS)
+        amount_col = column(AMOUNT_COLUMNS)
+        category_col = column(CATEGORY_COLUMNS)
+        debit_col = column(DEBIT_COLUMNS)
+        credit_col = column(CREDIT_COLUMNS)
+        if date_col is None or (amount_col is None and debit_col is None and credit_col is None):
+            raise ValueError("CSV needs a date column and an amount (or debit/credit) column")
+
+        def field(row, col):
+            return row[col] if col is not None and col < len(row) else ""
+
+        for row in reader:
+            if not row:
+                continue
+            try:
+                if amount_col is not None:
+                    amount = parse_amount(field(row, amount_col))
+                else:
+                    amount = (parse_amount(field(row, credit_col)) or 0) - \
+                             abs(parse_amount(field(row, debit_col)) or 0)
+            except ValueError:
+                self.rows_skipped += 1
+                continue
+            normalized = self._normalize(self._parse_date(field(row, date_col)),
+                                         field(row, description_col), amount,
+                                         field(row, category_col))
+            if normalized is not None:
+                yield normalized
+
+    def _read_ofx(self):
+        # OFX is SGML: most tags have no closing tag and the layout varies
+        # (one field per line or a whole statement on one line), so scan the
+        # tags in order and emit a row at each </STMTTRN>
+        transaction = None
+        for line in self._lines():
+            for tag, value in OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    transaction = {}
+                elif tag == "/STMTTRN" and transaction is not None:
+                    row = self._ofx_row(transaction)
+                    transaction = None
+                    if row is not None:
+                        yield row
+                elif transaction is not None:
+                    transaction[tag] = value.strip()
+
+    def _ofx_row(self, transaction):
+        try:
+            amount = parse_amount(transaction.get("TRNAMT", ""))
+        except ValueError:
+            self.rows_skipped += 1
+            return None
+        return self._normalize(parse_ofx_date(transaction.get("DTPOSTED", "")),
+                               transaction.get("NAME") or transaction.get("MEMO", ""),
+                               amount, None)
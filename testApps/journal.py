@@ -0,0 +1,353 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left
+
+from storage import KINDS, MemoryStorage
+
+
+MAGIC = b"FINJRNL1"
+VERSION = 1
+# magic, version, generation, category count, (reserved), income count,
+# expense count, income total, expense total, income max id, expense max id
+HEADER = struct.Struct("<8sIIIIQQqqqq")
+# op, kind, category code, id, timestamp, pence, previous pence,
+# text offset, text length, crc32 of everything before it
+RECORD = struct.Struct("<BBxxIqqqqQII")
+FIELDS = RECORD.size // 8  # The record viewed as int64s: 1 = id, 2 = timestamp
+CRC = struct.Struct("<I")
+ADD, UPDATE, DELETE, CATEGORY = 1, 2, 3, 4
+
+
+class JournalStorage(MemoryStorage):
+    """Saves transactions in an append-only journal of fixed-width records.
+
+    The file starts with a header and a compacted snapshot: one section of
+    ADD records per kind, sorted by timestamp. Every later add, edit and
+    delete is appended as a record of its own. Descriptions and category
+    names live in a separate string heap (path.N.strings) and records point
+    into it by offset, so records stay a fixed 56 bytes.
+
+    The file is read through mmap: the sorted sections are binary-searched
+    in place, so opening the journal only replays the records appended
+    since the last compaction, however long the history is. Each record has
+    a CRC and is only valid if its text is in the heap, so a torn write at
+    the end of the file is detected and cut off on the next start. Every
+    add, add_many, update and delete hands its bytes to the operating
+    system before returning (text first), so killing the process loses
+    nothing that was written; flush() also fsyncs, for power cuts.
+
+    compact() folds the appended records into a fresh snapshot. It writes a
+    new file and renames it over the old one, so a crash leaves one or the
+    other intact. close() compacts when the appended part has grown large.
+    """
+    COMPACT_MIN = 10000  # Appended records before close() compacts...
+    COMPACT_RATIO = 0.25  # ...and never less than this share of the snapshot
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()  # load() may run on a worker thread
+        if not os.path.exists(path):
+            self._write_snapshot({kind: [] for kind in KINDS}, 0)
+        self._open()
+
+    def is_empty(self):
+        return all(self.totals(kind)[1] == 0 for kind in KINDS)
+
+    def totals(self, kind):
+        amount, count = self.running_totals[kind]
+        return amount, count
+
+    def max_id(self, kind):
+        return self.max_ids[kind]
+
+    def load(self, kind, start=None, end=None):
+        with self.lock:
+            return self._load(kind, start, end)
+
+    def page_start(self, kind, end, count):
+        with self.lock:
+            _, size, _, timestamps = self.sections[kind]
+            last = size if end is None else bisect_left(timestamps, end)
+            first = max(0, last - count)
+            # The newest section rows, plus appended rows that may be newer still
+            newest = sorted(list(timestamps[first:last]) +
+                            [row[1] for row in self.tail[kind].values()
+                             if row is not None and (end is None or row[1] < end)])
+            if first == 0 and len(newest) <= count:
+                return None
+            return newest[-count]
+
+    def add(self, kind, row):
+        with self.lock:
+            self._append(ADD, kind, row, 0)
+            self._write_through()
+
+    def add_many(self, kind, rows):
+        with self.lock:
+            for row in rows:
+                self._append(ADD, kind, row, 0)
+            self._write_through()
+
+    def update(self, kind, row_id, amount, description, category):
+        with self.lock:
+            old_row = self._current(kind, row_id)
+            if old_row is not None:
+                self._append(UPDATE, kind, (row_id, old_row[1], amount, description, category),
+                             old_row[2])
+                self._write_through()
+
+    def delete(self, kind, row_id):
+        with self.lock:
+            old_row = self._current(kind, row_id)
+            if old_row is not None:
+                self._append(DELETE, kind, (row_id, old_row[1], 0, "", None), old_row[2])
+                self._write_through()
+
+    def _write_through(self):
+        """Hand buffered writes to the operating system (no fsync; see flush())"""
+        # Text first: a record is only valid once its text is in the file
+        self.strings.flush()
+        self.records.flush()
+
+    def flush(self):
+        with self.lock:
+            # Text first: a record is only valid once its text is on disk
+            for file in (self.strings, self.records):
+                file.flush()
+                os.fsync(file.fileno())
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            snapshot_rows = sum(self.sections[kind][1] for kind in KINDS)
+            if self.appended >= max(self.COMPACT_MIN, snapshot_rows * self.COMPACT_RATIO):
+                self.compact()
+            self._close_files()
+
+    def compact(self):
+        """Rewrite the journal as a sorted snapshot with nothing appended"""
+        with self.lock:
+            rows_by_kind = {kind: self._load(kind, None, None) for kind in KINDS}
+            self._close_files()
+            self._write_snapshot(rows_by_kind, self.generation + 1)
+            self._open()
+
+    def _strings_path(self, generation):
+        return f"{self.path}.{generation}.strings"
+
+    def _write_snapshot(self, rows_by_kind, generation):
+        """Write a compacted journal for generation and switch to it"""
+        heap = bytearray()
+        texts = {}  # text -> (offset, length); repeated descriptions are stored once
+
+        def text(value):
+            location = texts.get(value)
+            if location is None:
+                data = value.encode("utf-8")
+                location = texts[value] = (len(heap), len(data))
+                heap.extend(data)
+            return location
+
+        codes = {None: 0}
+        category_records = []
+        sections = []
+        totals = []
+        max_ids = []
+        for kind_index, kind in enumerate(KINDS):
+            section = bytearray()
+            for row_id, timestamp, pence, description, category in rows_by_kind[kind]:
+                code = codes.get(category)
+                if code is None:
+                    code = codes[category] = len(codes)
+                    category_records.append(self._pack(CATEGORY, 0, code, 0, 0, 0, 0, *text(category)))
+                section += self._pack(ADD, kind_index, code, row_id, timestamp, pence, 0,
+                                      *text(description))
+            sections.append(section)
+            totals.append(sum(row[2] for row in rows_by_kind[kind]))
+            max_ids.append(max((row[0] for row in rows_by_kind[kind]), default=0))
+
+        with open(self._strings_path(generation), "wb") as strings:
+            strings.write(heap)
+            strings.flush()
+            os.fsync(strings.fileno())
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as records:
+            records.write(HEADER.pack(MAGIC, VERSION, generation, len(category_records), 0,
+                                      len(rows_by_kind[KINDS[0]]), len(rows_by_kind[KINDS[1]]),
+                                      totals[0], totals[1], max_ids[0], max_ids[1]))
+            for record in category_records:
+                records.write(record)
+            for section in sections:
+                records.write(section)
+            records.flush()
+            os.fsync(records.fileno())
+        os.replace(temporary, self.path)
+        if generation and os.path.exists(self._strings_path(generation - 1)):
+            os.remove(self._strings_path(generation - 1))
+
+    def _open(self):
+        self.records = open(self.path, "r+b")
+        header = self.records.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a finance journal")
+        (_, version, self.generation, category_count, _, income_count, expense_count,
+         income_total, expense_total, income_max_id, expense_max_id) = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError(f"{self.path} is journal version {version}, expected {VERSION}")
+
+        strings_path = self._strings_path(self.generation)
+        self.strings = open(strings_path, "r+b" if os.path.exists(strings_path) else "w+b")
+        self.heap_size = os.path.getsize(strings_path)
+        self.record_map = mmap.mmap(self.records.fileno(), 0, access=mmap.ACCESS_READ)
+        self.string_map = (mmap.mmap(self.strings.fileno(), 0, access=mmap.ACCESS_READ)
+                           if self.heap_size else None)
+        self.texts = {}  # heap offset -> decoded text
+        self.text_offsets = {}  # text -> (offset, length) for text written this session
+
+        self.categories = [None]  # code -> name
+        self.category_codes = {None: 0}
+        offset = HEADER.size
+        for _ in range(category_count):
+            fields = RECORD.unpack_from(self.record_map, offset)
+            self.category_codes[self._text_at(fields[7], fields[8])] = len(self.categories)
+            self.categories.append(self._text_at(fields[7], fields[8]))
+            offset += RECORD.size
+
+        # Zero-copy views of each sorted section's ids and timestamps
+        self.views = []
+        self.sections = {}  # kind -> (offset, count, ids, timestamps)
+        for kind, count in zip(KINDS, (income_count, expense_count)):
+            view = memoryview(self.record_map)[offset:offset + count * RECORD.size].cast('q')
+            ids = view[1::FIELDS]
+            timestamps = view[2::FIELDS]
+            self.views.extend((ids, timestamps, view))
+            self.sections[kind] = (offset, count, ids, timestamps)
+            offset += count * RECORD.size
+        self.section_index = {}  # kind -> {id: index}, built the first time an id is looked up
+
+        self.running_totals = {KINDS[0]: [income_total, income_count],
+                               KINDS[1]: [expense_total, expense_count]}
+        self.max_ids = {KINDS[0]: income_max_id, KINDS[1]: expense_max_id}
+        self.tail = {kind: {} for kind in KINDS}  # kind -> {id: row, or None if deleted}
+        self.appended = 0
+
+        # Replay the records appended since the snapshot
+        size = len(self.record_map)
+        while offset + RECORD.size <= size:
+            fields = self._valid_record(offset)
+            if fields is None:
+                break
+            op, kind_index, code, row_id, timestamp, pence, previous, text_offset, text_length, _ = fields
+            self._apply(op, kind_index, code, row_id, timestamp, pence, previous,
+                        self._text_at(text_offset, text_length))
+            offset += RECORD.size
+        if offset != size:
+            print(f"Journal {self.path}: dropped {size - offset} bytes of incomplete writes")
+            self.records.truncate(offset)
+        self.records.seek(offset)
+        self.strings.seek(0, os.SEEK_END)
+
+    def _close_files(self):
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.record_map.close()
+        if self.string_map is not None:
+            self.string_map.close()
+        self.records.close()
+        self.strings.close()
+
+    def _pack(self, op, kind_index, code, row_id, timestamp, pence, previous, text_offset, text_length):
+        record = RECORD.pack(op, kind_index, code, row_id, timestamp, pence, previous,
+                             text_offset, text_length, 0)[:-CRC.size]
+        return record + CRC.pack(zlib.crc32(record))
+
+    def _valid_record(self, offset):
+        """Unpack the record at offset, or return None if it was not completely written"""
+        fields = RECORD.unpack_from(self.record_map, offset)
+        body = self.record_map[offset:offset + RECORD.size - CRC.size]
+        if zlib.crc32(body) != fields[-1] or fields[7] + fields[8] > self.heap_size:
+            return None
+        return fields
+
+    def _text_at(self, offset, length):
+        if not length:
+            return ""  # Empty text takes no heap space, so the next text shares its offset
+        text = self.texts.get(offset)
+        if text is None:
+            text = self.texts[offset] = self.string_map[offset:offset + length].decode("utf-8")
+        return text
+
+    def _apply(self, op, kind_index, code, row_id, timestamp, pence, previous, text):
+        """Bring the in-memory state up to date with one record"""
+        if op == CATEGORY:
+            self.category_codes[text] = code
+            self.categories.append(text)
+            return
+        kind = KINDS[kind_index]
+        totals = self.running_totals[kind]
+        if op == DELETE:
+            self.tail[kind][row_id] = None
+            totals[1] -= 1
+        else:
+            self.tail[kind][row_id] = (row_id, timestamp, pence, text, self.categories[code])
+            if op == ADD:
+                totals[1] += 1
+                self.max_ids[kind] = max(self.max_ids[kind], row_id)
+        totals[0] += pence - previous
+        self.appended += 1
+
+    def _append(self, op, kind, row, previous):
+        row_id, timestamp, pence, description, category = row
+        code = self.category_codes.get(category)
+        if code is None:
+            code = len(self.categories)
+            self._write_record(CATEGORY, 0, code, 0, 0, 0, 0, category)
+        self._write_record(op, KINDS.index(kind), code, row_id, timestamp, pence, previous, description)
+
+    def _write_record(self, op, kind_index, code, row_id, timestamp, pence, previous, text):
+        location = self.text_offsets.get(text)
+        if location is None:
+            data = text.encode("utf-8")
+            location = self.text_offsets[text] = (self.heap_size, len(data))
+            self.strings.write(data)
+            self.heap_size += len(data)
+        self.records.write(self._pack(op, kind_index, code, row_id, timestamp, pence, previous, *location))
+        self._apply(op, kind_index, code, row_id, timestamp, pence, previous, text)
+
+    def _section_row(self, kind, index):
+        offset = self.sections[kind][0] + index * RECORD.size
+        fields = RECORD.unpack_from(self.record_map, offset)
+        return (fields[3], fields[4], fields[5], self._text_at(fields[7], fields[8]),
+                self.categories[fields[2]])
+
+    def _current(self, kind, row_id):
+        """Return the saved row with this id, or None if there is none"""
+        tail = self.tail[kind]
+        if row_id in tail:
+            return tail[row_id]
+        index = self.section_index.get(kind)
+        if index is None:
+            _, count, ids, _ = self.sections[kind]
+            index = self.section_index[kind] = dict(zip(ids, range(count)))
+        position = index.get(row_id)
+        return None if position is None else self._section_row(kind, position)
+
+    def _load(self, kind, start, end):
+        _, count, ids, timestamps = self.sections[kind]
+        first = 0 if start is None else bisect_left(timestamps, start)
+        last = count if end is None else bisect_left(timestamps, end)
+        tail = self.tail[kind]
+        rows = [self._section_row(kind, index) for index in range(first, last)
+                if ids[index] not in tail]
+        # Rows added or changed since the snapshot (deleted ones are None)
+        appended = [row for row in tail.values()
+                    if row is not None and (start is None or row[1] >= start)
+                    and (end is None or row[1] < end)]
+        if appended:
+            rows.extend(appended)
+            rows.sort(key=lambda row: (row[1], row[0]))
+        return rows
@@ -0,0 +1,521 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import compress, groupby
+from operator import gt, itemgetter
+import sys
+
+
+# Timestamps are stored as whole wall-clock seconds since this naive epoch,
+# so the same datetime always maps to the same number (no timezone lookups)
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+
+def to_timestamp(date):
+    """Convert a naive datetime to whole seconds since EPOCH"""
+    delta = date - EPOCH
+    return delta.days * SECONDS_PER_DAY + delta.seconds
+
+
+def from_timestamp(timestamp):
+    """Convert seconds since EPOCH back to a naive datetime"""
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+class Ledger:
+    """Compact, column-oriented store for income or expense transactions.
+
+    Instead of one dict per transaction, every field lives in its own column:
+    amounts as whole pence in an array('q'), dates as int64 timestamps in an
+    array('q') and categories as small integer codes pointing into a shared
+    name table. Amounts are always ints, so every sum is exact.
+    Descriptions are interned so repeated text ("Groceries", "Rent", ...) is
+    only stored once.
+
+    Rows are always kept sorted by date, so any date window is a contiguous
+    slice that can be found with a binary search. Every row also gets a
+    stable id: edits and deletes are made by id, found through an id -> slot
+    dict, so they do not depend on where (or whether) a view shows the row.
+
+    Deleting a row only marks its slot dead (a tombstone) and zeroes its
+    amount, so sums stay correct without shifting the columns. Dead slots are
+    squeezed out by compact(), which runs by itself once they make up a
+    quarter of the columns. Views address rows by position among the live
+    rows; slot(position) maps one to the other through a Fenwick tree of live
+    flags, and is a no-op while there are no tombstones.
+
+    Each category also has a secondary index: the (timestamp, id) pairs of
+    its live rows in date order plus a running total, kept up to date on
+    every insert, update and delete. rows_in_category() answers a category
+    and date range query with two binary searches, and category_totals()
+    reads the running totals instead of scanning the rows.
+
+    Views can subscribe() to hear about changes: callbacks are called as
+    callback(event, index) with event one of 'insert', 'update' or 'delete'
+    and the row's position, or ('reset', None) after bulk changes.
+    """
+    COMPACT_MIN = 1024  # Never compact for fewer dead slots than this
+
+    def __init__(self):
+        self.ids = array('q')
+        self.amounts = array('q')  # Pence
+        self.timestamps = array('q')
+        self.category_codes = array('I')
+        self.descriptions = []
+        self.category_names = []  # code -> category name
+        self.category_lookup = {}  # category name -> code
+        self.category_rows = []  # code -> (timestamps, ids) arrays of its live rows, by date
+        self.category_sums = []  # code -> total pence of its live rows
+        self.slots = {}  # row id -> slot, for live rows only
+        self.live = bytearray()  # 1 per live slot, 0 per tombstone
+        self.live_tree = [0]  # Fenwick tree over live (1-based)
+        self.dead = 0
+        self.next_id = 1
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.ids) - self.dead
+
+    def __getitem__(self, index):
+        return self.row(index)
+
+    def __iter__(self):
+        for slot in range(len(self.ids)):
+            if self.live[slot]:
+                yield self._row(slot)
+
+    def subscribe(self, callback):
+        """Call callback(event, index) after every change to the rows"""
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        self.listeners.remove(callback)
+
+    def _notify(self, event, index=None):
+        for callback in self.listeners:
+            callback(event, index)
+
+    def category_code(self, category):
+        """Return the code for a category name, adding it if it is new"""
+        code = self.category_lookup.get(category)
+        if code is None:
+            code = len(self.category_names)
+            self.category_names.append(category)
+            self.category_lookup[category] = code
+            self.category_rows.append((array('q'), array('q')))
+            self.category_sums.append(0)
+        return code
+
+    def _index_add(self, code, timestamp, row_id, amount):
+        timestamps, ids = self.category_rows[code]
+        # Among rows with the same date, keep id order (as the columns do)
+        position = bisect_left(timestamps, timestamp)
+        while position < len(ids) and timestamps[position] == timestamp and ids[position] < row_id:
+            position += 1
+        timestamps.insert(position, timestamp)
+        ids.insert(position, row_id)
+        self.category_sums[code] += amount
+
+    def _index_remove(self, code, timestamp, row_id, amount):
+        timestamps, ids = self.category_rows[code]
+        position = bisect_left(timestamps, timestamp)
+        while ids[position] != row_id:
+            position += 1
+        del timestamps[position]
+        del ids[position]
+        self.category_sums[code] -= amount
+
+    def _build_category_index(self):
+        # A stable sort of the live slots by category code keeps each
+        # category's slots in date order; the columns are then gathered with
+        # map() so there is no per-row Python code
+        codes = self.category_codes
+        slots = range(len(self.ids))
+        if self.dead:
+            slots = compress(slots, self.live)
+        self.category_rows = [(array('q'), array('q')) for _ in self.category_names]
+        self.category_sums = [0] * len(self.category_names)
+        for code, run in groupby(sorted(slots, key=codes.__getitem__), key=codes.__getitem__):
+            run = list(run)
+            self.category_rows[code] = (array('q', map(self.timestamps.__getitem__, run)),
+                                        array('q', map(self.ids.__getitem__, run)))
+            self.category_sums[code] = sum(map(self.amounts.__getitem__, run))
+
+    def slot(self, position):
+        """Return the column slot holding the live row at position"""
+        if not self.dead:
+            return position
+        # Walk down the Fenwick tree to the slot with position + 1 live rows up to it
+        tree = self.live_tree
+        size = len(tree) - 1
+        slot = 0
+        remaining = position + 1
+        step = 1 << size.bit_length()
+        while step:
+            following = slot + step
+            if following <= size and tree[following] < remaining:
+                slot = following
+                remaining -= tree[following]
+            step >>= 1
+        return slot
+
+    def position(self, slot):
+        """Return the position of a live slot among the live rows"""
+        if not self.dead:
+            return slot
+        tree = self.live_tree
+        position = 0
+        while slot > 0:
+            position += tree[slot]
+            slot -= slot & -slot
+        return position
+
+    def id_at(self, position):
+        """Return the id of the live row at position"""
+        return self.ids[self.slot(position)]
+
+    def row(self, index):
+        """Return the live row at position index as a dict (the format the UI works with)"""
+        return self._row(self.slot(index))
+
+    def get(self, row_id):
+        """Return the row with this id as a dict"""
+        return self._row(self.slots[row_id])
+
+    def _row(self, slot):
+        return {
+            "id": self.ids[slot],
+            "description": self.descriptions[slot],
+            "category": self.category_names[self.category_codes[slot]],
+            "amount": self.amounts[slot],
+            "date": from_timestamp(self.timestamps[slot])
+        }
+
+    def stored_row(self, row_id):
+        """Return a row as an (id, timestamp, amount, description, category) tuple"""
+        slot = self.slots[row_id]
+        return (row_id, self.timestamps[slot], self.amounts[slot],
+                self.descriptions[slot], self.category_names[self.category_codes[slot]])
+
+    def add(self, amount, description, date, category=None):
+        """Add a transaction (amount in pence) in date order and return its id"""
+        row_id = self.next_id
+        self.next_id += 1
+        timestamp = to_timestamp(date)
+        self._insert(bisect_right(self.timestamps, timestamp),
+                     (row_id, timestamp, amount, description, category))
+        return row_id
+
+    def restore(self, stored_row):
+        """Put a deleted (id, timestamp, amount, description, category) row back"""
+        row_id, timestamp = stored_row[0], stored_row[1]
+        # Among rows with the same date, keep the original (id) order
+        slot = bisect_left(self.timestamps, timestamp)
+        while slot < len(self.ids) and self.timestamps[slot] == timestamp and self.ids[slot] < row_id:
+            slot += 1
+        self._insert(slot, stored_row)
+
+    def _check(self, *numbers):
+        """Raise ValueError unless every number fits an array('q') column.
+
+        Called before any column changes, so a bad row can never leave the
+        columns with different lengths.
+        """
+        try:
+            array('q', numbers)
+        except (OverflowError, TypeError):
+            raise ValueError(f"Does not fit a 64-bit column: {numbers!r}")
+
+    def _insert(self, slot, stored_row):
+        row_id, timestamp, amount, description, category = stored_row
+        self._check(row_id, timestamp, amount)
+        description = sys.intern(description)
+        code = self.category_code(category)
+        if slot == len(self.ids):
+            # Common case: newest transaction goes on the end
+            self.ids.append(row_id)
+            self.amounts.append(amount)
+            self.timestamps.append(timestamp)
+            self.category_codes.append(code)
+            self.descriptions.append(description)
+            self.live.append(1)
+            self.slots[row_id] = slot
+            self._grow_tree()
+        else:
+            # Every later slot moves, so this is O(n) anyway: drop the
+            # tombstones first so slots and positions line up again
+            if self.dead:
+                before = self.position(slot)
+                self.compact()
+                slot = before
+            self.ids.insert(slot, row_id)
+            self.amounts.insert(slot, amount)
+            self.timestamps.insert(slot, timestamp)
+            self.category_codes.insert(slot, code)
+            self.descriptions.insert(slot, description)
+            self.live.insert(slot, 1)
+            for moved in range(slot, len(self.ids)):
+                self.slots[self.ids[moved]] = moved
+            self._build_tree()
+        self._index_add(self.category_codes[slot], timestamp, row_id, amount)
+        self._notify('insert', self.position(slot))
+
+    def extend(self, rows):
+        """Add many (amount, description, date, category) tuples at once.
+
+        Returns the new rows as (id, timestamp, amount, description, category)
+        tuples, the format storage backends read and write.
+        """
+        first_id = self.next_id
+        stored_rows = [(row_id, to_timestamp(date), amount, description, category)
+                       for row_id, (amount, description, date, category)
+                       in enumerate(rows, first_id)]
+        self.load_rows(stored_rows)
+        return stored_rows
+
+    def load_rows(self, rows):
+        """Add (id, timestamp, amount, description, category) tuples, keeping their ids"""
+        rows = list(rows)
+        self.load_columns(*(list(map(itemgetter(column), rows)) for column in range(5)))
+
+    def load_columns(self, ids, timestamps, amounts, descriptions, categories):
+        """Add rows given as five parallel sequences, keeping their ids.
+
+        Any tombstones are compacted away first (a pass over every row).
+        After that the work is proportional to the new rows plus the loaded
+        rows dated after the first of them, the tail they are merged into.
+        The columns are copied with slice assignment and map(), but some
+        Python still runs per new row: sorting them if they arrive out of
+        order, merging the tail, and extending the Fenwick tree and the
+        category index.
+        """
+        self.compact()
+        old_size = len(self.amounts)
+        if not ids:
+            self._notify('reset')
+            return
+        codes = {category: self.category_code(category) for category in set(categories)}
+        self.next_id = max(self.next_id, max(ids) + 1)
+        if any(map(gt, timestamps, timestamps[1:])):
+            # Only the new rows need sorting (stably, so ties keep their order)
+            order = sorted(range(len(ids)), key=timestamps.__getitem__)
+            ids, timestamps, amounts, descriptions, categories = (
+                [column[i] for i in order] for column in (ids, timestamps, amounts, descriptions, categories))
+        new_codes = array('I', map(codes.__getitem__, categories))
+        if old_size and timestamps[-1] < self.timestamps[0]:
+            # A page of older history: put it in front instead of re-sorting everything
+            self._prepend(ids, timestamps, amounts, descriptions, new_codes)
+        else:
+            self._merge(ids, timestamps, amounts, descriptions, new_codes)
+        self._notify('reset')
+
+    def _merge(self, ids, timestamps, amounts, descriptions, codes):
+        """Merge sorted rows into the columns (no tombstones).
+
+        Old rows dated up to the first new row stay where they are; only the
+        old rows after it are merged with the new ones. That tail is empty
+        when the rows are newer than everything (a plain append) and short
+        for a statement that overlaps the last few days. As in _prepend(),
+        the Fenwick tree just grows and each category's index only has its
+        tail replaced.
+        """
+        count = len(ids)
+        old_size = len(self.ids)
+        first = bisect_right(self.timestamps, timestamps[0])
+        tail_ids = self.ids[first:]
+        tail_ids.extend(ids)
+        tail_amounts = self.amounts[first:]
+        tail_amounts.extend(amounts)
+        tail_timestamps = self.timestamps[first:]
+        tail_timestamps.extend(timestamps)
+        tail_codes = self.category_codes[first:]
+        tail_codes.extend(codes)
+        tail_descriptions = self.descriptions[first:]
+        tail_descriptions.extend(map(sys.intern, descriptions))
+        # Old and new rows are two sorted runs, which sorted() merges in
+        # linear time; it is stable, so old rows stay first among ties
+        order = sorted(range(len(tail_ids)), key=tail_timestamps.__getitem__)
+        self.ids[first:] = array('q', map(tail_ids.__getitem__, order))
+        self.amounts[first:] = array('q', map(tail_amounts.__getitem__, order))
+        self.timestamps[first:] = array('q', map(tail_timestamps.__getitem__, order))
+        self.category_codes[first:] = array('I', map(tail_codes.__getitem__, order))
+        self.descriptions[first:] = map(tail_descriptions.__getitem__, order)
+        self.live.extend(b"\x01" * count)
+        self.slots.update(zip(self.ids[first:], range(first, len(self.ids))))
+        self.live_tree.extend(index & -index for index in range(old_size + 1, old_size + count + 1))
+
+        runs = {code: list(run) for code, run in groupby(
+            sorted(range(first, len(self.ids)), key=self.category_codes.__getitem__),
+            key=self.category_codes.__getitem__)}
+        for code, (category_timestamps, category_ids) in enumerate(self.category_rows):
+            run = runs.get(code, ())
+            cut = bisect_right(category_timestamps, timestamps[0])
+            if run or cut < len(category_ids):
+                category_timestamps[cut:] = array('q', map(self.timestamps.__getitem__, run))
+                category_ids[cut:] = array('q', map(self.ids.__getitem__, run))
+        for code, run in groupby(sorted(range(count), key=codes.__getitem__), key=codes.__getitem__):
+            self.category_sums[code] += sum(map(amounts.__getitem__, run))
+
+    def _prepend(self, ids, timestamps, amounts, descriptions, codes):
+        """Insert sorted rows that all come before the current ones (no tombstones).
+
+        The columns and each category's index are extended at the front with
+        slice assignment, every slot shifts by the same amount so the id ->
+        slot dict is rebuilt in one pass, and the Fenwick tree of an all-live
+        ledger only depends on its size, so it just grows.
+        """
+        count = len(ids)
+        old_size = len(self.ids)
+        self.ids[:0] = array('q', ids)
+        self.amounts[:0] = array('q', amounts)
+        self.timestamps[:0] = array('q', timestamps)
+        self.category_codes[:0] = codes
+        self.descriptions[:0] = map(sys.intern, descriptions)
+        self.live[:0] = b"\x01" * count
+        self.slots = dict(zip(self.ids, range(len(self.ids))))
+        self.live_tree.extend(index & -index for index in range(old_size + 1, old_size + count + 1))
+        for code, run in groupby(sorted(range(count), key=codes.__getitem__), key=codes.__getitem__):
+            run = list(run)
+            category_timestamps, category_ids = self.category_rows[code]
+            category_timestamps[:0] = array('q', map(timestamps.__getitem__, run))
+            category_ids[:0] = array('q', map(ids.__getitem__, run))
+            self.category_sums[code] += sum(map(amounts.__getitem__, run))
+
+    def _keep(self, slots):
+        """Rebuild every column from the given slots, in that order"""
+        self.ids = array('q', [self.ids[i] for i in slots])
+        self.amounts = array('q', [self.amounts[i] for i in slots])
+        self.timestamps = array('q', [self.timestamps[i] for i in slots])
+        self.category_codes = array('I', [self.category_codes[i] for i in slots])
+        self.descriptions = [self.descriptions[i] for i in slots]
+        self.live = bytearray(b"\x01" * len(slots))
+        self.dead = 0
+        self.slots = {row_id: slot for slot, row_id in enumerate(self.ids)}
+        self._build_tree()
+        self._build_category_index()
+
+    def snapshot(self):
+        """Return a copy of the rows that later changes will not touch.
+
+        Copying the columns is fast (no per-row Python work), so the copy
+        can be taken on the Tk thread and handed to a worker.
+        """
+        copy = Ledger()
+        copy.ids = self.ids[:]
+        copy.amounts = self.amounts[:]
+        copy.timestamps = self.timestamps[:]
+        copy.category_codes = self.category_codes[:]
+        copy.descriptions = self.descriptions[:]
+        copy.category_names = self.category_names[:]
+        copy.category_lookup = dict(self.category_lookup)
+        copy.category_rows = [(timestamps[:], ids[:]) for timestamps, ids in self.category_rows]
+        copy.category_sums = self.category_sums[:]
+        copy.slots = dict(self.slots)
+        copy.live = bytearray(self.live)
+        copy.live_tree = self.live_tree[:]
+        copy.dead = self.dead
+        copy.next_id = self.next_id
+        return copy
+
+    def compact(self):
+        """Squeeze out the tombstones left by delete() (positions do not change)"""
+        if self.dead:
+            self._keep([slot for slot in range(len(self.ids)) if self.live[slot]])
+
+    def update(self, row_id, amount, description, category=None):
+        """Replace the amount, description and category of a transaction.
+
+        The original date is kept. Returns the old amount.
+        """
+        self._check(amount)
+        description = sys.intern(description)
+        slot = self.slots[row_id]
+        old_amount = self.amounts[slot]
+        old_code = self.category_codes[slot]
+        code = self.category_code(category)
+        if code == old_code:
+            self.category_sums[code] += amount - old_amount
+        else:
+            self._index_remove(old_code, self.timestamps[slot], row_id, old_amount)
+            self._index_add(code, self.timestamps[slot], row_id, amount)
+        self.amounts[slot] = amount
+        self.descriptions[slot] = description
+        self.category_codes[slot] = code
+        self._notify('update', self.position(slot))
+        return old_amount
+
+    def delete(self, row_id):
+        """Remove a transaction and return it as a dict"""
+        slot = self.slots.pop(row_id)
+        position = self.position(slot)
+        removed = self._row(slot)
+        self._index_remove(self.category_codes[slot], self.timestamps[slot], row_id, self.amounts[slot])
+        # Leave a tombstone: a zero amount keeps every sum right, and the
+        # timestamp stays so the columns remain sorted
+        self.amounts[slot] = 0
+        self.live[slot] = 0
+        self.dead += 1
+        self._tree_add(slot, -1)
+        if self.dead >= max(self.COMPACT_MIN, len(self.ids) // 4):
+            self.compact()
+        self._notify('delete', position)
+        return removed
+
+    def remove_ids(self, row_ids):
+        """Remove every row whose id is in row_ids (a set) in one pass"""
+        self._keep([slot for slot, row_id in enumerate(self.ids)
+                    if self.live[slot] and row_id not in row_ids])
+        self._notify('reset')
+
+    def clear(self):
+        """Remove every transaction (category codes and the id counter are kept)"""
+        self._keep([])
+        self._notify('reset')
+
+    def _build_tree(self):
+        tree = [0]
+        tree.extend(self.live)
+        size = len(tree) - 1
+        for index in range(1, size + 1):
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self.live_tree = tree
+
+    def _grow_tree(self):
+        """Add the Fenwick node for a live slot just appended to the columns"""
+        index = len(self.live_tree)
+        # The new node covers slots (index - lowbit, index]: itself plus earlier ones
+        self.live_tree.append(1 + self.position(index - 1) - self.position(index - (index & -index))
+                              if self.dead else index & -index)
+
+    def _tree_add(self, slot, delta):
+        tree = self.live_tree
+        index = slot + 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def total(self):
+        """Sum of all amounts, in pence"""
+        return sum(self.amounts)
+
+    def category_totals(self):
+        """Return {category name: total pence}, in first-seen category order"""
+        return {self.category_names[code]: total
+                for code, total in enumerate(self.category_sums) if total}
+
+    def rows_in_category(self, category, start=None, end=None):
+        """Return the ids of rows in category dated in [start, end), oldest first.
+
+        start and end are datetimes (None for no limit). The category index
+        is binary-searched, so this costs O(log n + k) for k matching rows.
+        """
+        code = self.category_lookup.get(category)
+        if code is None:
+            return []
+        timestamps, ids = self.category_rows[code]
+        first = 0 if start is None else bisect_left(timestamps, to_timestamp(start))
+        last = len(ids) if end is None else bisect_left(timestamps, to_timestamp(end))
+        return ids[first:last].tolist()
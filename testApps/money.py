@@ -0,0 +1,46 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+# Money is held as whole pence in ints everywhere (ledger columns, running
+# totals, chart buckets, the database), so adding and subtracting is exact
+# and totals never drift. Pounds only appear when text is parsed or shown.
+PENCE_PER_POUND = 100
+ONE_PENNY = Decimal("0.01")
+MAX_PENCE = 2 ** 63 - 1  # Ledger columns and the database hold signed 64-bit ints
+
+
+def to_pence(value):
+    """Convert pounds (int, float, Decimal or text such as '12.50') to whole pence.
+
+    Half pennies round away from zero. Raises ValueError for anything that
+    is not a number or does not fit in a 64-bit column.
+    """
+    if isinstance(value, float):
+        value = repr(value)  # Shortest round-tripping text, so 0.1 stays 0.1
+    try:
+        pounds = Decimal(value).quantize(ONE_PENNY, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Not an amount of money: {value!r}")
+    if not pounds.is_finite():
+        raise ValueError(f"Not an amount of money: {value!r}")
+    pence = int(pounds * PENCE_PER_POUND)
+    if abs(pence) > MAX_PENCE:
+        raise ValueError(f"Amount too large: {value!r}")
+    return pence
+
+
+def parse_money(text):
+    """Parse what a user typed ('12.5', '£1,234.50') into pence"""
+    return to_pence(text.strip().replace("£", "").replace(",", ""))
+
+
+def format_pence(pence):
+    """Return pence as plain pounds text, e.g. 123450 -> '1234.50'"""
+    sign = "-" if pence < 0 else ""
+    pounds, pence = divmod(abs(pence), PENCE_PER_POUND)
+    return f"{sign}{pounds}.{pence:02d}"
+
+
+def format_money(pence):
+    """Return pence for display, e.g. 123450 -> '£1234.50'"""
+    return f"£{format_pence(pence)}"
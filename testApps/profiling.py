@@ -0,0 +1,217 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tkinter as tk
+import tracemalloc
+from collections import deque
+from functools import wraps
+
+# tk_watchdog.py sits at the top of the repo, next to testApps/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tk_watchdog
+
+
+# FinanceMain methods timed by Profiler.instrument(): the UI callbacks and
+# the data paths they call
+UI_CALLBACKS = (
+    "show_income_frame", "show_expenses_frame", "show_charts_frame",
+    "update_chart_display", "draw_bar_chart", "refresh_charts_frame",
+    "refresh_income_list", "refresh_expense_list",
+    "add_income_from_form", "update_income_from_form", "delete_income_from_list",
+    "add_expense_from_form", "update_expense_from_form", "delete_expense_from_list",
+    "search_incomes", "search_expenses",
+)
+DATA_PATHS = ("get_chart_data", "add_income", "add_expense")
+
+
+def percentile(ordered, fraction):
+    """Return the value fraction of the way through a sorted list"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Profiler:
+    """Timers and counters for instrumented methods, plus Tk event-loop lag.
+
+    instrument() replaces methods on an object with wrappers that time each
+    call, keeping the last SAMPLES durations per method. A call's own time
+    (its total minus the instrumented calls it made) is kept separately, so
+    a slow update_chart_display can be told apart from a slow
+    get_chart_data inside it: what is left in a UI callback's own time is
+    widget and Tcl work.
+
+    Event-loop lag is read from the root's tk_watchdog.Watchdog: how late
+    its heartbeat runs compared with when it was due. A high lag means the
+    Tk thread was busy (or frozen).
+
+    start_capture("cprofile") or start_capture("tracemalloc") records a
+    full profile or allocation snapshot until stop_capture().
+    """
+    SAMPLES = 500  # Recent durations kept per method
+
+    def __init__(self):
+        self.enabled = True
+        self.totals = {}  # name -> deque of recent call durations (ms)
+        self.own = {}  # name -> deque of recent durations excluding instrumented callees (ms)
+        self.counts = {}  # name -> calls since start
+        self.stack = []  # Child time accumulated by each instrumented call in progress
+        self.watchdog = None  # The root's Watchdog once watch_event_loop() runs
+        self.owns_watchdog = False  # Whether watch_event_loop() attached it
+        self.capture = None  # "cprofile" or "tracemalloc" while capturing
+        self.profile = None
+
+    def instrument(self, target, names):
+        """Time every call of target's methods called names (on this instance only)"""
+        for name in names:
+            setattr(target, name, self._wrap(name, getattr(target, name)))
+
+    def _wrap(self, name, method):
+        totals = self.totals.setdefault(name, deque(maxlen=self.SAMPLES))
+        own = self.own.setdefault(name, deque(maxlen=self.SAMPLES))
+        self.counts.setdefault(name, 0)
+        stack = self.stack
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return method(*args, **kwargs)
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                totals.append(elapsed)
+                own.append(elapsed - children)
+                self.counts[name] += 1
+        return timed
+
+    def watch_event_loop(self, root):
+        """Read event-loop lag from root's watchdog, attaching one if it has none.
+
+        Under python tk_watchdog.py the root already has one, so there is
+        still only one heartbeat.
+        """
+        self.watchdog = getattr(root, "watchdog", None)
+        self.owns_watchdog = self.watchdog is None
+        if self.owns_watchdog:
+            self.watchdog = tk_watchdog.attach(root)
+
+    def stop_watching(self):
+        if self.owns_watchdog:
+            self.watchdog.stop()  # One attached by tk_watchdog.py stops (and exports) on <Destroy>
+        self.owns_watchdog = False
+
+    def stats(self, name):
+        """Return {'count', 'p50', 'p90', 'p99', 'max', 'own_p50'} in ms, or None if never called"""
+        samples = sorted(self.totals.get(name, ()))
+        if not samples:
+            return None
+        own = sorted(self.own[name])
+        return {'count': self.counts[name], 'p50': percentile(samples, 0.5),
+                'p90': percentile(samples, 0.9), 'p99': percentile(samples, 0.99),
+                'max': samples[-1], 'own_p50': percentile(own, 0.5)}
+
+    def lag_stats(self):
+        """Return {'p50', 'p99', 'max'} event-loop lag in ms, or None before the first heartbeat.
+
+        p50 and p99 are the watchdog's histogram bucket bounds.
+        """
+        if self.watchdog is None or not self.watchdog.beats:
+            return None
+        return {'p50': self.watchdog.percentile(0.5), 'p99': self.watchdog.percentile(0.99),
+                'max': self.watchdog.worst_ms}
+
+    def report(self):
+        """Return the timings as a text table, slowest p90 first"""
+        lines = [f"{'callback':26} {'calls':>6} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7} {'own':>7}"]
+        rows = [(name, self.stats(name)) for name in self.totals]
+        rows = sorted((row for row in rows if row[1] is not None), key=lambda row: -row[1]['p90'])
+        for name, stats in rows:
+            lines.append(f"{name[:26]:26} {stats['count']:6d} {stats['p50']:7.1f} {stats['p90']:7.1f} "
+                         f"{stats['p99']:7.1f} {stats['max']:7.1f} {stats['own_p50']:7.1f}")
+        lag = self.lag_stats()
+        if lag is not None:
+            lines.append(f"event loop lag: p50 <{lag['p50']:g}  p99 <{lag['p99']:g}  max {lag['max']:.1f} ms")
+        return "\n".join(lines)
+
+    def start_capture(self, mode="cprofile"):
+        """Start recording a cProfile profile or tracemalloc allocations"""
+        if self.capture is not None:
+            return
+        if mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif mode == "tracemalloc":
+            tracemalloc.start()
+        else:
+            raise ValueError(f"Unknown capture mode: {mode!r}")
+        self.capture = mode
+
+    def stop_capture(self, path=None, limit=25):
+        """Stop capturing and return a text summary of the top entries.
+
+        path also saves the raw profile (for pstats or snakeviz) or the
+        allocation snapshot (for tracemalloc.Snapshot.load()).
+        """
+        mode = self.capture
+        if mode is None:
+            return ""
+        self.capture = None
+        output = io.StringIO()
+        if mode == "cprofile":
+            self.profile.disable()
+            if path is not None:
+                self.profile.dump_stats(path)
+            pstats.Stats(self.profile, stream=output).sort_stats("cumulative").print_stats(limit)
+            self.profile = None
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            if path is not None:
+                snapshot.dump(path)
+            for stat in snapshot.statistics("lineno")[:limit]:
+                print(stat, file=output)
+        return output.getvalue()
+
+
+class PerformanceHUD:
+    """Overlay in the corner of the window showing the Profiler's timings.
+
+    toggle() shows or hides it (FinanceMain binds it to F12). While shown it
+    refreshes twice a second; hidden it costs nothing.
+    """
+    REFRESH_MS = 500
+
+    def __init__(self, root, profiler):
+        self.root = root
+        self.profiler = profiler
+        self.label = tk.Label(root, text="", font=("Courier", 9), justify='left', anchor='nw',
+                              bg="#263238", fg="#ECEFF1", padx=6, pady=4)
+        self.refresh_job = None
+
+    @property
+    def shown(self):
+        return self.refresh_job is not None
+
+    def toggle(self, event=None):
+        if self.shown:
+            self.root.after_cancel(self.refresh_job)
+            self.refresh_job = None
+            self.label.place_forget()
+        else:
+            self.label.place(relx=1.0, rely=0.0, anchor='ne')
+            self.label.lift()
+            self._refresh()
+
+    def _refresh(self):
+        text = self.profiler.report()
+        if self.profiler.capture is not None:
+            text += f"\ncapturing {self.profiler.capture}..."
+        self.label.config(text=text)
+        self.refresh_job = self.root.after(self.REFRESH_MS, self._refresh)
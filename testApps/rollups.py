@@ -0,0 +1,252 @@
+from ledger import SECONDS_PER_DAY, from_timestamp, to_timestamp
+
+try:
+    import numpy as np
+except ImportError:  # Optional: compute_totals() falls back to pure Python
+    np = None
+
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+# EPOCH (1970-01-01) was a Thursday, so Mondays are 3 days further along
+WEEK_SHIFT = 3 * SECONDS_PER_DAY
+
+
+def hour_start(timestamp):
+    """Timestamp of the start of the same hour"""
+    return timestamp - timestamp % SECONDS_PER_HOUR
+
+
+def day_start(timestamp):
+    """Timestamp of midnight on the same day"""
+    return timestamp - timestamp % SECONDS_PER_DAY
+
+
+def week_start(timestamp):
+    """Timestamp of midnight on the Monday of the same week"""
+    return timestamp - (timestamp + WEEK_SHIFT) % SECONDS_PER_WEEK
+
+
+def month_start(timestamp):
+    """Timestamp of midnight on the first day of the same month"""
+    date = from_timestamp(timestamp)
+    return to_timestamp(date.replace(day=1, hour=0, minute=0, second=0))
+
+
+def quarter_start(timestamp):
+    """Timestamp of midnight on the first day of the same quarter"""
+    date = from_timestamp(timestamp)
+    return to_timestamp(date.replace(month=date.month - (date.month - 1) % 3,
+                                     day=1, hour=0, minute=0, second=0))
+
+
+def year_start(timestamp):
+    """Timestamp of midnight on January 1st of the same year"""
+    date = from_timestamp(timestamp)
+    return to_timestamp(date.replace(month=1, day=1, hour=0, minute=0, second=0))
+
+
+# Each level of the pyramid is totalled from the finer level it lists here,
+# so only hours are built from rows and every other level from buckets
+ROLLUP_LEVELS = (
+    ("Day", "Hour", day_start),
+    ("Week", "Day", week_start),
+    ("Month", "Day", month_start),
+    ("Quarter", "Month", quarter_start),
+    ("Year", "Month", year_start),
+)
+BUCKET_STARTS = {"Hour": hour_start, "Day": day_start, "Week": week_start,
+                 "Month": month_start, "Quarter": quarter_start, "Year": year_start}
+
+
+def compute_totals(income_timestamps, income_amounts, expense_timestamps, expense_amounts):
+    """Total timestamp/amount columns into every bucket of every period type.
+
+    Returns {(period_type, bucket start): [income, expenses]}. It only takes
+    plain arrays, so it can run in a worker thread or process. Uses NumPy
+    when it is installed and pure Python otherwise; both give the same
+    result (see check_backends()).
+    """
+    if np is not None:
+        return numpy_totals(income_timestamps, income_amounts, expense_timestamps, expense_amounts)
+    return python_totals(income_timestamps, income_amounts, expense_timestamps, expense_amounts)
+
+
+def python_totals(income_timestamps, income_amounts, expense_timestamps, expense_amounts):
+    """compute_totals() in pure Python"""
+    # Roll rows up into hours first, then each coarser level from a finer
+    # one, so the per-row work is just integer arithmetic and one dict update
+    hours = {}
+    for column, (timestamps, amounts) in enumerate(((income_timestamps, income_amounts),
+                                                    (expense_timestamps, expense_amounts))):
+        for timestamp, amount in zip(timestamps, amounts):
+            hour = timestamp - timestamp % SECONDS_PER_HOUR
+            bucket = hours.get(hour)
+            if bucket is None:
+                bucket = hours[hour] = [0, 0]
+            bucket[column] += amount
+
+    levels = {"Hour": hours}
+    for period_type, source, start_of in ROLLUP_LEVELS:
+        level = levels[period_type] = {}
+        for start, (income, expense) in levels[source].items():
+            key = start_of(start)
+            bucket = level.get(key)
+            if bucket is None:
+                bucket = level[key] = [0, 0]
+            bucket[0] += income
+            bucket[1] += expense
+    return {(period_type, start): bucket
+            for period_type, level in levels.items() for start, bucket in level.items()}
+
+
+def numpy_totals(income_timestamps, income_amounts, expense_timestamps, expense_amounts):
+    """compute_totals() with NumPy.
+
+    Each column is viewed as int64 seconds (datetime64[s] for the month
+    arithmetic). Rows are sorted by timestamp, so every period's bucket
+    starts are sorted too: each bucket is a run of equal starts, found with
+    np.flatnonzero(np.diff()) and summed in one np.add.reduceat() call.
+    Sums stay int64, so they are exactly the pure Python ones.
+    """
+    totals = {}
+    for column, (timestamps, amounts) in enumerate(((income_timestamps, income_amounts),
+                                                    (expense_timestamps, expense_amounts))):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=np.int64)
+        if not len(timestamps):
+            continue
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, amounts = timestamps[order], amounts[order]
+        hours = timestamps - timestamps % SECONDS_PER_HOUR
+        days = timestamps - timestamps % SECONDS_PER_DAY
+        weeks = days - (days + WEEK_SHIFT) % SECONDS_PER_WEEK
+        month_numbers = days.view('datetime64[s]').astype('datetime64[M]').view(np.int64)
+        months = month_numbers.view('datetime64[M]').astype('datetime64[s]').view(np.int64)
+        quarters = (month_numbers - month_numbers % 3).view('datetime64[M]').astype('datetime64[s]').view(np.int64)
+        years = days.view('datetime64[s]').astype('datetime64[Y]').astype('datetime64[s]').view(np.int64)
+        for period_type, starts in (("Hour", hours), ("Day", days), ("Week", weeks), ("Month", months),
+                                    ("Quarter", quarters), ("Year", years)):
+            firsts = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+            sums = np.add.reduceat(amounts, firsts)
+            for start, total in zip(starts[firsts].tolist(), sums.tolist()):
+                bucket = totals.get((period_type, start))
+                if bucket is None:
+                    bucket = totals[(period_type, start)] = [0, 0]
+                bucket[column] = total
+    return totals
+
+
+def check_backends(income_timestamps, income_amounts, expense_timestamps, expense_amounts):
+    """Run both compute_totals() backends on the same columns and compare them.
+
+    Returns a list of (key, python, numpy) for every bucket that differs,
+    or None when NumPy is not installed.
+    """
+    if np is None:
+        return None
+    columns = (income_timestamps, income_amounts, expense_timestamps, expense_amounts)
+    expected = python_totals(*columns)
+    found = numpy_totals(*columns)
+    return [(key, expected.get(key), found.get(key))
+            for key in set(expected) | set(found) if expected.get(key) != found.get(key)]
+
+
+def combined_lookup(caches, buckets, period_type):
+    """RollupCache.lookup() across several caches, adding up their bucket totals.
+
+    This is how the Charts view shows every ledger at once: it costs one
+    dictionary lookup per bucket per ledger, however many rows they hold.
+    """
+    chart_data = {}
+    for label, start, _ in buckets:
+        key = (period_type, to_timestamp(start))
+        income = expense = 0
+        for cache in caches:
+            bucket = cache.totals.get(key)
+            if bucket is not None:
+                income += bucket[0]
+                expense += bucket[1]
+        chart_data[label] = {'income': income, 'expenses': expense}
+    return chart_data
+
+
+class RollupCache:
+    """Income and expense totals per (period_type, bucket_start).
+
+    The Charts view only ever asks for whole buckets, so the cache is a
+    pyramid holding every Hour, Day, Week, Month, Quarter and Year bucket
+    that has rows, kept up to date by applying each add, edit and delete as
+    a delta. Drawing any range at any granularity then costs one dictionary
+    lookup per visible bucket instead of a pass over the ledgers. Amounts are integer pence, so the
+    deltas never accumulate rounding error.
+
+    A full rebuild runs elsewhere (see begin_rebuild()); deltas
+    applied while it runs are replayed onto its result.
+    """
+    def __init__(self):
+        self.totals = {}  # (period_type, bucket start timestamp) -> [income, expenses] in pence
+        self.pending = None  # Deltas applied since begin_rebuild() (None when no rebuild is running)
+
+    def _bucket(self, key):
+        bucket = self.totals.get(key)
+        if bucket is None:
+            bucket = self.totals[key] = [0, 0]
+        return bucket
+
+    def apply(self, kind, timestamp, delta):
+        """Add delta to the 'income' or 'expenses' total of every bucket holding timestamp"""
+        if self.pending is not None:
+            self.pending.append((kind, timestamp, delta))
+        column = 0 if kind == 'income' else 1
+        for period_type, start_of in BUCKET_STARTS.items():
+            self._bucket((period_type, start_of(timestamp)))[column] += delta
+
+    def begin_rebuild(self, incomes, expenses):
+        """Start a rebuild that runs somewhere else.
+
+        Returns the arguments for compute_totals() as copies of the ledger
+        columns, safe to hand to another thread or process. Pass its result
+        to finish_rebuild().
+        """
+        self.pending = []
+        return (incomes.timestamps[:], incomes.amounts[:],
+                expenses.timestamps[:], expenses.amounts[:])
+
+    def finish_rebuild(self, totals):
+        """Install a compute_totals() result from begin_rebuild()'s columns"""
+        if self.pending is None:
+            return  # No rebuild was started
+        pending = self.pending
+        self.pending = None
+        self.totals = totals
+        for kind, timestamp, delta in pending:
+            self.apply(kind, timestamp, delta)
+
+    def _compute(self, incomes, expenses):
+        return compute_totals(incomes.timestamps, incomes.amounts,
+                              expenses.timestamps, expenses.amounts)
+
+    def lookup(self, buckets, period_type):
+        """Return chart data for (label, start, end) buckets of one period type"""
+        chart_data = {}
+        for label, start, _ in buckets:
+            income, expense = self.totals.get((period_type, to_timestamp(start)), (0, 0))
+            chart_data[label] = {'income': income, 'expenses': expense}
+        return chart_data
+
+    def verify(self, incomes, expenses):
+        """Compare the cache with a full recompute.
+
+        Returns a list of (key, cached, expected) for every bucket that
+        differs; an empty list means the cache is consistent.
+        """
+        expected = self._compute(incomes, expenses)
+        mismatches = []
+        for key in set(self.totals) | set(expected):
+            cached = tuple(self.totals.get(key, (0, 0)))
+            correct = tuple(expected.get(key, (0, 0)))
+            if cached != correct:
+                mismatches.append((key, cached, correct))
+        return mismatches
@@ -0,0 +1,224 @@
+import argparse
+import random
+from array import array
+from datetime import datetime
+from itertools import accumulate
+
+from ledger import SECONDS_PER_DAY, from_timestamp, to_timestamp
+
+
+EXPENSES_PER_DAY = 0.75  # About 20-25 a month, like the original sample data
+POOL_SIZE = 8192  # Pre-drawn (description, category, pence) expenses to pick from
+
+# Category -> (share of expenses, typical amounts in pounds, descriptions)
+EXPENSE_PROFILE = {
+    "Food": (0.35, [15, 25, 35, 45, 8, 12, 20, 30, 18, 22],
+             ["Groceries", "Restaurant", "Coffee", "Lunch", "Dinner", "Snacks", "Takeaway"]),
+    "Transportation": (0.18, [45, 60, 25, 30, 15, 20, 85, 95],
+                       ["Gas", "Bus fare", "Taxi", "Parking", "Car maintenance", "Train ticket"]),
+    "Housing": (0.10, [800, 120, 150, 80, 95],
+                ["Rent", "Utilities", "Internet", "Phone", "Home supplies", "Repairs"]),
+    "Entertainment": (0.15, [25, 35, 15, 45, 20, 30, 40, 18],
+                      ["Movie", "Concert", "Games", "Books", "Streaming", "Sports"]),
+    "Healthcare": (0.07, [85, 120, 45, 65, 200, 150],
+                   ["Pharmacy", "Doctor visit", "Dentist", "Gym", "Vitamins"]),
+    "Other": (0.15, [20, 35, 50, 15, 25, 40, 30],
+              ["Clothing", "Gifts", "Personal care", "Electronics", "Miscellaneous"]),
+}
+
+# Relative chance of spending in each hour of the day (none overnight)
+HOURLY_WEIGHTS = [0, 0, 0, 0, 0, 0, 0, 1, 3, 4, 4, 5, 8, 6, 4, 4, 5, 7, 9, 8, 6, 4, 2, 1]
+MINUTE_CUM_WEIGHTS = list(accumulate(weight for weight in HOURLY_WEIGHTS for _ in range(60)))
+WEEKEND_FACTOR = 1.3  # People spend a bit more on Saturdays and Sundays
+
+SALARY = 2700  # Pounds, paid at 09:00 on the 1st of every month
+ANNUAL_RAISE = 0.03
+FREELANCE_CHANCE = 0.3  # Chance of one freelance payment in a month
+
+
+def _rng(seed, stream):
+    """An independent random stream per kind, so both are reproducible on their own"""
+    return random.Random(None if seed is None else f"{seed}:{stream}")
+
+
+def _first_day(days, end):
+    """Timestamp of midnight on the first of the days that end with end's day"""
+    if end is None:
+        end = datetime.now()
+    return to_timestamp(datetime(end.year, end.month, end.day)) - (days - 1) * SECONDS_PER_DAY
+
+
+def _poisson(rng, mean):
+    """Draw a Poisson count (a normal approximation for large means)"""
+    if mean > 30:
+        return max(0, round(rng.gauss(mean, mean ** 0.5)))
+    limit = 2.718281828459045 ** -mean
+    count = 0
+    product = rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def expense_pool(rng):
+    """Pre-draw POOL_SIZE expenses as (descriptions, categories, pence) lists.
+
+    Categories follow their shares and amounts vary between 80% and 130%
+    of a typical amount, so picking from the pool gives realistic rows
+    at the cost of one random.choices() call per day.
+    """
+    categories = list(EXPENSE_PROFILE)
+    shares = [EXPENSE_PROFILE[category][0] for category in categories]
+    pool = ([], [], [])
+    for category in rng.choices(categories, weights=shares, k=POOL_SIZE):
+        _, amounts, descriptions = EXPENSE_PROFILE[category]
+        pool[0].append(rng.choice(descriptions))
+        pool[1].append(category)
+        pool[2].append(round(rng.choice(amounts) * rng.uniform(0.8, 1.3) * 100))
+    return pool
+
+
+def _expense_days(seed, days, per_day, end):
+    """Yield (timestamps, pool indexes) for each day with expenses, oldest first"""
+    if end is None:
+        end = datetime.now()
+    rng = _rng(seed, "expenses")
+    picks = range(POOL_SIZE)
+    day = _first_day(days, end)
+    for number in range(days):
+        weekend = (day // SECONDS_PER_DAY + 3) % 7 >= 5  # EPOCH was a Thursday
+        mean = per_day * WEEKEND_FACTOR if weekend else per_day
+        cum_weights = MINUTE_CUM_WEIGHTS
+        if number == days - 1:
+            # The last day stops at end, so nothing is dated in the future;
+            # it gets its share of a day's expenses up to then
+            cum_weights = MINUTE_CUM_WEIGHTS[:end.hour * 60 + end.minute + 1]
+            mean *= cum_weights[-1] / MINUTE_CUM_WEIGHTS[-1]
+        count = _poisson(rng, mean)
+        if count:
+            times = sorted(rng.choices(range(len(cum_weights)), cum_weights=cum_weights, k=count))
+            yield [day + minute * 60 for minute in times], rng.choices(picks, k=count)
+        day += SECONDS_PER_DAY
+
+
+def expense_rows(seed=None, days=90, per_day=EXPENSES_PER_DAY, end=None, first_id=1):
+    """Yield (id, timestamp, pence, description, category) expenses, oldest first.
+
+    Covers days days ending at end (now by default; the last day stops
+    there, so no row is in the future), with a Poisson-distributed per_day
+    expenses a day (more at weekends), spread over the day by
+    HOURLY_WEIGHTS. Rows come out in date order, one day at a time, so they
+    can be streamed straight into a file or storage without sorting. The
+    same seed and end always give the same rows.
+    """
+    descriptions, categories, amounts = expense_pool(_rng(seed, "pool"))
+    row_id = first_id
+    for timestamps, indexes in _expense_days(seed, days, per_day, end):
+        yield from zip(range(row_id, row_id + len(indexes)), timestamps,
+                       map(amounts.__getitem__, indexes), map(descriptions.__getitem__, indexes),
+                       map(categories.__getitem__, indexes))
+        row_id += len(indexes)
+
+
+def expense_columns(seed=None, days=90, per_day=EXPENSES_PER_DAY, end=None, first_id=1):
+    """The same expenses as expense_rows(), as the five columns Ledger.load_columns() takes.
+
+    Each day is appended a column at a time, so no per-row tuples are
+    built; this is what makes millions of rows affordable.
+    """
+    descriptions, categories, amounts = expense_pool(_rng(seed, "pool"))
+    columns = (array('q'), array('q'), array('q'), [], [])
+    ids, timestamps, pence, row_descriptions, row_categories = columns
+    for day_timestamps, indexes in _expense_days(seed, days, per_day, end):
+        ids.extend(range(first_id + len(ids), first_id + len(ids) + len(indexes)))
+        timestamps.extend(day_timestamps)
+        pence.extend(map(amounts.__getitem__, indexes))
+        row_descriptions.extend(map(descriptions.__getitem__, indexes))
+        row_categories.extend(map(categories.__getitem__, indexes))
+    return columns
+
+
+def income_rows(seed=None, days=90, end=None, first_id=1):
+    """Yield (id, timestamp, pence, description, None) incomes, oldest first.
+
+    A salary on the 1st of every month (with a yearly raise) and now and
+    then a freelance payment, over the same days as expense_rows().
+    """
+    if end is None:
+        end = datetime.now()
+    rng = _rng(seed, "income")
+    row_id = first_id
+    first_day = _first_day(days, end)
+    last_timestamp = to_timestamp(end)
+    last_day = first_day + (days - 1) * SECONDS_PER_DAY
+    date = from_timestamp(first_day)
+    year, month = date.year, date.month
+    salary = SALARY * 100
+    while True:
+        month_start = to_timestamp(datetime(year, month, 1))
+        if month_start > last_day:
+            break
+        payments = [(month_start + 9 * 3600, salary, "Monthly Salary")]
+        if rng.random() < FREELANCE_CHANCE:
+            day = month_start + rng.randint(4, 24) * SECONDS_PER_DAY
+            payments.append((day + rng.randint(10 * 3600, 17 * 3600 - 1) // 60 * 60,
+                             rng.randint(200, 800) * 100, "Freelance Work"))
+        for timestamp, pence, description in payments:
+            if first_day <= timestamp <= last_timestamp:
+                yield row_id, timestamp, pence, description, None
+                row_id += 1
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+            salary = round(salary * (1 + ANNUAL_RAISE))
+
+
+def fill_ledgers(incomes, expenses, seed=None, days=90, per_day=EXPENSES_PER_DAY, end=None):
+    """Generate rows straight into two Ledgers in one bulk load each.
+
+    Returns (income count, expense count). Ids carry on from each ledger's
+    next_id, so they never clash with rows it had before.
+    """
+    income_count = len(incomes)
+    expense_count = len(expenses)
+    incomes.load_rows(income_rows(seed, days, end, incomes.next_id))
+    expenses.load_columns(*expense_columns(seed, days, per_day, end, expenses.next_id))
+    return len(incomes) - income_count, len(expenses) - expense_count
+
+
+def main():
+    from importer import export_csv
+    from journal import JournalStorage
+    from ledger import Ledger
+
+    parser = argparse.ArgumentParser(description="Generate reproducible Finance Tracker test data")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--per-day", type=float, default=EXPENSES_PER_DAY, help="mean expenses a day")
+    parser.add_argument("--csv", help="write a statement the app's Import button can read")
+    parser.add_argument("--journal", help="write a journal the app can open directly (see journal.py)")
+    args = parser.parse_args()
+
+    days = max(1, round(args.years * 365))
+    start = datetime.now()
+    incomes, expenses = Ledger(), Ledger()
+    counts = fill_ledgers(incomes, expenses, args.seed, days, args.per_day)
+    print(f"Generated {counts[0]} incomes and {counts[1]} expenses "
+          f"in {(datetime.now() - start).total_seconds():.1f}s")
+    if args.csv:
+        export_csv(args.csv, incomes, expenses)
+        print(f"Wrote {args.csv}")
+    if args.journal:
+        storage = JournalStorage(args.journal)
+        if not storage.is_empty():
+            parser.error(f"{args.journal} already has data")
+        storage.add_many('income', income_rows(args.seed, days))
+        storage.add_many('expenses', expense_rows(args.seed, days, args.per_day))
+        storage.compact()
+        storage.close()
+        print(f"Wrote {args.journal}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime
+
+from ledger import to_timestamp
+from money import to_pence
+
+
+WORD = re.compile(r"\w+")
+DATE_FILTER = re.compile(r"(after|before):(\d{4}-\d{2}-\d{2})$")
+AMOUNT_FILTER = re.compile(r"(>=|<=|>|<)£?(\d[\d,]*(?:\.\d+)?)$")
+CATEGORY_FILTER = re.compile(r"category:(.+)$", re.IGNORECASE)
+
+
+def tokenize(text):
+    """Split text into lower-case words"""
+    return WORD.findall(text.lower())
+
+
+def parse_query(text):
+    """Split what was typed in a search box into words and filters.
+
+    Every word must match the start of a word in the description. Filters
+    are >N, >=N, <N and <=N for the amount in pounds, after:YYYY-MM-DD
+    (inclusive) and before:YYYY-MM-DD (exclusive) for the date, and
+    category:NAME (any case) for the category.
+    Returns (words, filters), filters being keyword arguments for
+    SearchIndex.search().
+    """
+    words = []
+    filters = {}
+    for part in text.split():
+        date_match = DATE_FILTER.match(part)
+        amount_match = AMOUNT_FILTER.match(part)
+        category_match = CATEGORY_FILTER.match(part)
+        if category_match:
+            filters['category'] = category_match.group(1)
+        elif date_match:
+            try:
+                date = datetime.strptime(date_match.group(2), "%Y-%m-%d")
+            except ValueError:
+                words.append(part)
+                continue
+            filters['start' if date_match.group(1) == 'after' else 'end'] = date
+        elif amount_match:
+            operator, pence = amount_match.group(1), to_pence(amount_match.group(2).replace(",", ""))
+            if operator == '>':
+                filters['min_amount'] = pence + 1
+            elif operator == '>=':
+                filters['min_amount'] = pence
+            elif operator == '<':
+                filters['max_amount'] = pence - 1
+            else:
+                filters['max_amount'] = pence
+        else:
+            words.extend(tokenize(part))
+    return words, filters
+
+
+class SearchIndex:
+    """Inverted index from description words to row ids for one Ledger.
+
+    Each word maps to a posting list (an array of the ids whose description
+    contains it), and a sorted vocabulary lets a prefix find every word it
+    starts. The index subscribes to the ledger and adds new and edited rows
+    as they happen. Deleted rows and old descriptions are left in the
+    posting lists and filtered out when searching (every candidate is
+    checked against its current description), and the index is rebuilt once
+    those stale entries pile up or after a bulk change.
+
+    A search starts from whichever is smaller, the rows in the date range
+    (or, with a category, the ledger's category index for that range) or
+    the rarest word's postings intersected with the other words' postings,
+    so it only touches rows that might match.
+    """
+    STALE_MIN = 1024  # Never rebuild for fewer stale entries than this
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.postings = {}  # word -> array('q') of row ids
+        self.vocabulary = []  # Every indexed word, sorted
+        self.word_cache = {}  # description -> frozenset of its words
+        self.stale = 0  # Posting entries for deleted or edited rows
+        self.built = False  # Built on the first search
+        ledger.subscribe(self._on_change)
+
+    def search(self, words=(), start=None, end=None, min_amount=None, max_amount=None, category=None):
+        """Return the ids of matching rows, in date order.
+
+        A row matches when every word is the start of a word in its
+        description, it is dated in [start, end), its amount (in pence)
+        is between min_amount and max_amount inclusive and its category is
+        category (compared ignoring case). None means no limit.
+        """
+        if not self.built:
+            self.rebuild()
+        ledger = self.ledger
+        words = [word for text in words for word in tokenize(text)]
+        first = 0 if start is None else bisect_left(ledger.timestamps, to_timestamp(start))
+        last = len(ledger.ids) if end is None else bisect_left(ledger.timestamps, to_timestamp(end))
+        if first >= last:
+            return []
+
+        slots = range(first, last)
+        code = None
+        if category is not None:
+            names = [name for name in ledger.category_lookup
+                     if name is not None and name.lower() == category.lower()]
+            if not names:
+                return []
+            code = ledger.category_lookup[names[0]]
+            row_slots = ledger.slots
+            slots = sorted(map(row_slots.__getitem__, ledger.rows_in_category(names[0], start, end)))
+        if words:
+            matches = [self._words_starting(word) for word in words]
+            sizes = [sum(len(self.postings[match]) for match in words_found)
+                     for words_found in matches]
+            rarest = min(range(len(words)), key=sizes.__getitem__)
+            if sizes[rarest] == 0:
+                return []
+            if sizes[rarest] < len(slots):
+                # Fewer postings than rows in range: intersect the posting
+                # lists (rarest word first) and visit just those rows
+                candidates = set()
+                for match in matches[rarest]:
+                    candidates.update(self.postings[match])
+                for index in sorted(range(len(words)), key=sizes.__getitem__):
+                    if index != rarest and candidates:
+                        candidates = set().union(*[candidates.intersection(self.postings[match])
+                                                   for match in matches[index]])
+                row_slots = ledger.slots
+                found = []
+                for row_id in candidates:
+                    slot = row_slots.get(row_id)
+                    if slot is not None and first <= slot < last and (
+                            code is None or ledger.category_codes[slot] == code):
+                        found.append(slot)
+                slots = sorted(found)
+
+        live = ledger.live
+        amounts = ledger.amounts
+        descriptions = ledger.descriptions
+        ids = ledger.ids
+        verdicts = {}  # description -> whether it matches every word
+        results = []
+        for slot in slots:
+            if not live[slot]:
+                continue
+            if min_amount is not None and amounts[slot] < min_amount:
+                continue
+            if max_amount is not None and amounts[slot] > max_amount:
+                continue
+            if words:
+                description = descriptions[slot]
+                matched = verdicts.get(description)
+                if matched is None:
+                    description_words = self._words(description)
+                    matched = verdicts[description] = all(
+                        any(word.startswith(prefix) for word in description_words)
+                        for prefix in words)
+                if not matched:
+                    continue
+            results.append(ids[slot])
+        return results
+
+    def rebuild(self):
+        """Index every live row of the ledger from scratch"""
+        self.postings = {}
+        self.vocabulary = []
+        self.word_cache = {}
+        self.stale = 0
+        ledger = self.ledger
+        for slot, row_id in enumerate(ledger.ids):
+            if ledger.live[slot]:
+                self._add(row_id, ledger.descriptions[slot])
+        self.built = True
+
+    def _words(self, description):
+        found = self.word_cache.get(description)
+        if found is None:
+            found = self.word_cache[description] = frozenset(tokenize(description))
+        return found
+
+    def _words_starting(self, prefix):
+        """Return every indexed word that starts with prefix"""
+        vocabulary = self.vocabulary
+        index = bisect_left(vocabulary, prefix)
+        found = []
+        while index < len(vocabulary) and vocabulary[index].startswith(prefix):
+            found.append(vocabulary[index])
+            index += 1
+        return found
+
+    def _add(self, row_id, description):
+        for word in self._words(description):
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = array('q')
+                insort(self.vocabulary, word)
+            posting.append(row_id)
+
+    def _on_change(self, event, index):
+        if not self.built:
+            return
+        ledger = self.ledger
+        if event == 'insert' or event == 'update':
+            slot = ledger.slot(index)
+            self._add(ledger.ids[slot], ledger.descriptions[slot])
+            if event == 'update':
+                self.stale += 1
+        elif event == 'delete':
+            self.stale += 1
+        else:
+            # Bulk change: rebuild on the next search
+            self.built = False
+        if self.stale >= max(self.STALE_MIN, len(ledger) // 4):
+            self.built = False
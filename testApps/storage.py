@@ -0,0 +1,303 @@
+import queue
+import sqlite3
+import threading
+
+
+KINDS = ("income", "expenses")
+PAGE_SIZE = 500  # Rows per page of history()
+
+
+class MemoryStorage:
+    """Storage backend that keeps nothing - data only lives for the session.
+
+    This is also the interface every backend implements. Rows are passed
+    around as (id, timestamp, pence, description, category) tuples, the
+    same format Ledger.load_rows() accepts.
+    """
+    def is_empty(self):
+        """True when there is no saved data at all"""
+        return True
+
+    def totals(self, kind):
+        """Return (total pence, row count) for 'income' or 'expenses'"""
+        return 0, 0
+
+    def load(self, kind, start=None, end=None):
+        """Return saved rows with start <= timestamp < end, oldest first"""
+        return []
+
+    def page_start(self, kind, end, count):
+        """Return the timestamp where the count newest rows dated before end start.
+
+        None means there are no more than count of them, so a page from
+        there reaches back to the oldest row. end=None means no limit.
+        """
+        return None
+
+    def history(self, kind, end=None, page_size=PAGE_SIZE):
+        """Yield (start, end, rows) pages of rows dated before end, newest page first.
+
+        Each page holds rows with start <= timestamp < end, oldest first:
+        about page_size of them, but never half of the rows sharing a
+        timestamp, so the next page can carry on from start. The last page
+        has start None. The cursor lives in the generator, so pages can be
+        pulled one at a time as a list is scrolled.
+        """
+        while True:
+            start = self.page_start(kind, end, page_size)
+            yield start, end, self.load(kind, start, end)
+            if start is None:
+                return
+            end = start
+
+    def max_id(self, kind):
+        """Return the highest saved row id (0 when there are none)"""
+        return 0
+
+    def add(self, kind, row):
+        pass
+
+    def add_many(self, kind, rows):
+        pass
+
+    def update(self, kind, row_id, amount, description, category):
+        pass
+
+    def delete(self, kind, row_id):
+        pass
+
+    def flush(self):
+        """Block until every queued write has been saved"""
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage(MemoryStorage):
+    """Saves transactions to an SQLite database file.
+
+    Amounts are stored as integer pence. The database runs in WAL mode so
+    reads never wait for writes. load() may be called from any thread: each
+    thread reads through its own connection. Writes are queued and applied by a background thread, which
+    groups everything waiting in the queue into one transaction, so the UI
+    never blocks on disk I/O.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS {kind} (
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            category TEXT
+        );
+        CREATE INDEX IF NOT EXISTS {kind}_timestamp ON {kind} (timestamp);
+        CREATE INDEX IF NOT EXISTS {kind}_category ON {kind} (category, timestamp);
+        INSERT OR IGNORE INTO totals (kind, amount, count) VALUES ('{kind}', 0, 0);
+        CREATE TRIGGER IF NOT EXISTS {kind}_insert AFTER INSERT ON {kind} BEGIN
+            UPDATE totals SET amount = amount + NEW.amount, count = count + 1
+            WHERE kind = '{kind}';
+        END;
+        CREATE TRIGGER IF NOT EXISTS {kind}_update AFTER UPDATE OF amount ON {kind} BEGIN
+            UPDATE totals SET amount = amount - OLD.amount + NEW.amount
+            WHERE kind = '{kind}';
+        END;
+        CREATE TRIGGER IF NOT EXISTS {kind}_delete AFTER DELETE ON {kind} BEGIN
+            UPDATE totals SET amount = amount - OLD.amount, count = count - 1
+            WHERE kind = '{kind}';
+        END;
+    """
+    VERSION = 1  # PRAGMA user_version; 0 stored amounts as REAL pounds
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+
+        # Connection used for reads on the Tk thread
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        upgrade = version < 1 and self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'income'").fetchone()
+        if upgrade:
+            self._detach_pound_tables()
+        with self.connection:
+            # The totals table is kept up to date by triggers, so start-up
+            # can read the running totals without scanning any rows
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS totals "
+                "(kind TEXT PRIMARY KEY, amount INTEGER NOT NULL, count INTEGER NOT NULL)")
+            for kind in KINDS:
+                self.connection.executescript(self.SCHEMA.format(kind=kind))
+        if upgrade:
+            self._copy_pound_tables()
+        self.connection.execute(f"PRAGMA user_version = {self.VERSION}")
+
+        self.owner = threading.current_thread()
+        self.readers = threading.local()  # Connection for load() on other threads
+
+        self.writes = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def _detach_pound_tables(self):
+        """Move version 0 tables (REAL pounds) aside so the new schema can be created"""
+        with self.connection:
+            for kind in KINDS:
+                # Triggers and indexes follow a renamed table; drop them so
+                # their names are free for the new one
+                for name in ("insert", "update", "delete"):
+                    self.connection.execute(f"DROP TRIGGER IF EXISTS {kind}_{name}")
+                for name in ("timestamp", "category"):
+                    self.connection.execute(f"DROP INDEX IF EXISTS {kind}_{name}")
+                self.connection.execute(f"ALTER TABLE {kind} RENAME TO {kind}_pounds")
+            self.connection.execute("DROP TABLE IF EXISTS totals")
+
+    def _copy_pound_tables(self):
+        """Convert the version 0 rows to pence (the triggers rebuild the totals)"""
+        with self.connection:
+            for kind in KINDS:
+                self.connection.execute(
+                    f"INSERT INTO {kind} SELECT id, timestamp, CAST(ROUND(amount * 100) AS INTEGER), "
+                    f"description, category FROM {kind}_pounds")
+                self.connection.execute(f"DROP TABLE {kind}_pounds")
+
+    def is_empty(self):
+        return all(self.totals(kind)[1] == 0 for kind in KINDS)
+
+    def totals(self, kind):
+        amount, count = self.connection.execute(
+            "SELECT amount, count FROM totals WHERE kind = ?", (kind,)).fetchone()
+        return amount, count
+
+    def load(self, kind, start=None, end=None):
+        query = f"SELECT id, timestamp, amount, description, category FROM {kind}"
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(end)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp, id"
+        return self._reader().execute(query, params).fetchall()
+
+    def _reader(self):
+        """Connection for reads on the calling thread"""
+        if threading.current_thread() is self.owner:
+            return self.connection
+        connection = getattr(self.readers, 'connection', None)
+        if connection is None:
+            connection = self.readers.connection = sqlite3.connect(self.path)
+        return connection
+
+    def page_start(self, kind, end, count):
+        query = f"SELECT timestamp FROM {kind}"
+        params = []
+        if end is not None:
+            query += " WHERE timestamp < ?"
+            params.append(end)
+        # The count-th newest timestamp, and whether anything is older
+        query += " ORDER BY timestamp DESC LIMIT 2 OFFSET ?"
+        params.append(count - 1)
+        found = self._reader().execute(query, params).fetchall()
+        return found[0][0] if len(found) == 2 else None
+
+    def max_id(self, kind):
+        return self.connection.execute(f"SELECT COALESCE(MAX(id), 0) FROM {kind}").fetchone()[0]
+
+    def add(self, kind, row):
+        self.writes.put((f"INSERT INTO {kind} VALUES (?, ?, ?, ?, ?)", row))
+
+    def add_many(self, kind, rows):
+        # The writer commits at most batch_size rows per transaction, so a
+        # huge insert never holds the write lock for long
+        sql = f"INSERT INTO {kind} VALUES (?, ?, ?, ?, ?)"
+        for row in rows:
+            self.writes.put((sql, row))
+
+    def update(self, kind, row_id, amount, description, category):
+        self.writes.put((f"UPDATE {kind} SET amount = ?, description = ?, category = ? WHERE id = ?",
+                         (amount, description, category, row_id)))
+
+    def delete(self, kind, row_id):
+        self.writes.put((f"DELETE FROM {kind} WHERE id = ?", (row_id,)))
+
+    def flush(self):
+        self.writes.join()
+
+    def close(self):
+        self.flush()
+        self.writes.put(None)
+        self.writer.join()
+        self.connection.close()
+
+    def _write_loop(self):
+        """Apply queued writes in batches until close() sends None"""
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        running = True
+        while running:
+            batch = [self.writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            statements = [write for write in batch if write is not None]
+            running = len(statements) == len(batch)
+            try:
+                with connection:
+                    # Consecutive writes with the same SQL go through one executemany
+                    start = 0
+                    while start < len(statements):
+                        sql = statements[start][0]
+                        end = start
+                        while end < len(statements) and statements[end][0] == sql:
+                            end += 1
+                        connection.executemany(sql, [params for _, params in statements[start:end]])
+                        start = end
+            except sqlite3.Error as e:
+                print(f"Error saving transactions: {e}")
+            finally:
+                for _ in batch:
+                    self.writes.task_done()
+        connection.close()
+
+
+class BufferedWrites:
+    """Collects writes meant for another backend until commit() is called.
+
+    Used while FinanceMain.batch() is open, so a batch that is rolled back
+    never reaches the real storage.
+    """
+    def __init__(self, storage):
+        self.storage = storage
+        self.writes = []  # (method name, args) in call order
+
+    def __getattr__(self, name):
+        # Reads (totals, load, ...) go straight to the real backend
+        return getattr(self.storage, name)
+
+    def add(self, kind, row):
+        self.writes.append(('add', (kind, row)))
+
+    def add_many(self, kind, rows):
+        self.writes.append(('add_many', (kind, rows)))
+
+    def update(self, kind, row_id, amount, description, category):
+        self.writes.append(('update', (kind, row_id, amount, description, category)))
+
+    def delete(self, kind, row_id):
+        self.writes.append(('delete', (kind, row_id)))
+
+    def commit(self):
+        """Send every collected write to the real backend, in order"""
+        for name, args in self.writes:
+            getattr(self.storage, name)(*args)
+        self.writes = []
@@ -0,0 +1,88 @@
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class TaskRunner:
+    """Runs slow jobs off the Tk thread and hands their results back on it.
+
+    Jobs run on a thread pool, or on a process pool for CPU-bound work when
+    processes=True (their function and arguments must then be picklable).
+    Finished futures are put on a queue by the workers, and the Tk thread
+    drains it from root.after(), so on_done/on_error callbacks always run on
+    the Tk thread and may touch widgets and ledgers.
+
+    Every job has a key. Submitting a new job with the same key supersedes
+    the old one: it is cancelled if it has not started yet, and its result
+    is dropped if it has. That way paging quickly through chart periods
+    only ever applies the newest request.
+    """
+    POLL_MS = 30  # How often finished jobs are collected while any are running
+
+    def __init__(self, root, workers=2, processes=False):
+        self.root = root
+        self.threads = ThreadPoolExecutor(max_workers=workers)
+        self.processes = ProcessPoolExecutor(max_workers=workers) if processes else None
+        self.finished = queue.Queue()  # Futures, put there by the worker threads
+        self.current = {}  # key -> newest future submitted under it
+        self.callbacks = {}  # future -> (key, on_done, on_error)
+        self.poll_job = None
+
+    def submit(self, key, function, *args, on_done=None, on_error=None, cpu_bound=False):
+        """Run function(*args) in the background and return its Future.
+
+        on_done(result) or on_error(exception) is called on the Tk thread
+        when it finishes (errors are printed if there is no on_error).
+        cpu_bound jobs go to the process pool when there is one.
+        """
+        self.cancel(key)
+        executor = self.processes if cpu_bound and self.processes is not None else self.threads
+        future = executor.submit(function, *args)
+        self.current[key] = future
+        self.callbacks[future] = (key, on_done, on_error)
+        future.add_done_callback(self.finished.put)
+        if self.poll_job is None:
+            self.poll_job = self.root.after(self.POLL_MS, self._poll)
+        return future
+
+    def cancel(self, key):
+        """Cancel the job submitted under key, or drop its result if it is running"""
+        future = self.current.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def pending(self, key):
+        """True while a job submitted under key has not been handed back yet"""
+        return key in self.current
+
+    def shutdown(self):
+        """Cancel everything that has not started and stop the pools"""
+        for key in list(self.current):
+            self.cancel(key)
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.threads.shutdown(wait=False)
+        if self.processes is not None:
+            self.processes.shutdown(wait=False)
+
+    def _poll(self):
+        self.poll_job = None
+        while True:
+            try:
+                future = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            key, on_done, on_error = self.callbacks.pop(future)
+            if self.current.get(key) is not future:
+                continue  # Cancelled or superseded by a newer job
+            del self.current[key]
+            error = future.exception()
+            if error is None:
+                if on_done is not None:
+                    on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                print(f"Background task {key!r} failed: {error}")
+        if self.callbacks:
+            self.poll_job = self.root.after(self.POLL_MS, self._poll)
@@ -0,0 +1,96 @@
+"""Round-trip checks for JournalStorage: what is written is what is read back after reopening.
+
+Run from testApps/ with: python -m unittest test_journal
+"""
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from journal import JournalStorage
+from storage import KINDS
+
+
+class JournalRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "test.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def reopen(self, storage):
+        storage.close()
+        return JournalStorage(self.path)
+
+    def test_text_after_a_delete_survives_reopening(self):
+        # A delete writes empty text, which takes no heap space, so the next
+        # description starts at the same heap offset
+        storage = JournalStorage(self.path)
+        storage.add('income', (1, 100, 500, "Salary", None))
+        storage.delete('income', 1)
+        storage.add('income', (2, 200, 700, "Freelance Work", None))
+        storage = self.reopen(storage)
+        self.assertEqual(storage.load('income'), [(2, 200, 700, "Freelance Work", None)])
+        storage.close()
+
+    def test_writes_survive_the_process_being_killed(self):
+        # The writer exits without close() or flush(), like a killed app
+        script = (f"import os, sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+                  "from journal import JournalStorage\n"
+                  f"storage = JournalStorage({self.path!r})\n"
+                  "storage.add('income', (1, 100, 500, 'Salary', None))\n"
+                  "storage.add_many('expenses', [(1, 150, 250, 'Rent', 'Housing'), (2, 160, 90, 'Bus', None)])\n"
+                  "storage.update('expenses', 2, 95, 'Bus fare', None)\n"
+                  "storage.delete('expenses', 1)\n"
+                  "os._exit(0)\n")
+        subprocess.run([sys.executable, "-c", script], check=True)
+        storage = JournalStorage(self.path)
+        self.assertEqual(storage.load('income'), [(1, 100, 500, "Salary", None)])
+        self.assertEqual(storage.load('expenses'), [(2, 160, 95, "Bus fare", None)])
+        storage.close()
+
+    def test_random_changes_survive_reopening_and_compaction(self):
+        rng = random.Random(16)
+        expected = {kind: {} for kind in KINDS}
+        storage = JournalStorage(self.path)
+        next_id = 1
+        for step in range(2000):
+            kind = rng.choice(KINDS)
+            rows = expected[kind]
+            action = rng.random()
+            if action < 0.6 or not rows:
+                category = rng.choice(["Food", "Housing", None]) if kind == 'expenses' else None
+                row = (next_id, rng.randint(-10 ** 6, 10 ** 9), rng.randint(1, 10 ** 6),
+                       rng.choice(["", "Rent", "Coffee", "Café ☕", "Salary"]), category)
+                storage.add(kind, row)
+                rows[next_id] = row
+                next_id += 1
+            elif action < 0.8:
+                row_id = rng.choice(list(rows))
+                _, timestamp, _, _, category = rows[row_id]
+                row = (row_id, timestamp, rng.randint(1, 10 ** 6), rng.choice(["", "Edited", "Gym"]), category)
+                storage.update(kind, row_id, row[2], row[3], row[4])
+                rows[row_id] = row
+            else:
+                row_id = rng.choice(list(rows))
+                storage.delete(kind, row_id)
+                del rows[row_id]
+            if step % 500 == 499:
+                storage = self.reopen(storage)
+            if step % 700 == 699:
+                storage.compact()
+
+        storage = self.reopen(storage)
+        for kind in KINDS:
+            rows = sorted(expected[kind].values(), key=lambda row: (row[1], row[0]))
+            self.assertEqual(storage.load(kind), rows)
+            self.assertEqual(storage.totals(kind), (sum(row[2] for row in rows), len(rows)))
+        storage.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
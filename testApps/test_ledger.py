@@ -0,0 +1,123 @@
+"""Model-based checks for Ledger: random changes are applied to it and to a plain dict of rows.
+
+After every step the ledger must hold exactly the model's rows in date
+order, and its id -> slot dict, tombstones, Fenwick tree and category index
+must all agree with its columns.
+
+Run from testApps/ with: python -m unittest test_ledger
+"""
+import random
+import unittest
+
+from ledger import Ledger, from_timestamp
+
+CATEGORIES = ["Food", "Housing", None]
+
+
+class LedgerModelTest(unittest.TestCase):
+    def check(self, ledger, model):
+        live_slots = [slot for slot in range(len(ledger.ids)) if ledger.live[slot]]
+        self.assertEqual(len(ledger), len(model))
+        self.assertEqual(ledger.dead, len(ledger.ids) - len(live_slots))
+        self.assertEqual(len(ledger.amounts), len(ledger.ids))
+        self.assertEqual(len(ledger.descriptions), len(ledger.ids))
+        self.assertEqual(len(ledger.live_tree), len(ledger.ids) + 1)
+
+        rows = {ledger.ids[slot]: ledger.stored_row(ledger.ids[slot]) for slot in live_slots}
+        self.assertEqual(rows, model)
+        timestamps = [ledger.timestamps[slot] for slot in range(len(ledger.ids))]
+        self.assertEqual(timestamps, sorted(timestamps))  # Tombstones keep their dates too
+        self.assertEqual(ledger.slots, {ledger.ids[slot]: slot for slot in live_slots})
+        for slot in range(len(ledger.ids)):
+            if not ledger.live[slot]:
+                self.assertEqual(ledger.amounts[slot], 0)
+
+        # Positions and slots are inverse maps through the Fenwick tree
+        for position, slot in enumerate(live_slots):
+            self.assertEqual(ledger.slot(position), slot)
+            self.assertEqual(ledger.position(slot), position)
+            self.assertEqual(ledger.id_at(position), ledger.ids[slot])
+
+        for code, name in enumerate(ledger.category_names):
+            expected = sorted((row[1], row_id) for row_id, row in model.items() if row[4] == name)
+            category_timestamps, category_ids = ledger.category_rows[code]
+            self.assertEqual(sorted(zip(category_timestamps, category_ids)), expected)
+            self.assertEqual(list(category_timestamps), sorted(category_timestamps))
+            self.assertEqual(ledger.category_sums[code],
+                             sum(row[2] for row in model.values() if row[4] == name))
+
+    def random_row(self, rng, row_id, low=0, high=10 ** 6):
+        # Few distinct dates, so there are plenty of ties
+        return (row_id, rng.randrange(low, high, 3600), rng.randint(1, 10 ** 6),
+                rng.choice(["Rent", "Coffee", "Bus"]), rng.choice(CATEGORIES))
+
+    def test_random_changes_match_the_model(self):
+        rng = random.Random(12)
+        for trial in range(10):
+            ledger = Ledger()
+            ledger.COMPACT_MIN = 8  # Compact often
+            model = {}
+            deleted = []
+            for step in range(250):
+                action = rng.random()
+                if action < 0.3 or not model:
+                    row = self.random_row(rng, ledger.next_id)
+                    row_id = ledger.add(row[2], row[3], from_timestamp(row[1]), row[4])
+                    model[row_id] = (row_id,) + row[1:]
+                elif action < 0.45:
+                    row_id = rng.choice(list(model))
+                    _, timestamp, _, _, _ = model[row_id]
+                    amount, description, category = rng.randint(1, 10 ** 6), rng.choice(["Edited", "Gym"]), \
+                        rng.choice(CATEGORIES)
+                    self.assertEqual(ledger.update(row_id, amount, description, category), model[row_id][2])
+                    model[row_id] = (row_id, timestamp, amount, description, category)
+                elif action < 0.65:
+                    row_id = rng.choice(list(model))
+                    ledger.delete(row_id)
+                    deleted.append(model.pop(row_id))
+                elif action < 0.75 and deleted:
+                    row = deleted.pop(rng.randrange(len(deleted)))
+                    ledger.restore(row)
+                    model[row[0]] = row
+                elif action < 0.8:
+                    row_ids = set(rng.sample(list(model), rng.randint(1, min(5, len(model)))))
+                    ledger.remove_ids(row_ids)
+                    for row_id in row_ids:
+                        deleted.append(model.pop(row_id))
+                elif action < 0.9:
+                    # A page of older history, dated before everything loaded
+                    oldest = min(row[1] for row in model.values())
+                    rows = sorted((self.random_row(rng, ledger.next_id + offset, oldest - 10 ** 5, oldest)
+                                   for offset in range(rng.randint(1, 20))), key=lambda row: row[1])
+                    ledger.load_rows(rows)
+                    model.update((row[0], row) for row in rows)
+                else:
+                    # An import batch, in any order and overlapping the loaded rows
+                    rows = [self.random_row(rng, ledger.next_id + offset) for offset in range(rng.randint(1, 20))]
+                    ledger.load_rows(rows)
+                    model.update((row[0], row) for row in rows)
+                with self.subTest(trial=trial, step=step):
+                    self.check(ledger, model)
+
+    def test_rows_that_do_not_fit_change_nothing(self):
+        ledger = Ledger()
+        ledger.load_rows([(1, 100, 500, "Rent", "Housing")])
+        with self.assertRaises(ValueError):
+            ledger.add(2 ** 63, "Too much", from_timestamp(200))
+        with self.assertRaises(ValueError):
+            ledger.update(1, 2 ** 63, "Too much", "Housing")
+        self.check(ledger, {1: (1, 100, 500, "Rent", "Housing")})
+
+    def test_snapshot_is_not_changed_by_later_edits(self):
+        ledger = Ledger()
+        ledger.load_rows([(1, 100, 500, "Rent", "Housing"), (2, 200, 300, "Coffee", "Food")])
+        copy = ledger.snapshot()
+        ledger.update(1, 900, "Rent", "Housing")
+        ledger.delete(2)
+        self.assertEqual(copy.stored_row(1), (1, 100, 500, "Rent", "Housing"))
+        self.assertEqual(copy.stored_row(2), (2, 200, 300, "Coffee", "Food"))
+        self.assertEqual(copy.category_totals(), {"Housing": 500, "Food": 300})
+
+
+if __name__ == "__main__":
+    unittest.main()
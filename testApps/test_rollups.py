@@ -0,0 +1,80 @@
+"""Checks that both compute_totals() backends agree and that RollupCache deltas match a full recompute.
+
+Run from testApps/ with: python -m unittest test_rollups
+"""
+import random
+import unittest
+
+from ledger import Ledger, from_timestamp
+from rollups import RollupCache, check_backends, np, numpy_totals, python_totals
+
+
+def random_columns(rng, count):
+    """Sorted timestamps (some before 1970) and amounts in pence"""
+    timestamps = sorted(rng.randint(-5 * 10 ** 8, 2 * 10 ** 9) for _ in range(count))
+    amounts = [rng.randint(1, 10 ** 7) for _ in range(count)]
+    return timestamps, amounts
+
+
+class BackendTest(unittest.TestCase):
+    @unittest.skipUnless(np, "NumPy is not installed")
+    def test_numpy_matches_python(self):
+        rng = random.Random(17)
+        for count in (0, 1, 2, 50, 5000):
+            columns = random_columns(rng, count) + random_columns(rng, count // 2)
+            self.assertEqual(numpy_totals(*columns), python_totals(*columns))
+            self.assertEqual(check_backends(*columns), [])
+
+    @unittest.skipUnless(np, "NumPy is not installed")
+    def test_numpy_sorts_unsorted_columns(self):
+        rng = random.Random(18)
+        timestamps, amounts = random_columns(rng, 1000)
+        rng.shuffle(timestamps)
+        self.assertEqual(numpy_totals(timestamps, amounts, [], []), python_totals(timestamps, amounts, [], []))
+
+
+class RollupCacheTest(unittest.TestCase):
+    def random_changes(self, rng, ledgers, cache, steps):
+        """Add, update and delete random rows, applying each change to cache as a delta"""
+        for _ in range(steps):
+            kind = rng.choice(('income', 'expenses'))
+            ledger = ledgers[kind]
+            action = rng.random()
+            if action < 0.6 or not len(ledger):
+                timestamp = rng.randint(-5 * 10 ** 8, 2 * 10 ** 9)
+                amount = rng.randint(1, 10 ** 6)
+                ledger.add(amount, "Row", from_timestamp(timestamp), rng.choice(["Food", "Rent", None]))
+                cache.apply(kind, timestamp, amount)
+            elif action < 0.8:
+                row_id = ledger.id_at(rng.randrange(len(ledger)))
+                amount = rng.randint(1, 10 ** 6)
+                old_amount = ledger.update(row_id, amount, "Edited", "Food")
+                cache.apply(kind, ledger.timestamps[ledger.slots[row_id]], amount - old_amount)
+            else:
+                row_id = ledger.id_at(rng.randrange(len(ledger)))
+                slot = ledger.slots[row_id]
+                timestamp, amount = ledger.timestamps[slot], ledger.amounts[slot]
+                ledger.delete(row_id)
+                cache.apply(kind, timestamp, -amount)
+
+    def test_deltas_match_a_full_recompute(self):
+        rng = random.Random(17)
+        ledgers = {'income': Ledger(), 'expenses': Ledger()}
+        cache = RollupCache()
+        for _ in range(5):
+            self.random_changes(rng, ledgers, cache, 400)
+            self.assertEqual(cache.verify(ledgers['income'], ledgers['expenses']), [])
+
+    def test_deltas_during_a_rebuild_are_replayed(self):
+        rng = random.Random(18)
+        ledgers = {'income': Ledger(), 'expenses': Ledger()}
+        cache = RollupCache()
+        self.random_changes(rng, ledgers, cache, 300)
+        columns = cache.begin_rebuild(ledgers['income'], ledgers['expenses'])
+        self.random_changes(rng, ledgers, cache, 300)
+        cache.finish_rebuild(python_totals(*columns))
+        self.assertEqual(cache.verify(ledgers['income'], ledgers['expenses']), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Checks the category index and the search box filters against a plain scan of the rows.
+
+Run from testApps/ with: python -m unittest test_search
+"""
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from ledger import Ledger
+from search import SearchIndex, parse_query
+
+CATEGORIES = ["Food", "Housing", "Transportation"]
+DESCRIPTIONS = ["Groceries", "Rent", "Bus fare", "Coffee beans", "Train ticket"]
+
+
+class CategorySearchTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(13)
+        self.ledger = Ledger()
+        self.index = SearchIndex(self.ledger)
+        first_day = datetime(2024, 1, 1)
+        for step in range(3000):
+            action = rng.random()
+            if action < 0.7 or len(self.ledger) < 10:
+                self.ledger.add(rng.randint(1, 10 ** 5), rng.choice(DESCRIPTIONS),
+                                first_day + timedelta(minutes=rng.randint(0, 500000)), rng.choice(CATEGORIES))
+            elif action < 0.85:
+                row_id = self.ledger.id_at(rng.randrange(len(self.ledger)))
+                self.ledger.update(row_id, rng.randint(1, 10 ** 5), rng.choice(DESCRIPTIONS), rng.choice(CATEGORIES))
+            else:
+                self.ledger.delete(self.ledger.id_at(rng.randrange(len(self.ledger))))
+            if step == 1500:
+                self.index.search(["a"])  # Build it now, so later changes go through its updates
+
+    def scan(self, category=None, start=None, end=None, words=()):
+        """The ids a search should find, in date order"""
+        found = []
+        for row in self.ledger:
+            if category is not None and row['category'].lower() != category.lower():
+                continue
+            if start is not None and row['date'] < start:
+                continue
+            if end is not None and row['date'] >= end:
+                continue
+            description_words = row['description'].lower().split()
+            if not all(any(word.startswith(prefix) for word in description_words) for prefix in words):
+                continue
+            found.append(row['id'])
+        return found
+
+    def test_rows_in_category_matches_a_scan(self):
+        for category in CATEGORIES:
+            for start, end in ((None, None), (datetime(2024, 3, 1), datetime(2024, 6, 1)),
+                               (datetime(2024, 8, 1), None), (datetime(2025, 1, 1), datetime(2024, 1, 1))):
+                self.assertEqual(sorted(self.ledger.rows_in_category(category, start, end)),
+                                 sorted(self.scan(category, start, end)))
+        self.assertEqual(self.ledger.rows_in_category("Nothing"), [])
+
+    def test_category_filter_matches_a_scan(self):
+        for text, words, category, start, end in (
+                ("category:food", (), "Food", None, None),
+                ("category:HOUSING after:2024-04-01", (), "Housing", datetime(2024, 4, 1), None),
+                ("tr category:Transportation before:2024-09-01", ("tr",), "Transportation", None, datetime(2024, 9, 1)),
+                ("coffee category:food", ("coffee",), "Food", None, None),
+                ("rent category:food", ("rent",), "Food", None, None)):
+            words_found, filters = parse_query(text)
+            self.assertEqual(filters.get('category', '').lower(), category.lower())
+            self.assertEqual(self.index.search(words_found, **filters), self.scan(category, start, end, words))
+        self.assertEqual(self.index.search(category="Nothing"), [])
+
+    def test_category_sums_match_a_scan(self):
+        totals = {}
+        for row in self.ledger:
+            totals[row['category']] = totals.get(row['category'], 0) + row['amount']
+        self.assertEqual(self.ledger.category_totals(), totals)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+
+
+class ViewManager:
+    """Builds each content view once and swaps between them.
+
+    Views are registered with a build(parent) function that returns the
+    view's frame, and optionally a refresh(regions) function. Showing a view
+    that was already built just packs its frame again; any regions marked
+    dirty while it was hidden are refreshed first.
+
+    max_views limits how many built views are kept alive. When set, the
+    least recently shown views are destroyed (and rebuilt if shown again),
+    which trades switching speed for memory on small machines.
+    """
+    def __init__(self, parent, max_views=None):
+        self.parent = parent
+        self.max_views = max_views
+        self.builders = {}  # name -> build(parent) function
+        self.refreshers = {}  # name -> refresh(regions) function
+        self.views = OrderedDict()  # name -> frame, least recently shown first
+        self.dirty = {}  # name -> set of regions needing a refresh
+        self.current = None
+        self.refresh_job = None
+
+    def register(self, name, build, refresh=None):
+        self.builders[name] = build
+        if refresh is not None:
+            self.refreshers[name] = refresh
+
+    def show(self, name):
+        """Display a view, building it first if needed, and return its frame"""
+        if self.current is not None and self.current != name:
+            self.views[self.current].pack_forget()
+
+        frame = self.views.get(name)
+        if frame is None:
+            frame = self.builders[name](self.parent)
+            self.views[name] = frame
+            # A freshly built view already shows the latest data
+            self.dirty.pop(name, None)
+        else:
+            self.views.move_to_end(name)
+            self._refresh(name)
+            frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.current = name
+        self._evict()
+        return frame
+
+    def mark_dirty(self, name, *regions):
+        """Note that some regions of a view show stale data.
+
+        Hidden views are refreshed next time they are shown. If the view is
+        on screen, one refresh is scheduled for when Tk is idle, so a burst
+        of changes only redraws once.
+        """
+        if name not in self.views:
+            return
+        self.dirty.setdefault(name, set()).update(regions)
+        if name == self.current and self.refresh_job is None:
+            self.refresh_job = self.parent.after_idle(self._refresh_current)
+
+    def evict(self, name):
+        """Destroy a built view; it will be rebuilt next time it is shown"""
+        frame = self.views.pop(name, None)
+        if frame is not None:
+            frame.destroy()
+        self.dirty.pop(name, None)
+        if self.current == name:
+            self.current = None
+
+    def _evict(self):
+        if self.max_views is None:
+            return
+        for name in list(self.views):
+            if len(self.views) <= self.max_views:
+                break
+            if name != self.current:
+                self.evict(name)
+
+    def _refresh_current(self):
+        self.refresh_job = None
+        if self.current is not None:
+            self._refresh(self.current)
+
+    def _refresh(self, name):
+        regions = self.dirty.pop(name, None)
+        if regions and name in self.refreshers:
+            self.refreshers[name](regions)
@@ -0,0 +1,188 @@
+import tkinter as tk
+
+
+class VirtualList(tk.Frame):
+    """A scrollable Listbox that only builds the rows that are on screen.
+
+    Rows are never stored in the widget. Instead, row_count() says how many
+    rows there are and format_row(index) builds the text for one row. Only
+    the visible rows plus a few either side (the overscan) are formatted and
+    inserted, so refreshing costs the same with 100 rows as with 100,000.
+
+    The scrollbar is driven by hand: it shows the position within the whole
+    list, and scrolling it moves the window of materialized rows.
+
+    After a single row changes, apply_change() patches just that listbox line
+    (or nothing, if the row is off screen) instead of re-rendering.
+
+    on_end() is called whenever the user scrolls to (or past) the last row,
+    so more rows can be loaded on demand (infinite scroll).
+    """
+    def __init__(self, parent, row_count, format_row, height=8, overscan=8, on_end=None,
+                 **listbox_options):
+        tk.Frame.__init__(self, parent, bg=parent.cget("bg"))
+        self.row_count = row_count
+        self.format_row = format_row
+        self.on_end = on_end
+        self.height = height
+        self.overscan = overscan
+        self.top = 0  # Row shown on the first visible line
+        self.window_start = 0  # Row held by listbox line 0
+        self.window_end = 0  # One past the last row held by the listbox
+        self.selected = None  # Selected row (not listbox line)
+
+        self.listbox = tk.Listbox(self, height=height, exportselection=False,
+                                  yscrollcommand=self._on_listbox_scroll, **listbox_options)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+
+    def refresh(self):
+        """Re-read the rows on screen (call after the underlying data changes)"""
+        self.selected = None
+        self.listbox.selection_clear(0, tk.END)
+        self._render(self.top)
+
+    def apply_change(self, event, index):
+        """Update the list after one row changed (a Ledger subscribe() callback)"""
+        if event == 'insert':
+            self.row_inserted(index)
+        elif event == 'update':
+            self.row_updated(index)
+        elif event == 'delete':
+            self.row_deleted(index)
+        else:
+            self.refresh()
+
+    def row_inserted(self, index):
+        """A row was inserted at index; rows after it moved down by one"""
+        if self.selected is not None and self.selected >= index:
+            self.selected += 1
+        if index < self.window_start:
+            # Above the materialized rows: only their positions shift
+            self.window_start += 1
+            self.window_end += 1
+            self.top += 1
+        elif index <= self.window_end:
+            self.listbox.insert(index - self.window_start, self.format_row(index))
+            self.window_end += 1
+            if index < self.top:
+                self.top += 1
+            self.listbox.yview(self.top - self.window_start)
+        self._update_scrollbar()
+
+    def row_updated(self, index):
+        """The row at index changed in place"""
+        if self.window_start <= index < self.window_end:
+            line = index - self.window_start
+            self.listbox.delete(line)
+            self.listbox.insert(line, self.format_row(index))
+            if self.selected == index:
+                self.listbox.selection_set(line)
+            self.listbox.yview(self.top - self.window_start)
+
+    def row_deleted(self, index):
+        """The row at index was removed; rows after it moved up by one"""
+        if self.selected == index:
+            self.selected = None
+        elif self.selected is not None and self.selected > index:
+            self.selected -= 1
+        if index < self.window_start:
+            self.window_start -= 1
+            self.window_end -= 1
+            self.top -= 1
+        elif index < self.window_end:
+            self.listbox.delete(index - self.window_start)
+            self.window_end -= 1
+            if index < self.top:
+                self.top -= 1
+        # Re-render if the deletion left blank lines that other rows could fill
+        if self.window_end - self.top < self.height and self.window_end < self.row_count():
+            self._render(self.top)
+        elif self.top > 0 and self.top + self.height > self.row_count():
+            self._render(self.top)
+        else:
+            self._update_scrollbar()
+
+    def curselection(self):
+        """Return the selected row index as a tuple, like Listbox.curselection()"""
+        if self.selected is None:
+            return ()
+        return (self.selected,)
+
+    def see(self, index):
+        """Scroll so that row index is visible"""
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self.height:
+            self.scroll_to(index - self.height + 1)
+
+    def yview(self, *args):
+        """Scrollbar callback: ('moveto', fraction) or ('scroll', n, 'units'/'pages')"""
+        total = self.row_count()
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def scroll_to(self, top):
+        """Make row top the first visible row"""
+        total = self.row_count()
+        top = max(0, min(top, total - self.height))
+        # Re-render once the view touches an edge of the materialized rows
+        # (unless that edge is the start or end of the data)
+        inside = (self.window_start < top or self.window_start == 0) and \
+                 (top + self.height < self.window_end or self.window_end == total)
+        if inside and self.window_start <= top and top + self.height <= self.window_end:
+            # Still inside the materialized rows: just move the listbox view
+            self.top = top
+            self.listbox.yview(top - self.window_start)
+            self._update_scrollbar()
+        else:
+            self._render(top)
+        if self.on_end is not None and top + self.height >= total:
+            self.on_end()
+
+    def _render(self, top):
+        """Format and insert the rows around top, replacing whatever was there"""
+        total = self.row_count()
+        top = max(0, min(top, total - self.height))
+        self.top = top
+        self.window_start = max(0, top - self.overscan)
+        self.window_end = min(total, top + self.height + self.overscan)
+
+        self.listbox.delete(0, tk.END)
+        rows = [self.format_row(index) for index in range(self.window_start, self.window_end)]
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+        self.listbox.yview(top - self.window_start)
+        if self.selected is not None and self.window_start <= self.selected < self.window_end:
+            self.listbox.selection_set(self.selected - self.window_start)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = self.row_count()
+        if total <= self.height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.height) / total)
+
+    def _on_listbox_scroll(self, first, last):
+        # The listbox scrolls itself on arrow keys or drag-selecting; follow it,
+        # and load more rows once it reaches the edge of the materialized window
+        top = self.window_start + round(float(first) * (self.window_end - self.window_start))
+        if top != self.top:
+            self.scroll_to(top)
+
+    def _on_select(self, event):
+        lines = self.listbox.curselection()
+        if lines:
+            self.selected = self.window_start + lines[0]
+
+    def _on_mousewheel(self, event):
+        self.scroll_to(self.top - int(event.delta / 120))
+        return "break"
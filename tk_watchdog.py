@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import traceback
+import tkinter as tk
+
+
+class Watchdog:
+    """Notices when a callback blocks a Tk mainloop.
+
+    A heartbeat is scheduled with root.after() every interval_ms; the drift
+    is how late it actually runs. Drifts are counted in a histogram, and any
+    drift over budget_ms is recorded as a stall. While the heartbeat is
+    overdue, a monitor thread samples the main thread's stack, so each stall
+    comes with the code that was running when it happened.
+    """
+    # Histogram bucket upper bounds in ms; the last bucket is everything above
+    BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+    MAX_STALLS = 200  # Longest stalls kept
+
+    def __init__(self, root, budget_ms=50, interval_ms=20):
+        self.root = root
+        self.budget_ms = budget_ms
+        self.interval_ms = interval_ms
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+        self.beats = 0
+        self.worst_ms = 0.0
+        self.stalls = []  # {'at', 'drift_ms', 'where', 'stack'} for the worst stalls
+        self.job = None
+        self.due = None  # perf_counter() when the next heartbeat should run
+        self.sample = None  # Stack of the main thread seen during the current stall
+        self.lock = threading.Lock()
+        self.main_thread = threading.main_thread().ident
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self._schedule()
+        threading.Thread(target=self._monitor, name="tk-watchdog", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.job is not None:
+            try:
+                self.root.after_cancel(self.job)
+            except tk.TclError:
+                pass  # The root is already gone
+            self.job = None
+
+    def _schedule(self):
+        self.due = time.perf_counter() + self.interval_ms / 1000
+        self.job = self.root.after(self.interval_ms, self._beat)
+
+    def _beat(self):
+        drift = max(0.0, (time.perf_counter() - self.due) * 1000)
+        with self.lock:
+            stack = self.sample
+            self.sample = None
+        self.beats += 1
+        self.worst_ms = max(self.worst_ms, drift)
+        for index, bound in enumerate(self.BUCKETS):
+            if drift < bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+        if drift > self.budget_ms:
+            self._record_stall(drift, stack)
+        if self.running:
+            self._schedule()
+
+    def _record_stall(self, drift, stack):
+        where = None
+        if stack:
+            # The innermost frame outside tkinter is what was blocking
+            for line in reversed(stack):
+                if os.sep + "tkinter" + os.sep not in line:
+                    where = line.strip().splitlines()[0]
+                    break
+        self.stalls.append({'at': time.strftime("%H:%M:%S"), 'drift_ms': round(drift, 1),
+                            'where': where, 'stack': stack})
+        if len(self.stalls) > self.MAX_STALLS:
+            self.stalls.remove(min(self.stalls, key=lambda stall: stall['drift_ms']))
+
+    def _monitor(self):
+        """Sample the main thread's stack while the heartbeat is overdue"""
+        while self.running:
+            time.sleep(self.budget_ms / 2000)
+            due = self.due
+            if due is None or (time.perf_counter() - due) * 1000 < self.budget_ms:
+                continue
+            frame = sys._current_frames().get(self.main_thread)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)
+            with self.lock:
+                self.sample = stack  # The latest sample of a stall wins
+
+    def percentile(self, fraction):
+        """Return the histogram bucket bound (ms) that fraction of beats fall under"""
+        target = fraction * self.beats
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return self.BUCKETS[index] if index < len(self.BUCKETS) else float('inf')
+        return 0
+
+    def summary(self):
+        """Return the histogram, percentiles and stalls as a JSON-ready dict"""
+        labels = [f"<{bound}ms" for bound in self.BUCKETS] + [f">={self.BUCKETS[-1]}ms"]
+        return {
+            'budget_ms': self.budget_ms,
+            'interval_ms': self.interval_ms,
+            'beats': self.beats,
+            'worst_ms': round(self.worst_ms, 1),
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'histogram': dict(zip(labels, self.histogram)),
+            'stalls': sorted(self.stalls, key=lambda stall: -stall['drift_ms']),
+        }
+
+    def export(self, path):
+        """Write summary() to path as JSON"""
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+def attach(root, budget_ms=50, interval_ms=20, output=None):
+    """Start watching root's mainloop and return the Watchdog.
+
+    It is also kept as root.watchdog, so the app can read the same one.
+    With output, the results are written there when the root is destroyed.
+    """
+    watchdog = Watchdog(root, budget_ms, interval_ms).start()
+    root.watchdog = watchdog
+    if output is not None:
+        def on_destroy(event):
+            if event.widget is root:
+                watchdog.stop()
+                watchdog.export(output)
+                print(f"Watchdog: {len(watchdog.stalls)} stall(s) over {budget_ms}ms, "
+                      f"worst {watchdog.worst_ms:.0f}ms - written to {output}")
+        root.bind("<Destroy>", on_destroy, add="+")
+    return watchdog
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a Tkinter app with a watchdog attached to every Tk root it creates")
+    parser.add_argument("script", help="the app to run, e.g. testApps/app.py")
+    parser.add_argument("--budget", type=float, default=50, help="stall budget in ms (default: %(default)s)")
+    parser.add_argument("--interval", type=int, default=20, help="heartbeat interval in ms (default: %(default)s)")
+    parser.add_argument("--output", default="watchdog.json", help="where to write the results")
+    args = parser.parse_args()
+
+    original_init = tk.Tk.__init__
+
+    def watched_init(root, *init_args, **init_kwargs):
+        original_init(root, *init_args, **init_kwargs)
+        attach(root, args.budget, args.interval, args.output)
+
+    tk.Tk.__init__ = watched_init
+    script = os.path.abspath(args.script)
+    sys.path.insert(0, os.path.dirname(script))  # So the app's own imports resolve
+    sys.argv = [script]
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()